@@ -3,30 +3,50 @@ Authentication module for AI Tutor application.
 Handles user authentication, invite-only signup, and subscription management.
 """
 import os
+import asyncio
+import csv
 import datetime
 import secrets
-import bcrypt
-from typing import Dict, Any, Optional, Tuple, List
+import time
+from typing import Dict, Any, Optional, Tuple, List, Iterable, TextIO
 
 # Assuming database.py is in the same directory
 from database import Database
+from password_hasher import PasswordHasher, HasherBusyError
+from session_tokens import SessionTokens
+from rate_limiter import RateLimiter
+
+BUSY_MESSAGE = "The server is busy, please try again in a moment."
+INVITE_BASE_URL = os.environ.get("INVITE_BASE_URL", "http://localhost:8501")
 
 class AuthManager:
     """
     Handles authentication and subscription management for the AI Tutor application.
     """
 
-    def __init__(self, database: Database):
+    def __init__(self, database: Database, hasher: Optional[PasswordHasher] = None,
+                 sessions: Optional[SessionTokens] = None, username_limiter: Optional[RateLimiter] = None,
+                 client_limiter: Optional[RateLimiter] = None):
         """
         Initialize the authentication manager.
 
         Args:
             database: Database instance for user storage
+            hasher: Worker pool for bcrypt hashing (a default pool is created if omitted)
+            sessions: Session token signer (a default one keyed by SESSION_SECRET is created if omitted)
+            username_limiter: Throttle for login and registration attempts per username
+                (default: burst of 5, then 1 per 12 seconds)
+            client_limiter: Throttle for login and registration attempts per client
+                (default: burst of 20, then 1 per 2 seconds)
         """
         self.database = database
+        self.hasher = hasher or PasswordHasher()
+        self.sessions = sessions or SessionTokens()
+        self.username_limiter = username_limiter or RateLimiter(rate=1 / 12, burst=5)
+        self.client_limiter = client_limiter or RateLimiter(rate=0.5, burst=20)
 
     def register_user(self, username: str, password: str, email: Optional[str] = None,
-                     invite_token: Optional[str] = None) -> Dict:
+                     invite_token: Optional[str] = None, client_id: Optional[str] = None) -> Dict:
         """
         Register a new user.
         Allows the first user to register without an invite token and sets them as admin.
@@ -36,10 +56,70 @@ class AuthManager:
             password: User's password (will be hashed)
             email: User's email address (optional)
             invite_token: Invite token for invite-only signup (required for non-first users)
+            client_id: Identifier of the calling client, e.g. its IP address (optional)
 
         Returns:
             Dictionary containing registration status and user info if successful
         """
+        error = self._check_rate_limits(username, client_id, scope="register") or \
+            self._validate_registration(username, password, invite_token)
+        if error:
+            return error
+
+        try:
+            password_hash = self._hash_password(password)
+        except HasherBusyError:
+            return {"success": False, "message": BUSY_MESSAGE}
+
+        return self._finish_registration(username, password_hash, email, invite_token)
+
+    async def register_user_async(self, username: str, password: str, email: Optional[str] = None,
+                                  invite_token: Optional[str] = None, client_id: Optional[str] = None) -> Dict:
+        """
+        Register a new user without blocking the event loop on the database or password hashing.
+
+        Args:
+            username: User's username
+            password: User's password (will be hashed)
+            email: User's email address (optional)
+            invite_token: Invite token for invite-only signup (required for non-first users)
+            client_id: Identifier of the calling client, e.g. its IP address (optional)
+
+        Returns:
+            Dictionary containing registration status and user info if successful
+        """
+        throttled = self._check_rate_limits(username, client_id, scope="register")
+        if throttled:
+            return throttled
+
+        # The validation queries SQLite, so it runs off the event loop like the insert
+        loop = asyncio.get_running_loop()
+        error = await loop.run_in_executor(None, self._validate_registration, username, password, invite_token)
+        if error:
+            return error
+
+        try:
+            password_hash = await asyncio.wrap_future(self.hasher.hash_async(password))
+        except HasherBusyError:
+            return {"success": False, "message": BUSY_MESSAGE}
+
+        return await loop.run_in_executor(
+            None, self._finish_registration, username, password_hash, email, invite_token
+        )
+
+    def _validate_registration(self, username: str, password: str,
+                               invite_token: Optional[str]) -> Optional[Dict]:
+        """
+        Run the cheap registration checks before any hashing is done.
+
+        Args:
+            username: User's username
+            password: User's password
+            invite_token: Invite token (required for non-first users)
+
+        Returns:
+            Failure dictionary, or None if registration may proceed
+        """
         is_first_user = self.database.count_users() == 0
 
         # Check if invite token is required
@@ -49,7 +129,7 @@ class AuthManager:
                     "success": False,
                     "message": "Invite token is required for registration."
                 }
-            # Validate the invite token before proceeding
+            # Cheap pre-check so bad tokens are rejected before hashing; redemption itself is atomic
             token_validation = self.validate_invite_token(invite_token)
             if not token_validation["success"]:
                  return {
@@ -70,54 +150,61 @@ class AuthManager:
                 "message": "Password must be at least 8 characters long."
             }
 
-        # Hash the password
-        password_hash = self._hash_password(password)
+        return None
+
+    def _finish_registration(self, username: str, password_hash: str, email: Optional[str],
+                             invite_token: Optional[str]) -> Dict:
+        """
+        Store a user whose password has already been hashed.
+
+        Args:
+            username: User's username
+            password_hash: Hashed password
+            email: User's email address (optional)
+            invite_token: Invite token (required for non-first users)
 
-        # Add user to database, setting admin status for the first user
-        user_id = self.database.add_user(username, password_hash, email, is_admin=is_first_user)
+        Returns:
+            Dictionary containing registration status and user info if successful
+        """
+        # Insert the user and redeem the invite atomically; the first user becomes admin
+        user_id, error = self.database.add_user_with_invite(username, password_hash, email, invite_token)
 
         if user_id == -1:
             return {
                 "success": False,
-                "message": "Username or email already exists."
+                "message": error
             }
 
-        # Mark invite token as used (only if not the first user)
-        token_used_successfully = True
-        if not is_first_user:
-            if not self.database.use_invite_link(invite_token, user_id):
-                # This case should ideally not happen if we validate the token first,
-                # but keep it as a safeguard.
-                token_used_successfully = False
-                # Consider if registration should fail if token use fails *after* validation.
-                # For now, proceed but warn.
-
         # Get the user info (including the new is_admin flag)
         user = self.database.get_user_by_id(user_id)
 
         message = "User registered successfully."
-        if not is_first_user and not token_used_successfully:
-            message = "User registered successfully, but there was an issue marking the invite token as used."
-        elif is_first_user:
-             message = "Administrator account registered successfully."
+        if user and user.get("is_admin"):
+            message = "Administrator account registered successfully."
 
         return {
             "success": True,
             "message": message,
-            "user": user
+            "user": user,
+            "session_token": self.sessions.issue(user) if user else None
         }
 
-    def login_user(self, username: str, password: str) -> Dict:
+    def login_user(self, username: str, password: str, client_id: Optional[str] = None) -> Dict:
         """
         Log in a user.
 
         Args:
             username: User's username
             password: User's password
+            client_id: Identifier of the calling client, e.g. its IP address (optional)
 
         Returns:
             Dictionary containing login status and user info if successful
         """
+        throttled = self._check_rate_limits(username, client_id)
+        if throttled:
+            return throttled
+
         # Get user from database
         user = self.database.get_user_by_username(username)
 
@@ -128,18 +215,164 @@ class AuthManager:
             }
 
         # Check password
-        if not self._check_password(password, user['password_hash']):
+        try:
+            matched = self._check_password(password, user['password_hash'])
+        except HasherBusyError:
+            return {"success": False, "message": BUSY_MESSAGE}
+
+        return self._login_result(user, matched)
+
+    async def login_user_async(self, username: str, password: str, client_id: Optional[str] = None) -> Dict:
+        """
+        Log in a user without blocking the event loop while the password is checked.
+
+        Args:
+            username: User's username
+            password: User's password
+            client_id: Identifier of the calling client, e.g. its IP address (optional)
+
+        Returns:
+            Dictionary containing login status and user info if successful
+        """
+        throttled = self._check_rate_limits(username, client_id)
+        if throttled:
+            return throttled
+
+        loop = asyncio.get_running_loop()
+        user = await loop.run_in_executor(None, self.database.get_user_by_username, username)
+
+        if not user:
             return {
                 "success": False,
                 "message": "Invalid username or password."
             }
 
+        try:
+            matched = await asyncio.wrap_future(self.hasher.verify_async(password, user['password_hash']))
+        except HasherBusyError:
+            return {"success": False, "message": BUSY_MESSAGE}
+
+        return self._login_result(user, matched)
+
+    def _check_rate_limits(self, username: Optional[str] = None, client_id: Optional[str] = None,
+                           scope: str = "login") -> Optional[Dict]:
+        """
+        Take a token from the client's and the username's buckets.
+
+        Args:
+            username: Username being logged in to or registered (optional)
+            client_id: Identifier of the calling client (optional)
+            scope: 'login' or 'register'; each has its own per-username buckets
+
+        Returns:
+            Failure dictionary with retry_after seconds, or None if the attempt may proceed
+        """
+        retry_after = 0.0
+        if client_id:
+            retry_after = self.client_limiter.acquire(client_id)
+        if not retry_after and username:
+            retry_after = self.username_limiter.acquire(self._limiter_key(username, scope))
+        if not retry_after:
+            return None
+
+        return {
+            "success": False,
+            "message": f"Too many attempts. Please try again in {int(retry_after) + 1} seconds.",
+            "retry_after": retry_after
+        }
+
+    @staticmethod
+    def _limiter_key(username: str, scope: str = "login") -> str:
+        """Build a username bucket key; registration attempts do not use up login attempts."""
+        username = username.casefold()
+        return username if scope == "login" else f"{scope}:{username}"
+
+    def _login_result(self, user: Dict, matched: bool) -> Dict:
+        """
+        Build the login response once the password has been checked.
+
+        Args:
+            user: User dictionary
+            matched: Whether the password matched
+
+        Returns:
+            Dictionary containing login status and user info if successful
+        """
+        if not matched:
+            return {
+                "success": False,
+                "message": "Invalid username or password."
+            }
+
+        # A successful login clears the username's failed-attempt budget
+        self.username_limiter.reset(self._limiter_key(user["username"]))
+
         return {
             "success": True,
             "message": "Login successful.",
-            "user": user # User dict now includes 'is_admin'
+            "user": user, # User dict now includes 'is_admin'
+            "session_token": self.sessions.issue(user)
+        }
+
+    def verify_session(self, token: Optional[str]) -> Dict:
+        """
+        Check a session token without touching the database.
+
+        The admin flag and subscription expiry are those at the time the token
+        was issued; set_user_admin and activate_subscription revoke the user's
+        older sessions when they change.
+
+        Args:
+            token: Session token from login_user or register_user
+
+        Returns:
+            Dictionary containing validation status and the session claims if valid
+        """
+        session = self.sessions.verify(token) if token else None
+        if session is None:
+            return {
+                "success": False,
+                "message": "Session is invalid or has expired. Please log in again."
+            }
+
+        expires = session["subscription_expires"]
+        session["subscription_active"] = bool(expires) and expires > datetime.datetime.now().isoformat()
+        return {
+            "success": True,
+            "message": "Session is valid.",
+            "session": session
         }
 
+    def logout_user(self, token: str) -> Dict:
+        """
+        Log out by revoking a session token.
+
+        Args:
+            token: Session token
+
+        Returns:
+            Dictionary containing logout status
+        """
+        if not self.sessions.revoke(token):
+            return {
+                "success": False,
+                "message": "Session is invalid or has expired."
+            }
+
+        return {
+            "success": True,
+            "message": "Logged out successfully."
+        }
+
+    def revoke_user_sessions(self, user_id: int) -> None:
+        """
+        Invalidate every session issued to a user so far.
+
+        Args:
+            user_id: User ID
+        """
+        self.sessions.revoke_user(user_id)
+
     def generate_invite_link(self, created_by_user_id: int, email: Optional[str] = None,
                             expires_in_days: int = 7) -> Dict:
         """
@@ -175,15 +408,96 @@ class AuthManager:
                 "message": f"Failed to generate invite link: {e}"
             }
 
-    def get_active_invites(self, requesting_user_id: int) -> Dict:
+    def generate_invites_bulk(self, created_by_user_id: int, emails: Iterable[Optional[str]],
+                              expires_in_days: int = 7, csv_output: Optional[TextIO] = None) -> Dict:
+        """
+        Generate many invite links at once, restricted to admin users.
+
+        All invites are inserted in a single transaction. If csv_output is
+        given, an email,link CSV row is written to it for each invite.
+
+        Args:
+            created_by_user_id: User ID of the user attempting to create the invites
+            emails: Email address for each invite (None or "" for an open invite)
+            expires_in_days: Number of days until the invites expire
+            csv_output: Text file object to write the CSV to (optional)
+
+        Returns:
+            Dictionary with success status, message, and the created invites.
+        """
+        if not self.database.is_user_admin(created_by_user_id):
+            return {
+                "success": False,
+                "message": "Only administrators can generate invite links.",
+                "invites": []
+            }
+
+        try:
+            invites = self.database.create_invite_links(
+                created_by_user_id, (email.strip() if email else None for email in emails), expires_in_days
+            )
+        except Exception as e:
+            # Log the exception e
+            return {
+                "success": False,
+                "message": f"Failed to generate invite links: {e}",
+                "invites": []
+            }
+
+        if csv_output is not None:
+            self.write_invites_csv(invites, csv_output)
+
+        return {
+            "success": True,
+            "message": f"{len(invites)} invite links generated successfully. Expire in {expires_in_days} days.",
+            "invites": invites
+        }
+
+    @staticmethod
+    def invite_url(token: str) -> str:
+        """
+        Build the signup link for an invite token.
+
+        Args:
+            token: The invite token
+
+        Returns:
+            Signup URL under INVITE_BASE_URL
         """
-        Get active invite links created by the requesting user (if admin).
+        return f"{INVITE_BASE_URL.rstrip('/')}/?invite={token}"
+
+    def write_invites_csv(self, invites: Iterable[Dict], output: TextIO) -> int:
+        """
+        Write an email,link,expires_at CSV row per invite.
+
+        Args:
+            invites: Invite dictionaries with email, token and expires_at
+            output: Text file object to write to
+
+        Returns:
+            Number of rows written, excluding the header
+        """
+        writer = csv.writer(output)
+        writer.writerow(["email", "link", "expires_at"])
+        count = 0
+        for invite in invites:
+            writer.writerow([invite["email"] or "", self.invite_url(invite["token"]), invite["expires_at"]])
+            count += 1
+        return count
+
+    def get_active_invites(self, requesting_user_id: int, after_id: Optional[int] = None,
+                           limit: Optional[int] = 50) -> Dict:
+        """
+        Get a page of active invite links created by the requesting user (if admin), newest first.
 
         Args:
             requesting_user_id: User ID of the user requesting the list.
+            after_id: next_after_id from the previous page (optional)
+            limit: Maximum number of invites per page (None returns all)
 
         Returns:
-            Dictionary with success status, message, and list of invites.
+            Dictionary with success status, message, list of invites, and
+            next_after_id (None on the last page).
         """
         if not self.database.is_user_admin(requesting_user_id):
             return {
@@ -193,11 +507,13 @@ class AuthManager:
             }
 
         try:
-            invites = self.database.get_active_invites_by_creator(requesting_user_id)
+            invites = self.database.get_active_invites_by_creator(requesting_user_id, after_id, limit)
+            has_more = limit is not None and len(invites) == limit
             return {
                 "success": True,
                 "message": "Active invites retrieved successfully.",
-                "invites": invites
+                "invites": invites,
+                "next_after_id": invites[-1]["id"] if has_more else None
             }
         except Exception as e:
             # Log the exception e
@@ -217,96 +533,111 @@ class AuthManager:
         Returns:
             Dictionary containing validation status and invite info if valid
         """
-        conn = self.database.get_connection()
-        cursor = conn.cursor()
+        invite = self.database.get_invite(token)
 
-        cursor.execute(
-            "SELECT id, email, expires_at FROM invite_links WHERE token = ? AND used = 0",
-            (token,)
-        )
-        invite = cursor.fetchone()
-
-        if not invite:
+        if not invite or invite["used"]:
             return {
                 "success": False,
                 "message": "Invalid or already used invite token."
             }
 
         # Check if token is expired
-        try:
-            # Ensure expires_at is treated as a string before parsing
-            expires_at_str = invite["expires_at"]
-            if isinstance(expires_at_str, datetime.datetime):
-                 # If it's already a datetime object (less likely with sqlite3.Row but possible)
-                 expires_at = expires_at_str
-            else:
-                 expires_at = datetime.datetime.fromisoformat(str(expires_at_str))
-
-            # Make comparison timezone-aware if necessary, assuming UTC for now
-            if expires_at < datetime.datetime.now(): # Consider timezone if DB stores differently
-                return {
-                    "success": False,
-                    "message": "Invite token has expired."
-                }
-        except ValueError:
+        if invite["expires_at_ts"] <= int(time.time()):
             return {
                 "success": False,
-                "message": "Invalid expiration date format for invite token."
-            }
-        except TypeError:
-             return {
-                "success": False,
-                "message": "Could not parse expiration date for invite token."
+                "message": "Invite token has expired."
             }
 
-
         return {
             "success": True,
             "message": "Invite token is valid.",
-            "invite": dict(invite)
+            "invite": {key: invite[key] for key in ("id", "email", "expires_at")}
         }
 
     def activate_subscription(self, user_id: int, duration_days: int = 30) -> Dict:
         """
         Activate a subscription for a user (Placeholder).
 
+        The user's existing sessions still carry the old subscription claim,
+        so they are revoked and a fresh session token is returned.
+
         Args:
             user_id: User ID
             duration_days: Number of days to activate the subscription for
 
         Returns:
-            Dictionary containing activation status
+            Dictionary containing activation status and a new session token
         """
-        # Placeholder - In real app, update DB: users table set subscription_active=1, subscription_expires=...
+        # Placeholder - payment handling is not implemented, only the DB record is updated
         expires_at_dt = datetime.datetime.now() + datetime.timedelta(days=duration_days)
         expires_at_iso = expires_at_dt.isoformat()
 
-        # Simulate DB update (in real app, call self.database.update_subscription(user_id, expires_at_iso))
-        print(f"Simulating subscription activation for user {user_id} until {expires_at_iso}")
+        if not self.database.update_subscription(user_id, True, expires_at_iso):
+            return {
+                "success": False,
+                "message": "User not found."
+            }
 
+        self.revoke_user_sessions(user_id)
+        user = self.database.get_user_by_id(user_id)
         return {
             "success": True,
             "message": "Subscription activated successfully.",
-            "expires_at": expires_at_iso
+            "expires_at": expires_at_iso,
+            "session_token": self.sessions.issue(user) if user else None
+        }
+
+    def set_user_admin(self, requesting_user_id: int, user_id: int, is_admin: bool) -> Dict:
+        """
+        Grant or revoke administrator rights, restricted to admin users.
+
+        The user's existing sessions are revoked so the new role takes effect
+        on their next request rather than when their token expires.
+
+        Args:
+            requesting_user_id: User ID of the admin making the change
+            user_id: User ID whose rights change
+            is_admin: Whether the user should be an admin
+
+        Returns:
+            Dictionary containing update status
+        """
+        if not self.database.is_user_admin(requesting_user_id):
+            return {
+                "success": False,
+                "message": "Only administrators can change admin rights."
+            }
+
+        if not self.database.set_user_admin(user_id, is_admin):
+            return {
+                "success": False,
+                "message": "User not found."
+            }
+
+        self.revoke_user_sessions(user_id)
+        return {
+            "success": True,
+            "message": "Admin rights granted." if is_admin else "Admin rights revoked."
         }
 
     def _hash_password(self, password: str) -> str:
         """
-        Hash a password using bcrypt.
+        Hash a password using bcrypt on the worker pool.
 
         Args:
             password: Password to hash
 
         Returns:
             Hashed password as a string
+
+        Raises:
+            HasherBusyError: If the hashing pool is saturated
         """
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+        return self.hasher.hash(password)
 
     def _check_password(self, password: str, hashed_password: str) -> bool:
         """
-        Check if a password matches a hash.
+        Check if a password matches a hash on the worker pool.
 
         Args:
             password: Password to check
@@ -314,13 +645,11 @@ class AuthManager:
 
         Returns:
             True if the password matches, False otherwise
+
+        Raises:
+            HasherBusyError: If the hashing pool is saturated
         """
-        try:
-            return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
-        except ValueError:
-             # Handle cases where hashed_password might not be a valid bcrypt hash
-             print(f"Warning: Invalid hash format encountered for user during login check.")
-             return False
+        return self.hasher.verify(password, hashed_password)
 
 # End of class AuthManager
 
@@ -0,0 +1,273 @@
+"""
+Online backup module for AI Tutor application.
+Snapshots the live SQLite database with the sqlite3 backup API while
+Streamlit sessions keep writing.
+"""
+import argparse
+import datetime
+import glob
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from database import Database
+
+
+class BackupService:
+    """
+    Takes, prunes and restores snapshots of a Database.
+
+    In WAL mode readers never block writers, so the whole database is copied
+    in a single step from one read snapshot. Otherwise pages are copied
+    pages_per_step at a time with a pause between steps, which releases the
+    read lock so writers are not starved; SQLite restarts such a backup
+    whenever another connection writes, so it gives up after max_restarts
+    restarts or max_duration seconds.
+    """
+
+    def __init__(self, database: Database, backup_dir: str = "backups", pages_per_step: int = 256,
+                 step_sleep: float = 0.05, retain: int = 7, max_restarts: int = 10,
+                 max_duration: Optional[float] = 600.0):
+        """
+        Initialize the backup service.
+
+        Args:
+            database: Database instance to back up
+            backup_dir: Directory snapshots are written to
+            pages_per_step: Pages copied per backup step for non-WAL databases (-1 copies everything in one step)
+            step_sleep: Seconds to pause between steps for non-WAL databases
+            retain: Number of most recent snapshots to keep
+            max_restarts: Times a stepped backup may be restarted by concurrent writes before failing
+            max_duration: Seconds a stepped backup may run before failing (None for no limit)
+        """
+        self.database = database
+        self.backup_dir = backup_dir
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self.retain = retain
+        self.max_restarts = max_restarts
+        self.max_duration = max_duration
+        self.last_result: Optional[Dict] = None
+
+        self._stop: Optional[threading.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._backup_lock = threading.Lock()
+
+        os.makedirs(backup_dir, exist_ok=True)
+
+    def backup_now(self) -> Dict:
+        """
+        Write a new snapshot and prune old ones.
+
+        Returns:
+            Dictionary with the snapshot path, pages and bytes copied, step count,
+            restart count, duration in seconds and throughput in MB/s
+
+        Raises:
+            sqlite3.OperationalError: If a stepped backup keeps being restarted by writers
+        """
+        with self._backup_lock:
+            base = os.path.splitext(os.path.basename(self.database.db_path))[0]
+            timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            path = os.path.join(self.backup_dir, f"{base}-{timestamp}.db")
+            temp_path = path + ".tmp"
+
+            steps = 0
+            restarts = 0
+            total_pages = 0
+            last_remaining: Optional[int] = None
+            started = time.monotonic()
+
+            def progress(status: int, remaining: int, total: int) -> None:
+                nonlocal steps, restarts, total_pages, last_remaining
+                steps += 1
+                total_pages = total
+                # A write by another connection makes SQLite start over from page 0
+                if last_remaining is not None and remaining > last_remaining:
+                    restarts += 1
+                    if restarts > self.max_restarts:
+                        raise sqlite3.OperationalError(
+                            f"Backup restarted {restarts} times by concurrent writes; giving up."
+                        )
+                last_remaining = remaining
+                if remaining and self.max_duration is not None and time.monotonic() - started > self.max_duration:
+                    raise sqlite3.OperationalError(
+                        f"Backup did not finish within {self.max_duration} seconds; giving up."
+                    )
+                if remaining and self.step_sleep:
+                    time.sleep(self.step_sleep)
+
+            target = sqlite3.connect(temp_path)
+            try:
+                with self.database.connection() as source:
+                    journal_mode = source.execute("PRAGMA journal_mode").fetchone()[0]
+                    if journal_mode.lower() == "wal":
+                        # One step inside a read transaction: a consistent snapshot that never restarts
+                        source.execute("BEGIN")
+                        try:
+                            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                            source.backup(target, pages=-1, progress=progress)
+                        finally:
+                            source.rollback()
+                    else:
+                        source.backup(target, pages=self.pages_per_step, progress=progress)
+                page_size = target.execute("PRAGMA page_size").fetchone()[0]
+            except BaseException:
+                target.close()
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
+            target.close()
+            # Only complete snapshots ever appear under the final name
+            os.replace(temp_path, path)
+            duration = time.monotonic() - started
+
+            size = os.path.getsize(path)
+            result = {
+                "path": path,
+                "pages": total_pages,
+                "bytes": size,
+                "page_size": page_size,
+                "steps": steps,
+                "restarts": restarts,
+                "duration_seconds": round(duration, 3),
+                "throughput_mb_s": round(size / (1024 * 1024) / duration, 2) if duration > 0 else None,
+                "pruned": self.prune()
+            }
+            self.last_result = result
+            return result
+
+    def list_backups(self) -> List[str]:
+        """
+        List snapshots, oldest first.
+
+        Returns:
+            List of snapshot paths
+        """
+        base = os.path.splitext(os.path.basename(self.database.db_path))[0]
+        return sorted(glob.glob(os.path.join(self.backup_dir, f"{base}-*.db")))
+
+    def prune(self) -> List[str]:
+        """
+        Delete snapshots beyond the retention count.
+
+        Returns:
+            Paths of deleted snapshots
+        """
+        backups = self.list_backups()
+        expired = backups[:-self.retain] if self.retain > 0 else []
+        for path in expired:
+            try:
+                os.unlink(path)
+            except OSError as e:
+                print(f"Could not delete old backup {path}: {e}")
+        return expired
+
+    def restore(self, snapshot_path: str) -> Dict:
+        """
+        Replace the live database contents with a snapshot.
+
+        The snapshot is copied over the database file directly, not through
+        the write-behind queue, so it is meant for maintenance windows with
+        the app stopped. Writes already queued are flushed first so they are
+        not applied on top of the restored data.
+
+        Args:
+            snapshot_path: Path to a snapshot written by backup_now()
+
+        Returns:
+            Dictionary with the snapshot path, pages copied and duration in seconds
+        """
+        if not os.path.exists(snapshot_path):
+            raise FileNotFoundError(f"Backup not found: {snapshot_path}")
+
+        with self._backup_lock:
+            started = time.monotonic()
+            if self.database.write_queue is not None:
+                self.database.submit_write(lambda conn: None).result()
+            snapshot = sqlite3.connect(snapshot_path)
+            try:
+                total_pages = snapshot.execute("PRAGMA page_count").fetchone()[0]
+                with self.database.connection() as target:
+                    snapshot.backup(target)
+            finally:
+                snapshot.close()
+
+            # Cached rows may not exist in the restored data, and the snapshot
+            # may predate (or include) the full-text index
+            self.database.clear_caches()
+            self.database.detect_full_text_search()
+
+            return {
+                "path": snapshot_path,
+                "pages": total_pages,
+                "duration_seconds": round(time.monotonic() - started, 3)
+            }
+
+    def start(self, interval_seconds: float = 3600.0) -> None:
+        """
+        Start taking snapshots periodically in a background thread.
+
+        Args:
+            interval_seconds: Seconds between snapshots
+        """
+        if self._thread is not None:
+            return
+
+        stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(interval_seconds):
+                try:
+                    result = self.backup_now()
+                    print(f"Backup written to {result['path']} in {result['duration_seconds']}s "
+                          f"({result['throughput_mb_s']} MB/s)")
+                except (sqlite3.Error, OSError) as e:
+                    print(f"Backup failed: {e}")
+
+        self._stop = stop
+        self._thread = threading.Thread(target=run, name="db-backup", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background backup thread if it is running."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._stop = None
+
+
+def main() -> None:
+    """Command-line entry point: take, list or restore backups."""
+    parser = argparse.ArgumentParser(description="Back up or restore the AI Tutor database")
+    parser.add_argument("--db", default=os.environ.get("DATABASE_PATH", "ai_tutor.db"),
+                        help="Path to the SQLite database file")
+    parser.add_argument("--backup-dir", default=os.environ.get("BACKUP_FOLDER", "backups"))
+    parser.add_argument("--retain", type=int, default=7, help="Number of snapshots to keep")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("backup", help="Write a new snapshot")
+    subparsers.add_parser("list", help="List snapshots")
+    restore_parser = subparsers.add_parser("restore", help="Restore a snapshot into the database")
+    restore_parser.add_argument("snapshot")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    try:
+        service = BackupService(db, backup_dir=args.backup_dir, retain=args.retain)
+        if args.command == "backup":
+            print(service.backup_now())
+        elif args.command == "list":
+            for path in service.list_backups():
+                print(path)
+        else:
+            print(service.restore(args.snapshot))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Bulk export/import module for AI Tutor application.
+Streams quizzes, questions, quiz attempts and question responses to and
+from JSONL or CSV files with constant memory use, regardless of table size.
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+from typing import Dict, Iterator, List, Optional
+
+from database import Database
+from document_store import decompress_text, store_document
+
+# Exported tables in dependency order, with the columns written for each.
+# Quizzes are exported with their source material inlined rather than as
+# a document reference, so dumps are portable between databases.
+EXPORT_COLUMNS: Dict[str, List[str]] = {
+    "quizzes": ["id", "title", "source_material", "created_at", "created_by"],
+    "questions": ["id", "quiz_id", "question_text", "question_type", "correct_answer", "options"],
+    "quiz_attempts": ["id", "quiz_id", "user_id", "started_at", "completed_at", "score", "max_score"],
+    "question_responses": ["id", "attempt_id", "question_id", "user_response", "is_correct"],
+}
+
+FORMATS = ("jsonl", "csv")
+# 'replace' is an upsert rather than INSERT OR REPLACE: a REPLACE deletes the
+# old row without firing the *_fts_delete triggers, leaving the FTS indexes stale
+CONFLICT_MODES = ("ignore", "replace", "abort")
+
+
+class DataTransfer:
+    """
+    Streams table contents between a Database and a directory of JSONL/CSV files.
+
+    Each table is written to ``<directory>/<table>.<format>``. Reads use
+    fetchmany() and writes use chunked executemany(), so only one chunk of
+    rows is held in memory at a time.
+    """
+
+    def __init__(self, database: Database, chunk_size: int = 1000):
+        """
+        Initialize the transfer helper.
+
+        Args:
+            database: Database instance to export from or import into
+            chunk_size: Rows per fetch/insert batch
+        """
+        self.database = database
+        self.chunk_size = chunk_size
+
+    def export_tables(self, out_dir: str, fmt: str = "jsonl", tables: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Export tables to files.
+
+        Args:
+            out_dir: Directory to write the files into
+            fmt: 'jsonl' or 'csv'
+            tables: Tables to export (default: all exportable tables)
+
+        Returns:
+            Dictionary of table name to number of rows written
+        """
+        self._check_format(fmt)
+        os.makedirs(out_dir, exist_ok=True)
+        counts = {}
+
+        for table in self._resolve_tables(tables):
+            path = os.path.join(out_dir, f"{table}.{fmt}")
+            columns = EXPORT_COLUMNS[table]
+            count = 0
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                if fmt == "csv":
+                    writer = csv.writer(f)
+                    writer.writerow(columns)
+                    for row in self.iter_rows(table):
+                        writer.writerow(["" if value is None else value for value in row])
+                        count += 1
+                else:
+                    for row in self.iter_rows(table):
+                        f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                        f.write("\n")
+                        count += 1
+            counts[table] = count
+
+        return counts
+
+    def iter_rows(self, table: str) -> Iterator[tuple]:
+        """
+        Stream the exported columns of a table in primary key order.
+
+        Args:
+            table: Table name
+
+        Yields:
+            Row tuples ordered as EXPORT_COLUMNS[table]
+        """
+        if table == "quizzes":
+            sql = """
+                SELECT q.id, q.title, q.source_material, q.created_at, q.created_by,
+                       d.compression, d.body
+                FROM quizzes q
+                LEFT JOIN documents d ON d.id = q.document_id
+                ORDER BY q.id
+            """
+        else:
+            sql = f"SELECT {', '.join(EXPORT_COLUMNS[table])} FROM {table} ORDER BY id"
+
+        with self.database.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql)
+            while True:
+                rows = cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    if table == "quizzes":
+                        source = row[2]
+                        if row["body"] is not None:
+                            source = decompress_text(row["compression"], row["body"])
+                        yield (row[0], row[1], source, row[3], row[4])
+                    else:
+                        yield tuple(row)
+
+    def import_tables(self, in_dir: str, fmt: str = "jsonl", tables: Optional[List[str]] = None,
+                      on_conflict: str = "ignore") -> Dict[str, int]:
+        """
+        Import tables from files written by export_tables().
+
+        Row IDs are preserved. Each chunk is committed separately, so an
+        interrupted import can be resumed with on_conflict='ignore'.
+
+        Args:
+            in_dir: Directory containing the files
+            fmt: 'jsonl' or 'csv'
+            tables: Tables to import (default: every exportable table with a file present)
+            on_conflict: 'ignore', 'replace' or 'abort' when a row ID already exists
+
+        Returns:
+            Dictionary of table name to number of rows read
+        """
+        self._check_format(fmt)
+        if on_conflict not in CONFLICT_MODES:
+            raise ValueError(f"Unsupported conflict mode: {on_conflict}")
+
+        counts = {}
+        for table in self._resolve_tables(tables):
+            path = os.path.join(in_dir, f"{table}.{fmt}")
+            if not os.path.exists(path):
+                continue
+            counts[table] = self._import_file(table, path, fmt, on_conflict)
+
+        if "quiz_attempts" in counts:
+            # Summary rows are derived from attempts, so bring them back in line
+            self.database.rebuild_user_stats()
+        if "quiz_attempts" in counts or "question_responses" in counts:
+            # Replaced attempts and added responses are not reflected in question_stats
+            self.database.reset_question_stats()
+            self.database.clear_caches()
+
+        return counts
+
+    def _import_file(self, table: str, path: str, fmt: str, on_conflict: str) -> int:
+        """Insert the rows of one file in chunks and return how many were read."""
+        columns = EXPORT_COLUMNS[table]
+        if table == "quizzes":
+            insert_columns = ["id", "title", "document_id", "created_at", "created_by"]
+        else:
+            insert_columns = columns
+        sql = (
+            f"INSERT {'OR IGNORE ' if on_conflict == 'ignore' else ''}INTO {table} ({', '.join(insert_columns)}) "
+            f"VALUES ({', '.join('?' * len(insert_columns))})"
+        )
+        if on_conflict == "replace":
+            updates = ", ".join(f"{column} = excluded.{column}" for column in insert_columns if column != "id")
+            sql += f" ON CONFLICT (id) DO UPDATE SET {updates}"
+
+        count = 0
+        chunk = []
+        for record in self._read_records(path, fmt):
+            chunk.append([record.get(column) for column in columns])
+            if len(chunk) >= self.chunk_size:
+                self._insert_chunk(table, sql, chunk)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            self._insert_chunk(table, sql, chunk)
+            count += len(chunk)
+
+        return count
+
+    def _insert_chunk(self, table: str, sql: str, chunk: List[list]) -> None:
+        """Write one chunk of rows in a single transaction, through the writer in write-behind mode."""
+        def insert(conn: sqlite3.Connection) -> None:
+            if table == "quizzes":
+                for row in chunk:
+                    source = row[2]
+                    row[2] = store_document(conn, source) if source is not None else None
+            conn.executemany(sql, chunk)
+
+        self.database.submit_write(insert).result()
+
+    def _read_records(self, path: str, fmt: str) -> Iterator[Dict]:
+        """Stream records from a JSONL or CSV file."""
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            if fmt == "csv":
+                for record in csv.DictReader(f):
+                    # CSV has no NULL; empty fields were written for None
+                    yield {key: (value if value != "" else None) for key, value in record.items()}
+            else:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def _resolve_tables(self, tables: Optional[List[str]]) -> List[str]:
+        """Validate table names and return them in dependency order."""
+        if tables is None:
+            return list(EXPORT_COLUMNS)
+        unknown = set(tables) - set(EXPORT_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unsupported tables: {', '.join(sorted(unknown))}")
+        return [table for table in EXPORT_COLUMNS if table in tables]
+
+    @staticmethod
+    def _check_format(fmt: str) -> None:
+        """Reject unsupported file formats."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format: {fmt}")
+
+
+def main() -> None:
+    """Command-line entry point: export or import quiz data."""
+    parser = argparse.ArgumentParser(description="Export or import AI Tutor quiz data")
+    parser.add_argument("--db", default=os.environ.get("DATABASE_PATH", "ai_tutor.db"),
+                        help="Path to the SQLite database file")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--tables", nargs="+", choices=list(EXPORT_COLUMNS),
+                        help="Tables to transfer (default: all)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write tables to a directory")
+    export_parser.add_argument("directory")
+
+    import_parser = subparsers.add_parser("import", help="Load tables from a directory")
+    import_parser.add_argument("directory")
+    import_parser.add_argument("--on-conflict", choices=list(CONFLICT_MODES), default="ignore")
+
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    try:
+        transfer = DataTransfer(db, chunk_size=args.chunk_size)
+        if args.command == "export":
+            counts = transfer.export_tables(args.directory, args.format, args.tables)
+        else:
+            counts = transfer.import_tables(args.directory, args.format, args.tables, args.on_conflict)
+        for table, count in counts.items():
+            print(f"{table}: {count} rows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,154 +3,633 @@ Database module for AI Tutor application.
 Sets up SQLite database for storing quiz results and user data.
 """
 import os
+import re
+import json
 import sqlite3
-from typing import Dict, List, Any, Optional, Tuple
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Tuple, Iterator, Iterable, Callable
 import datetime
 import secrets
 
+from migrations import apply_migrations, current_version
+from user_cache import UserCache
+from query_profiler import QueryProfiler
+from document_store import store_document, load_document
+from write_queue import WriteBehindQueue
+
+# UPDATE ... RETURNING needs SQLite 3.35+
+_SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# PRAGMAs applied to every new connection, in order. Callers can override
+# individual entries through Database(pragmas=...); a value of None skips it.
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    "busy_timeout": 5000,        # ms to wait on a locked database before erroring
+    "journal_mode": "WAL",       # readers no longer block on writers
+    "synchronous": "NORMAL",     # fsync at checkpoints only; safe with WAL
+    "cache_size": -16000,        # negative means KiB, so ~16 MB per connection
+    "mmap_size": 134217728,      # 128 MB of memory-mapped reads
+    "temp_store": "MEMORY",
+    "wal_autocheckpoint": 1000,  # pages
+}
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections shared between Streamlit session threads.
+
+    Connections are created lazily up to ``max_size`` and handed out one
+    caller at a time, so concurrent readers each get their own connection
+    instead of queueing on a single shared one.
+    """
+
+    def __init__(self, db_path: str, max_size: int = 5, timeout: float = 30.0,
+                 pragmas: Optional[Dict[str, Any]] = None, factory: Any = sqlite3.Connection):
+        """
+        Initialize the connection pool.
+
+        Args:
+            db_path: Path to the SQLite database file
+            max_size: Maximum number of pooled connections
+            timeout: Seconds to wait for a free connection before giving up
+            pragmas: PRAGMA name/value pairs applied to each new connection
+            factory: Connection class or factory passed to sqlite3.connect
+        """
+        if max_size < 1:
+            raise ValueError("Connection pool size must be at least 1.")
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.factory = factory
+
+        self._idle: List[sqlite3.Connection] = []
+        self._all: List[sqlite3.Connection] = []
+        # Slots reserved by callers opening a connection outside the lock
+        self._opening = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # Usage counters
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+
+    def create_connection(self) -> sqlite3.Connection:
+        """
+        Open a new connection configured for use by the application.
+
+        Returns:
+            SQLite connection object
+        """
+        try:
+            # Pooled connections move between threads, but only one caller
+            # holds a given connection at a time.
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=self.timeout,
+                                   factory=self.factory)
+            conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+            for name, value in self.pragmas.items():
+                if value is not None:
+                    conn.execute(f"PRAGMA {name} = {value}")
+        except sqlite3.Error as e:
+            print(f"Database connection error: {e}")
+            raise
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Check out a connection, waiting if the pool is exhausted.
+
+        Returns:
+            SQLite connection object
+
+        Raises:
+            sqlite3.OperationalError: If no connection became free within the timeout
+        """
+        with self._cond:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed.")
+
+            if not self._idle and len(self._all) + self._opening >= self.max_size:
+                self._waits += 1
+                started = time.monotonic()
+                available = self._cond.wait_for(
+                    lambda: self._idle or len(self._all) + self._opening < self.max_size or self._closed,
+                    timeout=self.timeout
+                )
+                self._wait_time += time.monotonic() - started
+                if not available:
+                    self._timeouts += 1
+                    raise sqlite3.OperationalError(
+                        f"Timed out after {self.timeout}s waiting for a database connection."
+                    )
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Connection pool is closed.")
+
+            self._checkouts += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            if self._idle:
+                return self._idle.pop()
+            # Reserve the slot; opening the connection happens outside the lock
+            self._opening += 1
+
+        try:
+            conn = self.create_connection()
+        except BaseException:
+            with self._cond:
+                self._opening -= 1
+                self._checkouts -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._opening -= 1
+            self._all.append(conn)
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """
+        Return a connection to the pool.
+
+        Any transaction the caller left open is rolled back so the next
+        borrower never inherits uncommitted state or a held lock.
+
+        Args:
+            conn: Connection previously returned by acquire()
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # A broken connection is dropped instead of being reused
+            with self._cond:
+                self._in_use -= 1
+                if conn in self._all:
+                    self._all.remove(conn)
+                self._cond.notify()
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            return
+
+        with self._cond:
+            self._in_use -= 1
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Close idle connections and stop handing out new ones."""
+        with self._cond:
+            self._closed = True
+            for conn in self._idle:
+                conn.close()
+                self._all.remove(conn)
+            self._idle = []
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool usage counters.
+
+        Returns:
+            Dictionary of pool size, checkout, and wait statistics
+        """
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "open_connections": len(self._all),
+                "idle_connections": len(self._idle),
+                "in_use": self._in_use,
+                "peak_in_use": self._peak_in_use,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "total_wait_seconds": round(self._wait_time, 6),
+                "timeouts": self._timeouts
+            }
+
+
+class _WriteRejected(Exception):
+    """Raised inside a write operation to roll it back and report the reason to the caller."""
+
+
 class Database:
     """
     Handles database operations for the AI Tutor application.
     Uses SQLite for storing quiz results and user data.
     """
 
-    def __init__(self, db_path: str = "ai_tutor.db"):
+    def __init__(self, db_path: str = "ai_tutor.db", pool_size: int = 5, pool_timeout: float = 30.0,
+                 pragmas: Optional[Dict[str, Any]] = None, user_cache_size: int = 1024,
+                 user_cache_ttl: float = 300.0, profiler: Optional[QueryProfiler] = None,
+                 write_behind: bool = False, write_batch_size: int = 100, write_batch_delay: float = 0.005):
         """
-        Initialize the database connection.
+        Initialize the database connection pool.
 
         Args:
             db_path: Path to the SQLite database file
+            pool_size: Maximum number of pooled connections
+            pool_timeout: Seconds to wait for a pooled connection before giving up
+            pragmas: PRAGMA overrides merged over DEFAULT_PRAGMAS (None values disable a PRAGMA)
+            user_cache_size: Maximum number of user records cached in memory
+            user_cache_ttl: Seconds a cached user record stays valid
+            profiler: QueryProfiler that records method and statement timings (optional)
+            write_behind: Funnel all mutations through a single writer thread that commits them in batches
+            write_batch_size: Maximum mutations per batched commit in write-behind mode
+            write_batch_delay: Seconds the writer waits to fill a batch in write-behind mode
         """
         self.db_path = db_path
-        self.conn = None
+        self.profiler = profiler
+        profile = dict(DEFAULT_PRAGMAS)
+        profile.update(pragmas or {})
+        factory = profiler.connection_factory() if profiler else sqlite3.Connection
+        self.pool = ConnectionPool(db_path, max_size=pool_size, timeout=pool_timeout, pragmas=profile,
+                                   factory=factory)
+        self._local = threading.local()
+        self._thread_conns: List[sqlite3.Connection] = []
+        self._thread_conns_lock = threading.Lock()
+        self._checkpoint_stop: Optional[threading.Event] = None
+        self._checkpoint_thread: Optional[threading.Thread] = None
+        self.user_cache = UserCache(max_size=user_cache_size, ttl_seconds=user_cache_ttl)
+        self._cache_listeners: List[Callable[[], None]] = []
+        if profiler:
+            profiler.instrument(self, exclude=[
+                "connection", "transaction", "get_connection", "close_connection", "close",
+                "pool_stats", "user_cache_stats", "profiling_snapshot", "explain_query_plan",
+                "start_checkpointer", "stop_checkpointer", "submit_write", "write_queue_stats",
+                "add_cache_listener", "clear_caches"
+            ])
         self.initialize_db()
+        self.write_queue: Optional[WriteBehindQueue] = None
+        if write_behind:
+            self.write_queue = WriteBehindQueue(self.pool.create_connection, max_batch=write_batch_size,
+                                                max_delay=write_batch_delay)
 
-    def get_connection(self) -> sqlite3.Connection:
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
         """
-        Get a database connection, creating one if it doesn't exist.
+        Check out a pooled connection for the duration of a ``with`` block.
 
-        Returns:
+        The connection is returned to the pool on exit; an uncommitted
+        transaction is rolled back.
+
+        Yields:
             SQLite connection object
         """
-        if self.conn is None:
+        conn = self.pool.acquire()
+        try:
+            yield conn
+        finally:
+            self.pool.release(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run a ``with`` block as a single write transaction on a pooled connection.
+
+        The write lock is taken up front (BEGIN IMMEDIATE), the transaction is
+        committed when the block exits normally and rolled back on error.
+
+        Yields:
+            SQLite connection object
+        """
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
             try:
-                self.conn = sqlite3.connect(self.db_path, check_same_thread=False) # Added check_same_thread=False for Streamlit
-                self.conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-            except sqlite3.Error as e:
-                print(f"Database connection error: {e}")
+                yield conn
+            except BaseException:
+                conn.rollback()
                 raise
-        return self.conn
+            conn.commit()
+
+    def submit_write(self, operation: Callable[[sqlite3.Connection], Any]) -> Future:
+        """
+        Run a write operation without waiting for it to commit.
+
+        In write-behind mode the operation is queued for the writer thread;
+        otherwise it runs immediately in its own transaction. Operations must
+        not commit or roll back themselves.
+
+        Args:
+            operation: Callable taking a connection inside a write transaction and returning a result
+
+        Returns:
+            Future resolved with the operation's result once it is committed
+        """
+        if self.write_queue is not None:
+            return self.write_queue.submit(operation)
+
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            with self.transaction() as conn:
+                result = operation(conn)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        return future
+
+    def write_queue_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get write-behind batching counters.
+
+        Returns:
+            Dictionary of writer statistics, or None if write-behind mode is off
+        """
+        return self.write_queue.stats() if self.write_queue is not None else None
+
+    def _run_write(self, operation: Callable[[sqlite3.Connection], Any]) -> Any:
+        """
+        Run a write operation in a transaction and wait for its result.
+
+        Args:
+            operation: Callable taking a connection inside a write transaction and returning a result
+
+        Returns:
+            The operation's result once committed
+        """
+        if self.write_queue is not None:
+            return self.write_queue.submit(operation).result()
+        with self.transaction() as conn:
+            return operation(conn)
+
+    def get_connection(self) -> sqlite3.Connection:
+        """
+        Get the calling thread's dedicated connection, creating one if it doesn't exist.
+
+        Kept for callers that manage a connection themselves; prefer
+        ``with db.connection() as conn:`` which uses the pool.
+
+        Returns:
+            SQLite connection object
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self.pool.create_connection()
+            self._local.conn = conn
+            with self._thread_conns_lock:
+                self._thread_conns.append(conn)
+        return conn
 
     def close_connection(self) -> None:
-        """Close the database connection if it exists."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        """Close the calling thread's dedicated connection if it exists."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+            with self._thread_conns_lock:
+                self._thread_conns.remove(conn)
+
+    def close(self) -> None:
+        """Flush pending writes and close all pooled and per-thread connections."""
+        if self.write_queue is not None:
+            self.write_queue.close()
+            self.write_queue = None
+        self.stop_checkpointer()
+        self.pool.close()
+        with self._thread_conns_lock:
+            for conn in self._thread_conns:
+                conn.close()
+            self._thread_conns = []
+        self._local = threading.local()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool usage counters.
+
+        Returns:
+            Dictionary of pool size, checkout, and wait statistics
+        """
+        return self.pool.stats()
+
+    def profiling_snapshot(self) -> Dict[str, Any]:
+        """
+        Get query profiling statistics together with connection pool and cache counters.
+
+        Returns:
+            Dictionary of profiler, pool, user cache and write queue statistics;
+            profiler and write_queue are None when disabled
+        """
+        return {
+            "profiler": self.profiler.snapshot() if self.profiler else None,
+            "pool": self.pool_stats(),
+            "user_cache": self.user_cache_stats(),
+            "write_queue": self.write_queue_stats()
+        }
+
+    def checkpoint(self, mode: str = "PASSIVE") -> Dict[str, int]:
+        """
+        Run a WAL checkpoint, copying committed pages back into the main database file.
+
+        Args:
+            mode: Checkpoint mode ('PASSIVE', 'FULL', 'RESTART' or 'TRUNCATE')
+
+        Returns:
+            Dictionary with the busy flag, WAL frame count and checkpointed frame count
+        """
+        mode = mode.upper()
+        if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+            raise ValueError(f"Unsupported checkpoint mode: {mode}")
+
+        with self.connection() as conn:
+            busy, log_frames, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+
+        return {"busy": busy, "log_frames": log_frames, "checkpointed_frames": checkpointed}
+
+    def start_checkpointer(self, interval_seconds: float = 60.0, mode: str = "PASSIVE") -> None:
+        """
+        Start a background thread that checkpoints the WAL periodically.
+
+        Args:
+            interval_seconds: Seconds between checkpoints
+            mode: Checkpoint mode passed to checkpoint()
+        """
+        if self._checkpoint_thread is not None:
+            return
+
+        stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(interval_seconds):
+                try:
+                    self.checkpoint(mode)
+                except sqlite3.Error as e:
+                    print(f"WAL checkpoint error: {e}")
+
+        self._checkpoint_stop = stop
+        self._checkpoint_thread = threading.Thread(target=run, name="db-checkpointer", daemon=True)
+        self._checkpoint_thread.start()
+
+    def stop_checkpointer(self) -> None:
+        """Stop the background checkpoint thread if it is running."""
+        if self._checkpoint_thread is None:
+            return
+        self._checkpoint_stop.set()
+        self._checkpoint_thread.join()
+        self._checkpoint_thread = None
+        self._checkpoint_stop = None
 
     def initialize_db(self) -> None:
         """Create database tables if they don't exist."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+
+            # Create users table
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                email TEXT UNIQUE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                subscription_active BOOLEAN DEFAULT 0,
+                subscription_expires TIMESTAMP,
+                is_admin BOOLEAN DEFAULT 0
+            )
+            """)
+
+            # Create invite_links table
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS invite_links (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                token TEXT UNIQUE NOT NULL,
+                email TEXT,
+                created_by INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                expires_at TIMESTAMP NOT NULL,
+                used BOOLEAN DEFAULT 0,
+                used_by INTEGER,
+                used_at TIMESTAMP,
+                FOREIGN KEY (created_by) REFERENCES users (id),
+                FOREIGN KEY (used_by) REFERENCES users (id)
+            )
+            """)
+
+            # Create quizzes table
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS quizzes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                source_material TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                created_by INTEGER,
+                FOREIGN KEY (created_by) REFERENCES users (id)
+            )
+            """)
+
+            # Create questions table
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                quiz_id INTEGER NOT NULL,
+                question_text TEXT NOT NULL,
+                question_type TEXT NOT NULL,  -- 'multiple_choice' or 'short_answer'
+                correct_answer TEXT,
+                options TEXT,  -- JSON string for multiple choice options
+                FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
+            )
+            """)
+
+            # Create quiz_attempts table
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS quiz_attempts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                quiz_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                completed_at TIMESTAMP,
+                score REAL,
+                max_score INTEGER,
+                FOREIGN KEY (quiz_id) REFERENCES quizzes (id),
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+            """)
+
+            # Create question_responses table
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS question_responses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                attempt_id INTEGER NOT NULL,
+                question_id INTEGER NOT NULL,
+                user_response TEXT,
+                is_correct BOOLEAN,
+                FOREIGN KEY (attempt_id) REFERENCES quiz_attempts (id),
+                FOREIGN KEY (question_id) REFERENCES questions (id)
+            )
+            """)
+
+            # Create progress_reports table
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS progress_reports (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                report_path TEXT,
+                emailed_to TEXT,
+                emailed_at TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+            """)
 
-        # Create users table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            email TEXT UNIQUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            subscription_active BOOLEAN DEFAULT 0,
-            subscription_expires TIMESTAMP,
-            is_admin BOOLEAN DEFAULT 0
-        )
-        """)
+            conn.commit()
 
-        # Create invite_links table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS invite_links (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            token TEXT UNIQUE NOT NULL,
-            email TEXT,
-            created_by INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at TIMESTAMP NOT NULL,
-            used BOOLEAN DEFAULT 0,
-            used_by INTEGER,
-            used_at TIMESTAMP,
-            FOREIGN KEY (created_by) REFERENCES users (id),
-            FOREIGN KEY (used_by) REFERENCES users (id)
-        )
-        """)
+            # Bring indexes and later schema changes up to date
+            apply_migrations(conn)
 
-        # Create quizzes table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS quizzes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            source_material TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            created_by INTEGER,
-            FOREIGN KEY (created_by) REFERENCES users (id)
-        )
-        """)
+        self.detect_full_text_search()
 
-        # Create questions table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS questions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            quiz_id INTEGER NOT NULL,
-            question_text TEXT NOT NULL,
-            question_type TEXT NOT NULL,  -- 'multiple_choice' or 'short_answer'
-            correct_answer TEXT,
-            options TEXT,  -- JSON string for multiple choice options
-            FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
-        )
-        """)
+    def detect_full_text_search(self) -> bool:
+        """
+        Check whether the questions_fts index exists and remember the result,
+        e.g. after the database file was replaced by a restore.
 
-        # Create quiz_attempts table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS quiz_attempts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            quiz_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            completed_at TIMESTAMP,
-            score REAL,
-            max_score INTEGER,
-            FOREIGN KEY (quiz_id) REFERENCES quizzes (id),
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-        """)
+        Returns:
+            True if question search can use full-text search
+        """
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'questions_fts'"
+            ).fetchone()
+        self.has_full_text_search = row is not None
+        return self.has_full_text_search
+
+    def schema_version(self) -> int:
+        """
+        Get the schema migration version of the database.
 
-        # Create question_responses table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS question_responses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            attempt_id INTEGER NOT NULL,
-            question_id INTEGER NOT NULL,
-            user_response TEXT,
-            is_correct BOOLEAN,
-            FOREIGN KEY (attempt_id) REFERENCES quiz_attempts (id),
-            FOREIGN KEY (question_id) REFERENCES questions (id)
-        )
-        """)
+        Returns:
+            Highest applied migration version
+        """
+        with self.connection() as conn:
+            return current_version(conn)
 
-        # Create progress_reports table
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS progress_reports (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            title TEXT NOT NULL,
-            generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            report_path TEXT,
-            emailed_to TEXT,
-            emailed_at TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-        """)
+    def explain_query_plan(self, sql: str, params: Tuple = ()) -> List[str]:
+        """
+        Get SQLite's query plan for a statement, e.g. to confirm an index is used.
+
+        Args:
+            sql: SQL statement to explain
+            params: Statement parameters
 
-        conn.commit()
+        Returns:
+            List of plan step descriptions
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return [row["detail"] for row in cursor.fetchall()]
 
     # User management methods
     def add_user(self, username: str, password_hash: str, email: Optional[str] = None, is_admin: bool = False) -> int:
@@ -166,20 +645,18 @@ class Database:
         Returns:
             User ID of the newly created user or -1 if integrity error
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
         try:
-            cursor.execute(
+            user_id = self._run_write(lambda conn: conn.execute(
                 "INSERT INTO users (username, password_hash, email, is_admin) VALUES (?, ?, ?, ?)",
                 (username, password_hash, email, is_admin)
-            )
-            conn.commit()
-            return cursor.lastrowid
+            ).lastrowid)
         except sqlite3.IntegrityError:
             # Username or email already exists
             return -1
 
+        self.user_cache.invalidate(username=username)
+        return user_id
+
     def get_user_by_username(self, username: str) -> Optional[Dict]:
         """
         Get user information by username.
@@ -190,15 +667,22 @@ class Database:
         Returns:
             Dictionary containing user information or None if not found
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        cached = self.user_cache.get_by_username(username)
+        if cached is not None:
+            return cached
 
-        cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-        user = cursor.fetchone()
+        generation = self.user_cache.generation()
+        with self.connection() as conn:
+            cursor = conn.cursor()
 
-        if user:
-            return dict(user)
-        return None
+            cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
+            user = cursor.fetchone()
+
+            if user:
+                user = dict(user)
+                self.user_cache.put(user, generation)
+                return user
+            return None
 
     def get_user_by_id(self, user_id: int) -> Optional[Dict]:
         """
@@ -210,15 +694,22 @@ class Database:
         Returns:
             Dictionary containing user information or None if not found
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        cached = self.user_cache.get_by_id(user_id)
+        if cached is not None:
+            return cached
+
+        generation = self.user_cache.generation()
+        with self.connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-        user = cursor.fetchone()
+            cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+            user = cursor.fetchone()
 
-        if user:
-            return dict(user)
-        return None
+            if user:
+                user = dict(user)
+                self.user_cache.put(user, generation)
+                return user
+            return None
 
     def is_user_admin(self, user_id: int) -> bool:
         """
@@ -233,6 +724,71 @@ class Database:
         user = self.get_user_by_id(user_id)
         return user is not None and bool(user.get('is_admin', 0))
 
+    def set_user_admin(self, user_id: int, is_admin: bool) -> bool:
+        """
+        Grant or revoke administrator rights.
+
+        Session tokens carry the admin flag, so callers should go through
+        AuthManager.set_user_admin, which also revokes the user's sessions.
+
+        Args:
+            user_id: User's ID
+            is_admin: Whether the user should be an admin
+
+        Returns:
+            True if the user exists and was updated
+        """
+        updated = self._run_write(lambda conn: conn.execute(
+            "UPDATE users SET is_admin = ? WHERE id = ?", (is_admin, user_id)
+        ).rowcount)
+
+        self.user_cache.invalidate(user_id=user_id)
+        return updated > 0
+
+    def update_subscription(self, user_id: int, active: bool, expires_at: Optional[str] = None) -> bool:
+        """
+        Update a user's subscription status.
+
+        Args:
+            user_id: User's ID
+            active: Whether the subscription is active
+            expires_at: ISO timestamp when the subscription expires (optional)
+
+        Returns:
+            True if the user exists and was updated
+        """
+        updated = self._run_write(lambda conn: conn.execute(
+            "UPDATE users SET subscription_active = ?, subscription_expires = ? WHERE id = ?",
+            (active, expires_at, user_id)
+        ).rowcount)
+
+        self.user_cache.invalidate(user_id=user_id)
+        return updated > 0
+
+    def add_cache_listener(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback that drops an in-memory cache built from this database.
+
+        Args:
+            callback: Called with no arguments by clear_caches()
+        """
+        self._cache_listeners.append(callback)
+
+    def clear_caches(self) -> None:
+        """Drop the user cache and every registered cache, e.g. after the data was replaced wholesale."""
+        self.user_cache.clear()
+        for callback in list(self._cache_listeners):
+            callback()
+
+    def user_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get user cache hit/miss counters.
+
+        Returns:
+            Dictionary of user cache statistics
+        """
+        return self.user_cache.stats()
+
     # Invite link methods
     def create_invite_link(self, created_by: int, email: Optional[str] = None, expires_in_days: int = 7) -> Tuple[int, str]:
         """
@@ -249,16 +805,68 @@ class Database:
         token = secrets.token_urlsafe(32)
         expires_at = datetime.datetime.now() + datetime.timedelta(days=expires_in_days)
 
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        invite_id = self._run_write(lambda conn: conn.execute(
+            "INSERT INTO invite_links (token, email, created_by, expires_at, expires_at_ts) VALUES (?, ?, ?, ?, ?)",
+            (token, email, created_by, expires_at.isoformat(), int(expires_at.timestamp()))
+        ).lastrowid)
 
-        cursor.execute(
-            "INSERT INTO invite_links (token, email, created_by, expires_at) VALUES (?, ?, ?, ?)",
-            (token, email, created_by, expires_at)
-        )
-        conn.commit()
+        return invite_id, token
+
+    def create_invite_links(self, created_by: int, emails: Iterable[Optional[str]],
+                            expires_in_days: int = 7) -> List[Dict]:
+        """
+        Create many invite links in a single transaction.
+
+        Args:
+            created_by: User ID of the creator
+            emails: Email address for each invite (None for an open invite)
+            expires_in_days: Number of days until the invites expire
+
+        Returns:
+            List of dictionaries with id, email, token and expires_at, in input order
+        """
+        expires_at = datetime.datetime.now() + datetime.timedelta(days=expires_in_days)
+        expires_iso = expires_at.isoformat()
+        expires_ts = int(expires_at.timestamp())
+        rows = [(secrets.token_urlsafe(32), email, created_by, expires_iso, expires_ts) for email in emails]
+        if not rows:
+            return []
+
+        def insert(conn: sqlite3.Connection) -> List[int]:
+            cursor = conn.cursor()
+            # The write lock is held, so every id above the current maximum belongs to this batch
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM invite_links")
+            last_id = cursor.fetchone()[0]
+
+            cursor.executemany(
+                "INSERT INTO invite_links (token, email, created_by, expires_at, expires_at_ts) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+            cursor.execute("SELECT id FROM invite_links WHERE id > ? ORDER BY id", (last_id,))
+            return [row[0] for row in cursor.fetchall()]
+
+        invite_ids = self._run_write(insert)
+        return [
+            {"id": invite_id, "email": email, "token": token, "expires_at": expires_iso}
+            for invite_id, (token, email, _, _, _) in zip(invite_ids, rows)
+        ]
+
+    def get_invite(self, token: str) -> Optional[Dict]:
+        """
+        Get an invite link by token.
+
+        Args:
+            token: The invite token
 
-        return cursor.lastrowid, token
+        Returns:
+            Dictionary containing invite link information or None if not found
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM invite_links WHERE token = ?", (token,))
+            invite = cursor.fetchone()
+            return dict(invite) if invite else None
 
     def use_invite_link(self, token: str, user_id: int) -> bool:
         """
@@ -271,59 +879,122 @@ class Database:
         Returns:
             True if successful, False if token is invalid, expired, or already used
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return self._run_write(lambda conn: self._redeem_invite(conn, token, user_id)) is not None
 
-        # Check if token exists and is not used
-        cursor.execute(
-            "SELECT id, expires_at FROM invite_links WHERE token = ? AND used = 0",
-            (token,)
-        )
-        invite = cursor.fetchone()
+    def add_user_with_invite(self, username: str, password_hash: str, email: Optional[str] = None,
+                             invite_token: Optional[str] = None) -> Tuple[int, Optional[str]]:
+        """
+        Create a user and redeem their invite token in a single transaction.
 
-        if not invite:
-            return False
+        The first user of an empty database needs no token and becomes an admin.
+        If the token cannot be redeemed, the user row is rolled back.
 
-        # Check if token is expired
-        invite_id = invite["id"]
-        try:
-            expires_at = datetime.datetime.fromisoformat(invite["expires_at"])
-        except ValueError:
-             # Handle cases where expires_at might not be in ISO format (though it should be)
-             return False
+        Args:
+            username: User's username
+            password_hash: Hashed password
+            email: User's email address (optional)
+            invite_token: Invite token (required unless the database has no users)
 
-        if expires_at < datetime.datetime.now():
-            return False
+        Returns:
+            Tuple of (user_id, None) on success or (-1, error message) on failure
+        """
+        def register(conn: sqlite3.Connection) -> int:
+            cursor = conn.cursor()
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM users)")
+            is_first_user = not cursor.fetchone()[0]
 
-        # Mark as used
-        cursor.execute(
-            "UPDATE invite_links SET used = 1, used_by = ?, used_at = CURRENT_TIMESTAMP WHERE id = ?",
-            (user_id, invite_id)
-        )
-        conn.commit()
+            if not is_first_user and not invite_token:
+                raise _WriteRejected("Invite token is required for registration.")
 
-        return True
+            try:
+                cursor.execute(
+                    "INSERT INTO users (username, password_hash, email, is_admin) VALUES (?, ?, ?, ?)",
+                    (username, password_hash, email, is_first_user)
+                )
+            except sqlite3.IntegrityError:
+                raise _WriteRejected("Username or email already exists.")
+            user_id = cursor.lastrowid
+
+            if not is_first_user and self._redeem_invite(conn, invite_token, user_id) is None:
+                # Raising rolls back the user row along with the failed redemption
+                raise _WriteRejected("Invalid, expired, or already used invite token.")
+            return user_id
 
-    def get_active_invites_by_creator(self, creator_id: int) -> List[Dict]:
+        try:
+            user_id = self._run_write(register)
+        except _WriteRejected as e:
+            return -1, str(e)
+
+        self.user_cache.invalidate(username=username)
+        return user_id, None
+
+    def _redeem_invite(self, conn: sqlite3.Connection, token: str, user_id: int) -> Optional[int]:
         """
-        Get all active (unused and not expired) invite links created by a specific user.
+        Atomically mark an unused, unexpired invite as used by a user.
+
+        A single conditional UPDATE both checks and claims the token, so two
+        concurrent registrations can never redeem the same invite.
 
         Args:
-            creator_id: User ID of the creator
+            conn: Connection holding an open write transaction
+            token: The invite token
+            user_id: User ID of the user redeeming the invite
 
         Returns:
-            List of dictionaries containing active invite link information
+            Invite ID if the token was redeemed, None otherwise
         """
-        conn = self.get_connection()
+        now_ts = int(time.time())
         cursor = conn.cursor()
-        now_iso = datetime.datetime.now().isoformat()
+
+        if _SQLITE_HAS_RETURNING:
+            cursor.execute(
+                "UPDATE invite_links SET used = 1, used_by = ?, used_at = CURRENT_TIMESTAMP "
+                "WHERE token = ? AND used = 0 AND expires_at_ts > ? RETURNING id",
+                (user_id, token, now_ts)
+            )
+            row = cursor.fetchone()
+            return row[0] if row else None
 
         cursor.execute(
-            "SELECT * FROM invite_links WHERE created_by = ? AND used = 0 AND expires_at > ? ORDER BY created_at DESC",
-            (creator_id, now_iso)
+            "UPDATE invite_links SET used = 1, used_by = ?, used_at = CURRENT_TIMESTAMP "
+            "WHERE token = ? AND used = 0 AND expires_at_ts > ?",
+            (user_id, token, now_ts)
         )
-        invites = cursor.fetchall()
-        return [dict(invite) for invite in invites]
+        if cursor.rowcount != 1:
+            return None
+        cursor.execute("SELECT id FROM invite_links WHERE token = ?", (token,))
+        return cursor.fetchone()[0]
+
+    def get_active_invites_by_creator(self, creator_id: int, after_id: Optional[int] = None,
+                                      limit: Optional[int] = None) -> List[Dict]:
+        """
+        Get active (unused and not expired) invite links created by a specific user, newest first.
+
+        Pass the id of the last row of one page as after_id to fetch the next page.
+
+        Args:
+            creator_id: User ID of the creator
+            after_id: Keyset cursor - only include invites with a smaller ID (optional)
+            limit: Maximum number of invites to return (optional)
+
+        Returns:
+            List of dictionaries containing active invite link information
+        """
+        sql = "SELECT * FROM invite_links WHERE created_by = ? AND used = 0 AND expires_at_ts > ?"
+        params: List[Any] = [creator_id, int(time.time())]
+        if after_id is not None:
+            sql += " AND id < ?"
+            params.append(after_id)
+        sql += " ORDER BY id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            invites = cursor.fetchall()
+            return [dict(invite) for invite in invites]
 
     # Quiz methods
     def create_quiz(self, title: str, source_material: str, created_by: Optional[int] = None) -> int:
@@ -338,17 +1009,66 @@ class Database:
         Returns:
             Quiz ID of the newly created quiz
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return self._run_write(lambda conn: self._insert_quiz(conn, title, source_material, created_by))
+
+    def _insert_quiz(self, conn: sqlite3.Connection, title: str, source_material: Optional[str],
+                     created_by: Optional[int]) -> int:
+        """
+        Insert a quiz row, storing its source material as a shared document.
+
+        Args:
+            conn: Connection holding an open write transaction
+            title: Quiz title
+            source_material: Source material the quiz is based on
+            created_by: User ID of the creator (optional)
 
+        Returns:
+            Quiz ID of the newly created quiz
+        """
+        document_id = store_document(conn, source_material) if source_material is not None else None
+        cursor = conn.cursor()
         cursor.execute(
-            "INSERT INTO quizzes (title, source_material, created_by) VALUES (?, ?, ?)",
-            (title, source_material, created_by)
+            "INSERT INTO quizzes (title, document_id, created_by) VALUES (?, ?, ?)",
+            (title, document_id, created_by)
         )
-        conn.commit()
-
         return cursor.lastrowid
 
+    def store_document(self, text: str) -> int:
+        """
+        Store a document, reusing the existing row if identical content is already stored.
+
+        Args:
+            text: Document text
+
+        Returns:
+            Document ID, stable for identical content
+        """
+        return self._run_write(lambda conn: store_document(conn, text))
+
+    def get_document(self, document_id: int) -> Optional[Dict]:
+        """
+        Get a stored document.
+
+        Args:
+            document_id: Document ID
+
+        Returns:
+            Dictionary with id, content_hash, size and text, or None if not found
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, content_hash, size, created_at FROM documents WHERE id = ?",
+                (document_id,)
+            )
+            document = cursor.fetchone()
+            if not document:
+                return None
+
+            document = dict(document)
+            document["text"] = load_document(conn, document_id)
+            return document
+
     def add_question(self, quiz_id: int, question_text: str, question_type: str,
                     correct_answer: str, options: Optional[str] = None) -> int:
         """
@@ -364,16 +1084,88 @@ class Database:
         Returns:
             Question ID of the newly created question
         """
-        conn = self.get_connection()
+        return self._run_write(lambda conn: conn.execute(
+            "INSERT INTO questions (quiz_id, question_text, question_type, correct_answer, options) VALUES (?, ?, ?, ?, ?)",
+            (quiz_id, question_text, question_type, correct_answer, options)
+        ).lastrowid)
+
+    def add_questions(self, quiz_id: int, questions: List[Dict]) -> List[int]:
+        """
+        Add several questions to a quiz in a single transaction.
+
+        Args:
+            quiz_id: Quiz ID
+            questions: Question dictionaries as produced by QuizGenerator.generate_quiz
+                (question_text, question_type, correct_answer, options)
+
+        Returns:
+            Question IDs of the newly created questions, in input order
+        """
+        return self._run_write(lambda conn: self._insert_questions(conn, quiz_id, questions))
+
+    def create_quiz_with_questions(self, title: str, source_material: str, questions: List[Dict],
+                                   created_by: Optional[int] = None) -> Tuple[int, List[int]]:
+        """
+        Create a quiz and all of its questions in a single transaction.
+
+        Args:
+            title: Quiz title
+            source_material: Source material the quiz is based on
+            questions: Question dictionaries as produced by QuizGenerator.generate_quiz
+            created_by: User ID of the creator (optional)
+
+        Returns:
+            Tuple of (quiz_id, question_ids)
+        """
+        def create(conn: sqlite3.Connection) -> Tuple[int, List[int]]:
+            quiz_id = self._insert_quiz(conn, title, source_material, created_by)
+            return quiz_id, self._insert_questions(conn, quiz_id, questions)
+
+        return self._run_write(create)
+
+    def _insert_questions(self, conn: sqlite3.Connection, quiz_id: int, questions: List[Dict]) -> List[int]:
+        """
+        Batch-insert questions for a quiz inside the caller's write transaction.
+
+        Args:
+            conn: Connection holding an open write transaction
+            quiz_id: Quiz ID
+            questions: Question dictionaries
+
+        Returns:
+            Question IDs of the inserted questions, in input order
+        """
+        rows = []
+        for question in questions:
+            options = question.get("options")
+            if options is not None and not isinstance(options, str):
+                options = json.dumps(options)
+            rows.append((
+                quiz_id,
+                question["question_text"],
+                question["question_type"],
+                question.get("correct_answer"),
+                options
+            ))
+
+        if not rows:
+            return []
+
         cursor = conn.cursor()
+        # The write lock is held, so every id above the current maximum belongs to this batch
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM questions")
+        last_id = cursor.fetchone()[0]
 
-        cursor.execute(
+        cursor.executemany(
             "INSERT INTO questions (quiz_id, question_text, question_type, correct_answer, options) VALUES (?, ?, ?, ?, ?)",
-            (quiz_id, question_text, question_type, correct_answer, options)
+            rows
         )
-        conn.commit()
 
-        return cursor.lastrowid
+        cursor.execute(
+            "SELECT id FROM questions WHERE quiz_id = ? AND id > ? ORDER BY id",
+            (quiz_id, last_id)
+        )
+        return [row[0] for row in cursor.fetchall()]
 
     def get_quiz_with_questions(self, quiz_id: int) -> Optional[Dict]:
         """
@@ -385,25 +1177,127 @@ class Database:
         Returns:
             Dictionary containing quiz information and questions or None if not found
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
 
-        # Get quiz information
-        cursor.execute("SELECT * FROM quizzes WHERE id = ?", (quiz_id,))
-        quiz = cursor.fetchone()
+            # Get quiz information
+            cursor.execute("SELECT * FROM quizzes WHERE id = ?", (quiz_id,))
+            quiz = cursor.fetchone()
 
-        if not quiz:
-            return None
+            if not quiz:
+                return None
+
+            quiz_dict = dict(quiz)
+            if quiz_dict.get("document_id") is not None:
+                quiz_dict["source_material"] = load_document(conn, quiz_dict["document_id"])
+
+            # Get questions
+            cursor.execute("SELECT * FROM questions WHERE quiz_id = ?", (quiz_id,))
+            questions = cursor.fetchall()
+
+            quiz_dict["questions"] = [dict(q) for q in questions]
 
-        quiz_dict = dict(quiz)
+            return quiz_dict
 
-        # Get questions
-        cursor.execute("SELECT * FROM questions WHERE quiz_id = ?", (quiz_id,))
-        questions = cursor.fetchall()
+    # Search methods
+    def search_questions(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Full-text search the question bank, best matches first.
+
+        Args:
+            query: Free-text search terms
+            limit: Maximum number of questions to return
+
+        Returns:
+            List of question dictionaries with a highlighted 'snippet' and a 'rank'
+            (lower is better)
+        """
+        match = self._fts_query(query)
+        if not match:
+            return []
+
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            if self.has_full_text_search:
+                cursor.execute("""
+                    SELECT q.*, snippet(questions_fts, 0, '[', ']', '...', 12) AS snippet,
+                           bm25(questions_fts) AS rank
+                    FROM questions_fts
+                    JOIN questions q ON q.id = questions_fts.rowid
+                    WHERE questions_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                """, (match, limit))
+            else:
+                cursor.execute("""
+                    SELECT q.*, q.question_text AS snippet, 0 AS rank
+                    FROM questions q
+                    WHERE q.question_text LIKE ?
+                    ORDER BY q.id DESC
+                    LIMIT ?
+                """, (f"%{query.strip()}%", limit))
+
+            return [dict(row) for row in cursor.fetchall()]
+
+    def search_quizzes(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Full-text search quizzes by title and source material, best matches first.
+
+        Args:
+            query: Free-text search terms
+            limit: Maximum number of quizzes to return
+
+        Returns:
+            List of dictionaries with quiz id, title, document_id, created_at and rank
+        """
+        match = self._fts_query(query)
+        if not match:
+            return []
+
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            if self.has_full_text_search:
+                cursor.execute("""
+                    SELECT id, title, document_id, created_at, MIN(rank) AS rank
+                    FROM (
+                        SELECT q.id, q.title, q.document_id, q.created_at, bm25(quizzes_fts) AS rank
+                        FROM quizzes_fts JOIN quizzes q ON q.id = quizzes_fts.rowid
+                        WHERE quizzes_fts MATCH ?
+                        UNION ALL
+                        SELECT q.id, q.title, q.document_id, q.created_at, bm25(documents_fts) AS rank
+                        FROM documents_fts JOIN quizzes q ON q.document_id = documents_fts.rowid
+                        WHERE documents_fts MATCH ?
+                    )
+                    GROUP BY id
+                    ORDER BY rank
+                    LIMIT ?
+                """, (match, match, limit))
+            else:
+                cursor.execute("""
+                    SELECT id, title, document_id, created_at, 0 AS rank
+                    FROM quizzes
+                    WHERE title LIKE ?
+                    ORDER BY id DESC
+                    LIMIT ?
+                """, (f"%{query.strip()}%", limit))
+
+            return [dict(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """
+        Turn free text into an FTS5 query that matches any of its words.
+
+        Each word is quoted so user input can never be parsed as FTS syntax.
 
-        quiz_dict["questions"] = [dict(q) for q in questions]
+        Args:
+            query: Free-text search terms
 
-        return quiz_dict
+        Returns:
+            FTS5 MATCH expression, empty if the query has no words
+        """
+        terms = re.findall(r"\w+", query)
+        return " OR ".join(f'"{term}"' for term in terms)
 
     # Quiz attempt methods
     def start_quiz_attempt(self, quiz_id: int, user_id: int) -> int:
@@ -417,16 +1311,10 @@ class Database:
         Returns:
             Attempt ID of the newly created attempt
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute(
+        return self._run_write(lambda conn: conn.execute(
             "INSERT INTO quiz_attempts (quiz_id, user_id) VALUES (?, ?)",
             (quiz_id, user_id)
-        )
-        conn.commit()
-
-        return cursor.lastrowid
+        ).lastrowid)
 
     def record_question_response(self, attempt_id: int, question_id: int,
                                 user_response: str, is_correct: bool) -> int:
@@ -442,16 +1330,15 @@ class Database:
         Returns:
             Response ID of the newly created response
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        def record(conn: sqlite3.Connection) -> int:
+            # An attempt already folded into question_stats is folded in again with this response
+            self._retract_question_stats(conn, attempt_id)
+            return conn.execute(
+                "INSERT INTO question_responses (attempt_id, question_id, user_response, is_correct) VALUES (?, ?, ?, ?)",
+                (attempt_id, question_id, user_response, is_correct)
+            ).lastrowid
 
-        cursor.execute(
-            "INSERT INTO question_responses (attempt_id, question_id, user_response, is_correct) VALUES (?, ?, ?, ?)",
-            (attempt_id, question_id, user_response, is_correct)
-        )
-        conn.commit()
-
-        return cursor.lastrowid
+        return self._run_write(record)
 
     def complete_quiz_attempt(self, attempt_id: int, score: float, max_score: int) -> bool:
         """
@@ -465,16 +1352,281 @@ class Database:
         Returns:
             True if successful
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        def complete(conn: sqlite3.Connection) -> None:
+            cursor = conn.cursor()
+
+            # Back out the previous result if the attempt is being re-scored
+            cursor.execute(
+                "SELECT user_id, score, max_score, completed_at FROM quiz_attempts WHERE id = ?",
+                (attempt_id,)
+            )
+            previous = cursor.fetchone()
+            if previous is not None and previous["completed_at"] is not None:
+                self._update_user_stats(conn, previous, -1)
+                self._retract_question_stats(conn, attempt_id)
+
+            cursor.execute(
+                "UPDATE quiz_attempts SET completed_at = CURRENT_TIMESTAMP, score = ?, max_score = ? WHERE id = ?",
+                (score, max_score, attempt_id)
+            )
+
+            cursor.execute(
+                "SELECT user_id, score, max_score, completed_at FROM quiz_attempts WHERE id = ?",
+                (attempt_id,)
+            )
+            completed = cursor.fetchone()
+            if completed is not None:
+                self._update_user_stats(conn, completed, 1)
+
+        self._run_write(complete)
+        return True
+
+    def submit_quiz_attempt(self, quiz_id: int, user_id: int, responses: Dict[int, str]) -> Dict:
+        """
+        Record a finished quiz attempt, its responses and its score in a single transaction.
+
+        Answers are graded here against the stored correct answers rather than
+        trusting a client-side score.
+
+        Args:
+            quiz_id: Quiz ID
+            user_id: User ID
+            responses: Mapping of question ID to the user's response
+
+        Returns:
+            Dictionary with attempt_id, score, max_score, per-question correctness and
+            error; attempt_id is -1 and error is set if the quiz does not exist
+        """
+        def submit(conn: sqlite3.Connection) -> Dict:
+            cursor = conn.cursor()
+
+            cursor.execute("SELECT 1 FROM quizzes WHERE id = ?", (quiz_id,))
+            if cursor.fetchone() is None:
+                raise _WriteRejected("Quiz not found.")
+
+            cursor.execute(
+                "SELECT id, question_type, correct_answer FROM questions WHERE quiz_id = ?",
+                (quiz_id,)
+            )
+            questions = {row["id"]: row for row in cursor.fetchall()}
+
+            results = {}
+            graded = []
+            for question_id, user_response in responses.items():
+                question = questions.get(question_id)
+                if question is None:
+                    # Ignore answers to questions that are not part of this quiz
+                    continue
+                is_correct = self._is_correct_response(question["correct_answer"], user_response)
+                results[question_id] = is_correct
+                graded.append((question_id, user_response, is_correct))
+
+            score = float(sum(results.values()))
+            max_score = len(questions)
+
+            cursor.execute(
+                "INSERT INTO quiz_attempts (quiz_id, user_id, completed_at, score, max_score) VALUES (?, ?, CURRENT_TIMESTAMP, ?, ?)",
+                (quiz_id, user_id, score, max_score)
+            )
+            attempt_id = cursor.lastrowid
+
+            cursor.executemany(
+                "INSERT INTO question_responses (attempt_id, question_id, user_response, is_correct) VALUES (?, ?, ?, ?)",
+                [(attempt_id, question_id, user_response, is_correct)
+                 for question_id, user_response, is_correct in graded]
+            )
+
+            cursor.execute(
+                "SELECT user_id, score, max_score, completed_at FROM quiz_attempts WHERE id = ?",
+                (attempt_id,)
+            )
+            self._update_user_stats(conn, cursor.fetchone(), 1)
+
+            return {
+                "attempt_id": attempt_id,
+                "score": score,
+                "max_score": max_score,
+                "results": results,
+                "error": None
+            }
+
+        try:
+            return self._run_write(submit)
+        except _WriteRejected as e:
+            return {"attempt_id": -1, "score": 0.0, "max_score": 0, "results": {}, "error": str(e)}
+
+    def _update_user_stats(self, conn: sqlite3.Connection, attempt: sqlite3.Row, sign: int) -> None:
+        """
+        Add (sign=1) or remove (sign=-1) a completed attempt from the user's summary rows.
+
+        Must be called inside the write transaction that changes the attempt.
+
+        Args:
+            conn: Connection holding an open write transaction
+            attempt: Row with user_id, score, max_score and completed_at
+            sign: 1 to add the attempt, -1 to remove it
+        """
+        score = attempt["score"] or 0
+        max_score = attempt["max_score"] or 0
+        percentage = score * 100.0 / max_score if max_score > 0 else 0.0
+
+        conn.execute("""
+            INSERT INTO user_stats (user_id, attempt_count, score_sum, max_score_sum, percentage_sum, last_attempt_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET
+                attempt_count = attempt_count + excluded.attempt_count,
+                score_sum = score_sum + excluded.score_sum,
+                max_score_sum = max_score_sum + excluded.max_score_sum,
+                percentage_sum = percentage_sum + excluded.percentage_sum,
+                last_attempt_at = MAX(COALESCE(last_attempt_at, ''), excluded.last_attempt_at)
+        """, (attempt["user_id"], sign, sign * score, sign * max_score, sign * percentage, attempt["completed_at"]))
+
+        conn.execute("""
+            INSERT INTO user_stats_daily (user_id, day, attempt_count, percentage_sum)
+            VALUES (?, date(?), ?, ?)
+            ON CONFLICT (user_id, day) DO UPDATE SET
+                attempt_count = attempt_count + excluded.attempt_count,
+                percentage_sum = percentage_sum + excluded.percentage_sum
+        """, (attempt["user_id"], attempt["completed_at"], sign, sign * percentage))
+
+    def _retract_question_stats(self, conn: sqlite3.Connection, attempt_id: int) -> None:
+        """
+        Back an attempt out of question_stats and mark it for the next analytics refresh.
 
+        Does nothing unless the attempt has already been folded in. Must be
+        called inside the write transaction that changes the attempt, before
+        its score or responses change.
+
+        Args:
+            conn: Connection holding an open write transaction
+            attempt_id: Attempt ID
+        """
+        cursor = conn.cursor()
         cursor.execute(
-            "UPDATE quiz_attempts SET completed_at = CURRENT_TIMESTAMP, score = ?, max_score = ? WHERE id = ?",
-            (score, max_score, attempt_id)
+            "SELECT CASE WHEN max_score > 0 THEN score * 1.0 / max_score ELSE 0 END AS fraction "
+            "FROM quiz_attempts WHERE id = ? AND analytics_processed = 1",
+            (attempt_id,)
         )
-        conn.commit()
+        row = cursor.fetchone()
+        if row is None:
+            return
 
-        return True
+        # Mirrors QuestionAnalytics._fold_batch with every sum negated
+        fraction = row["fraction"]
+        cursor.execute("""
+            INSERT INTO question_stats
+                (question_id, response_count, correct_count, score_sum, score_sq_sum, correct_score_sum)
+            SELECT question_id, -COUNT(*), -SUM(COALESCE(is_correct, 0)),
+                   -COUNT(*) * ?, -COUNT(*) * ? * ?, -SUM(COALESCE(is_correct, 0)) * ?
+            FROM question_responses
+            WHERE attempt_id = ?
+            GROUP BY question_id
+            ON CONFLICT (question_id) DO UPDATE SET
+                response_count = response_count + excluded.response_count,
+                correct_count = correct_count + excluded.correct_count,
+                score_sum = score_sum + excluded.score_sum,
+                score_sq_sum = score_sq_sum + excluded.score_sq_sum,
+                correct_score_sum = correct_score_sum + excluded.correct_score_sum,
+                updated_at = CURRENT_TIMESTAMP
+        """, (fraction, fraction, fraction, fraction, attempt_id))
+        cursor.execute("UPDATE quiz_attempts SET analytics_processed = 0 WHERE id = ?", (attempt_id,))
+
+    def reset_question_stats(self) -> None:
+        """
+        Discard question_stats and mark every attempt for the next analytics refresh,
+        e.g. after an import that changed existing attempts or responses.
+        """
+        def reset(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM question_stats")
+            conn.execute("UPDATE quiz_attempts SET analytics_processed = 0 WHERE analytics_processed = 1")
+
+        self._run_write(reset)
+
+    def get_user_stats(self, user_id: int, window_days: int = 30) -> Dict:
+        """
+        Get a user's summary statistics without scanning their attempt history.
+
+        Args:
+            user_id: User ID
+            window_days: Size of the recent-activity window in days
+
+        Returns:
+            Dictionary with lifetime and windowed attempt counts and average percentage scores
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("SELECT * FROM user_stats WHERE user_id = ?", (user_id,))
+            totals = cursor.fetchone()
+
+            cursor.execute("""
+                SELECT COALESCE(SUM(attempt_count), 0), COALESCE(SUM(percentage_sum), 0)
+                FROM user_stats_daily
+                WHERE user_id = ? AND day >= date('now', ?)
+            """, (user_id, f"-{window_days} days"))
+            window_count, window_percentage_sum = cursor.fetchone()
+
+        attempt_count = totals["attempt_count"] if totals else 0
+        return {
+            "user_id": user_id,
+            "attempt_count": attempt_count,
+            "score_sum": totals["score_sum"] if totals else 0,
+            "max_score_sum": totals["max_score_sum"] if totals else 0,
+            "average_score": round(totals["percentage_sum"] / attempt_count, 1) if attempt_count else 0,
+            "last_attempt_at": totals["last_attempt_at"] if totals else None,
+            "window_days": window_days,
+            "window_attempt_count": window_count,
+            "window_average_score": round(window_percentage_sum / window_count, 1) if window_count else 0
+        }
+
+    def rebuild_user_stats(self) -> int:
+        """
+        Recompute user_stats and user_stats_daily from quiz_attempts, e.g. after a backfill or import.
+
+        Returns:
+            Number of users with statistics
+        """
+        def rebuild(conn: sqlite3.Connection) -> int:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM user_stats")
+            cursor.execute("DELETE FROM user_stats_daily")
+            cursor.execute("""
+                INSERT INTO user_stats (user_id, attempt_count, score_sum, max_score_sum, percentage_sum, last_attempt_at)
+                SELECT user_id, COUNT(*), COALESCE(SUM(score), 0), COALESCE(SUM(max_score), 0),
+                       COALESCE(SUM(CASE WHEN max_score > 0 THEN score * 100.0 / max_score ELSE 0 END), 0),
+                       MAX(completed_at)
+                FROM quiz_attempts
+                WHERE completed_at IS NOT NULL
+                GROUP BY user_id
+            """)
+            user_count = cursor.rowcount
+            cursor.execute("""
+                INSERT INTO user_stats_daily (user_id, day, attempt_count, percentage_sum)
+                SELECT user_id, date(completed_at), COUNT(*),
+                       COALESCE(SUM(CASE WHEN max_score > 0 THEN score * 100.0 / max_score ELSE 0 END), 0)
+                FROM quiz_attempts
+                WHERE completed_at IS NOT NULL
+                GROUP BY user_id, date(completed_at)
+            """)
+            return user_count
+
+        return self._run_write(rebuild)
+
+    @staticmethod
+    def _is_correct_response(correct_answer: Optional[str], user_response: Optional[str]) -> bool:
+        """
+        Compare a response to the correct answer, ignoring case and surrounding whitespace.
+
+        Args:
+            correct_answer: The stored correct answer
+            user_response: The user's response
+
+        Returns:
+            True if the response matches the correct answer
+        """
+        if correct_answer is None or user_response is None:
+            return False
+        return " ".join(str(user_response).split()).casefold() == " ".join(str(correct_answer).split()).casefold()
 
     # Progress report methods
     def add_progress_report(self, user_id: int, title: str, report_path: str) -> int:
@@ -489,16 +1641,10 @@ class Database:
         Returns:
             Report ID of the newly created report
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute(
+        return self._run_write(lambda conn: conn.execute(
             "INSERT INTO progress_reports (user_id, title, report_path) VALUES (?, ?, ?)",
             (user_id, title, report_path)
-        )
-        conn.commit()
-
-        return cursor.lastrowid
+        ).lastrowid)
 
     def update_report_email_status(self, report_id: int, emailed_to: str) -> bool:
         """
@@ -511,40 +1657,123 @@ class Database:
         Returns:
             True if successful
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute(
+        self._run_write(lambda conn: conn.execute(
             "UPDATE progress_reports SET emailed_to = ?, emailed_at = CURRENT_TIMESTAMP WHERE id = ?",
             (emailed_to, report_id)
-        )
-        conn.commit()
-
+        ))
         return True
 
-    def get_user_quiz_history(self, user_id: int) -> List[Dict]:
+    def get_user_quiz_history(self, user_id: int, since: Optional[Any] = None, until: Optional[Any] = None,
+                              after_started_at: Optional[Any] = None, after_id: Optional[int] = None,
+                              limit: Optional[int] = None) -> List[Dict]:
         """
-        Get a user's quiz attempt history.
+        Get a user's quiz attempt history, newest first.
+
+        Pass the started_at and id of the last row of one page as
+        after_started_at/after_id to fetch the next page.
 
         Args:
             user_id: User ID
+            since: Only include attempts started at or after this UTC time (optional)
+            until: Only include attempts started before this UTC time (optional)
+            after_started_at: Keyset cursor - only include attempts started before this time (optional)
+            after_id: Tie-breaker for after_started_at - attempt ID of the last row seen (optional)
+            limit: Maximum number of attempts to return (optional)
 
         Returns:
             List of dictionaries containing quiz attempt information
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        sql, params = self._quiz_history_query(user_id, since, until, after_started_at, after_id)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            attempts = cursor.fetchall()
+            return [dict(a) for a in attempts]
+
+    def iter_user_quiz_history(self, user_id: int, since: Optional[Any] = None, until: Optional[Any] = None,
+                               batch_size: int = 100) -> Iterator[Dict]:
+        """
+        Lazily iterate over a user's quiz attempt history, newest first.
 
-        cursor.execute("""
+        Rows are fetched from the cursor batch_size at a time, so memory use does
+        not grow with the length of the history. A pooled connection is held
+        until the iterator is exhausted or closed.
+
+        Args:
+            user_id: User ID
+            since: Only include attempts started at or after this UTC time (optional)
+            until: Only include attempts started before this UTC time (optional)
+            batch_size: Number of rows fetched per round trip
+
+        Yields:
+            Dictionaries containing quiz attempt information
+        """
+        sql, params = self._quiz_history_query(user_id, since, until, None, None)
+
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+
+    def _quiz_history_query(self, user_id: int, since: Optional[Any], until: Optional[Any],
+                            after_started_at: Optional[Any], after_id: Optional[int]) -> Tuple[str, List]:
+        """
+        Build the quiz history query for the given window and keyset cursor.
+
+        Returns:
+            Tuple of (sql, params)
+        """
+        sql = """
             SELECT qa.*, q.title as quiz_title
             FROM quiz_attempts qa
             JOIN quizzes q ON qa.quiz_id = q.id
             WHERE qa.user_id = ?
-            ORDER BY qa.started_at DESC
-        """, (user_id,))
+        """
+        params: List[Any] = [user_id]
+
+        if since is not None:
+            sql += " AND qa.started_at >= ?"
+            params.append(self._to_db_timestamp(since))
+        if until is not None:
+            sql += " AND qa.started_at < ?"
+            params.append(self._to_db_timestamp(until))
+        if after_started_at is not None:
+            cursor_ts = self._to_db_timestamp(after_started_at)
+            if after_id is None:
+                sql += " AND qa.started_at < ?"
+                params.append(cursor_ts)
+            else:
+                sql += " AND (qa.started_at < ? OR (qa.started_at = ? AND qa.id < ?))"
+                params.extend([cursor_ts, cursor_ts, after_id])
+
+        sql += " ORDER BY qa.started_at DESC, qa.id DESC"
+        return sql, params
+
+    @staticmethod
+    def _to_db_timestamp(value: Any) -> str:
+        """
+        Convert a datetime to the 'YYYY-MM-DD HH:MM:SS' form written by CURRENT_TIMESTAMP.
 
-        attempts = cursor.fetchall()
-        return [dict(a) for a in attempts]
+        Args:
+            value: datetime, date or already formatted string
+
+        Returns:
+            Timestamp string comparable with stored TIMESTAMP columns
+        """
+        if isinstance(value, datetime.datetime):
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        if isinstance(value, datetime.date):
+            return value.strftime("%Y-%m-%d 00:00:00")
+        return str(value)
 
     def get_user_progress_reports(self, user_id: int) -> List[Dict]:
         """
@@ -556,24 +1785,53 @@ class Database:
         Returns:
             List of dictionaries containing progress report information
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute(
-            "SELECT * FROM progress_reports WHERE user_id = ? ORDER BY generated_at DESC",
-            (user_id,)
-        )
+            cursor.execute(
+                "SELECT * FROM progress_reports WHERE user_id = ? ORDER BY generated_at DESC",
+                (user_id,)
+            )
 
-        reports = cursor.fetchall()
-        return [dict(r) for r in reports]
+            reports = cursor.fetchall()
+            return [dict(r) for r in reports]
 
     def count_users(self) -> int:
         """Count the total number of users in the database."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM users")
-        count = cursor.fetchone()[0]
-        return count
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM users")
+            count = cursor.fetchone()[0]
+            return count
 
 # End of class Database
 
+
+def main() -> None:
+    """Command-line maintenance entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AI Tutor database maintenance")
+    parser.add_argument("--db", default=os.environ.get("DATABASE_PATH", "ai_tutor.db"),
+                        help="Path to the SQLite database file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("migrate", help="Apply pending schema migrations")
+    subparsers.add_parser("rebuild-stats", help="Recompute per-user statistics from quiz attempts")
+    subparsers.add_parser("checkpoint", help="Checkpoint and truncate the write-ahead log")
+    args = parser.parse_args()
+
+    db = Database(args.db)  # Opening the database applies pending migrations
+    try:
+        if args.command == "migrate":
+            print(f"Schema is at version {db.schema_version()}")
+        elif args.command == "rebuild-stats":
+            print(f"Rebuilt statistics for {db.rebuild_user_stats()} users")
+        elif args.command == "checkpoint":
+            print(db.checkpoint("TRUNCATE"))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
+
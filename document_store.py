@@ -0,0 +1,162 @@
+"""
+Document storage helpers for AI Tutor application.
+Content-addresses source texts by SHA-256 and compresses large bodies
+so identical material is stored once no matter how many quizzes use it.
+"""
+import hashlib
+import os
+import sqlite3
+import zlib
+from typing import Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd is an opt-in extra; zlib is always available
+    zstandard = None
+
+# Bodies shorter than this are stored uncompressed
+COMPRESSION_THRESHOLD = 512
+
+# Codec for new bodies: 'zlib', or 'zstd' if the zstandard package is installed
+CODECS = ("zlib", "zstd")
+DEFAULT_CODEC = os.environ.get("DOCUMENT_CODEC", "zlib")
+
+
+def content_hash(text: str) -> str:
+    """
+    Compute the content key of a document.
+
+    Args:
+        text: Document text
+
+    Returns:
+        Hex SHA-256 digest of the UTF-8 encoded text
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def compress_text(text: str, threshold: int = COMPRESSION_THRESHOLD,
+                  codec: Optional[str] = None) -> Tuple[str, bytes]:
+    """
+    Encode and, if worthwhile, compress a document body.
+
+    Args:
+        text: Document text
+        threshold: Minimum encoded size in bytes before compression is attempted
+        codec: 'zlib' or 'zstd' (defaults to the DOCUMENT_CODEC environment variable, else zlib)
+
+    Returns:
+        Tuple of (codec name, body bytes) where codec is 'none', 'zlib' or 'zstd'
+
+    Raises:
+        ValueError: If the codec is unknown
+        RuntimeError: If zstd is requested but the zstandard package is not installed
+    """
+    codec = codec or DEFAULT_CODEC
+    if codec not in CODECS:
+        raise ValueError(f"Unknown document codec: {codec}")
+    if codec == "zstd" and zstandard is None:
+        raise RuntimeError("DOCUMENT_CODEC is zstd but the zstandard package is not installed.")
+
+    raw = text.encode("utf-8")
+    if len(raw) < threshold:
+        return "none", raw
+
+    if codec == "zstd":
+        body = zstandard.ZstdCompressor(level=10).compress(raw)
+    else:
+        body = zlib.compress(raw, 6)
+
+    # Keep the raw bytes if compression did not help
+    if len(body) >= len(raw):
+        return "none", raw
+    return codec, body
+
+
+def decompress_text(codec: str, body: bytes) -> str:
+    """
+    Decode a stored document body.
+
+    Args:
+        codec: Codec name recorded with the body
+        body: Stored bytes
+
+    Returns:
+        Document text
+    """
+    if codec == "none":
+        return bytes(body).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(body).decode("utf-8")
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Document is zstd-compressed but the zstandard package is not installed.")
+        return zstandard.ZstdDecompressor().decompress(body).decode("utf-8")
+    raise ValueError(f"Unknown document codec: {codec}")
+
+
+def store_document(conn: sqlite3.Connection, text: str) -> int:
+    """
+    Insert a document unless identical content is already stored.
+
+    Must be called inside the caller's write transaction.
+
+    Args:
+        conn: Connection holding an open write transaction
+        text: Document text
+
+    Returns:
+        ID of the new or existing document
+    """
+    digest = content_hash(text)
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT id FROM documents WHERE content_hash = ?", (digest,))
+    row = cursor.fetchone()
+    if row is not None:
+        return row[0]
+
+    codec, body = compress_text(text)
+    cursor.execute(
+        "INSERT INTO documents (content_hash, compression, body, size) VALUES (?, ?, ?, ?)",
+        (digest, codec, body, len(text.encode("utf-8")))
+    )
+    document_id = cursor.lastrowid
+    index_document(conn, document_id, text)
+    return document_id
+
+
+def index_document(conn: sqlite3.Connection, document_id: int, text: str) -> None:
+    """
+    Add a document's text to the full-text index, if the index exists.
+
+    Args:
+        conn: Connection holding an open write transaction
+        document_id: Document ID
+        text: Document text
+    """
+    try:
+        conn.execute("INSERT INTO documents_fts (rowid, body) VALUES (?, ?)", (document_id, text))
+    except sqlite3.OperationalError as e:
+        # documents_fts is missing when SQLite lacks FTS5 or migrations have not reached it yet
+        if "no such table" not in str(e):
+            raise
+
+
+def load_document(conn: sqlite3.Connection, document_id: int) -> Optional[str]:
+    """
+    Load and decompress a document's text.
+
+    Args:
+        conn: SQLite connection
+        document_id: Document ID
+
+    Returns:
+        Document text or None if not found
+    """
+    row = conn.execute(
+        "SELECT compression, body FROM documents WHERE id = ?", (document_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    return decompress_text(row[0], row[1])
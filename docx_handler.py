@@ -5,18 +5,24 @@ Handles DOCX files and extracts text using python-docx.
 import os
 from typing import Tuple, Optional
 import docx
+from upload_io import DEFAULT_BUFFER_SIZE, save_stream
 
 class DOCXHandler:
     """Handles DOCX uploads and text extraction."""
+
+    # Bump when extraction changes so cached upload text is regenerated
+    EXTRACTOR_VERSION = 1
     
-    def __init__(self, upload_folder: str = "uploads/docx"):
+    def __init__(self, upload_folder: str = "uploads/docx", buffer_size: int = DEFAULT_BUFFER_SIZE):
         """
         Initialize the DOCX handler.
         
         Args:
             upload_folder: Directory to store uploaded DOCX files
+            buffer_size: Bytes copied per chunk when saving uploads
         """
         self.upload_folder = upload_folder
+        self.buffer_size = buffer_size
         os.makedirs(upload_folder, exist_ok=True)
     
     def save_docx(self, docx_file, filename: str) -> str:
@@ -32,9 +38,8 @@ class DOCXHandler:
         """
         file_path = os.path.join(self.upload_folder, filename)
         
-        # Save the DOCX file
-        with open(file_path, 'wb') as f:
-            f.write(docx_file.read())
+        # Stream the DOCX to disk in chunks; the file appears only once complete
+        save_stream(docx_file, file_path, self.buffer_size)
             
         return file_path
     
@@ -7,9 +7,13 @@ import tempfile
 from typing import Tuple, Optional
 from PIL import Image
 import pytesseract
+from upload_io import atomic_write_path
 
 class ImageHandler:
     """Handles image uploads and text extraction using OCR."""
+
+    # Bump when extraction changes so cached upload text is regenerated
+    EXTRACTOR_VERSION = 1
     
     def __init__(self, upload_folder: str = "uploads/images"):
         """
@@ -35,8 +39,8 @@ class ImageHandler:
         file_path = os.path.join(self.upload_folder, filename)
         
         # Save the image using Pillow to ensure it's a valid image
-        with Image.open(image_file) as img:
-            img.save(file_path)
+        with Image.open(image_file) as img, atomic_write_path(file_path) as temp_path:
+            img.save(temp_path)
             
         return file_path
     
@@ -0,0 +1,305 @@
+"""
+Schema migration module for AI Tutor application.
+Applies ordered, versioned schema changes on top of the base tables
+created by Database.initialize_db and records them in schema_version.
+"""
+import datetime
+import sqlite3
+from typing import Callable, List, NamedTuple, Sequence, Union
+
+from document_store import index_document, load_document, store_document
+
+
+class Migration(NamedTuple):
+    """A single schema change: SQL statements or a callable taking the connection."""
+    version: int
+    description: str
+    steps: Union[Sequence[str], Callable[[sqlite3.Connection], None]]
+
+
+def _add_invite_expiry_timestamp(conn: sqlite3.Connection) -> None:
+    """Add invite_links.expires_at_ts (Unix seconds) and backfill it from expires_at."""
+    conn.execute("ALTER TABLE invite_links ADD COLUMN expires_at_ts INTEGER NOT NULL DEFAULT 0")
+
+    rows = conn.execute("SELECT id, expires_at FROM invite_links").fetchall()
+    updates = []
+    for invite_id, expires_at in rows:
+        try:
+            expires_ts = int(datetime.datetime.fromisoformat(str(expires_at)).timestamp())
+        except (TypeError, ValueError):
+            expires_ts = 0  # Unparseable expiry: treat as expired
+        updates.append((expires_ts, invite_id))
+    conn.executemany("UPDATE invite_links SET expires_at_ts = ? WHERE id = ?", updates)
+
+    conn.execute("DROP INDEX IF EXISTS idx_invite_links_creator")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_invite_links_creator_active "
+        "ON invite_links (created_by, used, expires_at_ts)"
+    )
+
+
+def _move_source_material_to_documents(conn: sqlite3.Connection) -> None:
+    """Create the documents table and move inline quiz source material into it."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS documents (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        content_hash TEXT UNIQUE NOT NULL,
+        compression TEXT NOT NULL DEFAULT 'none',
+        body BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    conn.execute("ALTER TABLE quizzes ADD COLUMN document_id INTEGER REFERENCES documents (id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_quizzes_document_id ON quizzes (document_id)")
+
+    # Collect ids first so no SELECT is open on quizzes while its rows are updated
+    quiz_ids = [row[0] for row in conn.execute("SELECT id FROM quizzes WHERE source_material IS NOT NULL")]
+    for start in range(0, len(quiz_ids), 500):
+        chunk = quiz_ids[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(
+            f"SELECT id, source_material FROM quizzes WHERE id IN ({placeholders})", chunk
+        ).fetchall()
+        updates = [(store_document(conn, source), quiz_id) for quiz_id, source in rows]
+        conn.executemany(
+            "UPDATE quizzes SET document_id = ?, source_material = NULL WHERE id = ?", updates
+        )
+
+
+def _add_full_text_search(conn: sqlite3.Connection) -> None:
+    """Create FTS5 indexes over questions, quiz titles and documents, if FTS5 is available."""
+    try:
+        conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+            question_text, correct_answer,
+            content='questions', content_rowid='id', tokenize='porter unicode61'
+        )
+        """)
+    except sqlite3.OperationalError as e:
+        if "fts5" not in str(e):
+            raise
+        # SQLite built without FTS5: search falls back to LIKE scans
+        return
+
+    conn.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS quizzes_fts USING fts5(
+        title, content='quizzes', content_rowid='id', tokenize='porter unicode61'
+    )
+    """)
+    # Document bodies are stored compressed, so their index keeps no copy of
+    # the text and is fed from Python when a document is stored
+    conn.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+        body, content='', tokenize='porter unicode61'
+    )
+    """)
+
+    # External-content indexes are kept in sync by triggers
+    for statement in (
+        """CREATE TRIGGER IF NOT EXISTS questions_fts_insert AFTER INSERT ON questions BEGIN
+            INSERT INTO questions_fts (rowid, question_text, correct_answer)
+            VALUES (new.id, new.question_text, new.correct_answer);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS questions_fts_delete AFTER DELETE ON questions BEGIN
+            INSERT INTO questions_fts (questions_fts, rowid, question_text, correct_answer)
+            VALUES ('delete', old.id, old.question_text, old.correct_answer);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS questions_fts_update AFTER UPDATE ON questions BEGIN
+            INSERT INTO questions_fts (questions_fts, rowid, question_text, correct_answer)
+            VALUES ('delete', old.id, old.question_text, old.correct_answer);
+            INSERT INTO questions_fts (rowid, question_text, correct_answer)
+            VALUES (new.id, new.question_text, new.correct_answer);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS quizzes_fts_insert AFTER INSERT ON quizzes BEGIN
+            INSERT INTO quizzes_fts (rowid, title) VALUES (new.id, new.title);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS quizzes_fts_delete AFTER DELETE ON quizzes BEGIN
+            INSERT INTO quizzes_fts (quizzes_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS quizzes_fts_update AFTER UPDATE OF title ON quizzes BEGIN
+            INSERT INTO quizzes_fts (quizzes_fts, rowid, title) VALUES ('delete', old.id, old.title);
+            INSERT INTO quizzes_fts (rowid, title) VALUES (new.id, new.title);
+        END""",
+    ):
+        conn.execute(statement)
+
+    # Index existing rows
+    conn.execute("INSERT INTO questions_fts (questions_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO quizzes_fts (quizzes_fts) VALUES ('rebuild')")
+    document_ids = [row[0] for row in conn.execute("SELECT id FROM documents")]
+    for document_id in document_ids:
+        index_document(conn, document_id, load_document(conn, document_id))
+
+
+# Ordered list of migrations. Append new entries with the next version
+# number; never edit or reorder a migration that has already shipped.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Add foreign-key and time-ordered indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_questions_quiz_id ON questions (quiz_id)",
+        "CREATE INDEX IF NOT EXISTS idx_quiz_attempts_user_started ON quiz_attempts (user_id, started_at)",
+        "CREATE INDEX IF NOT EXISTS idx_quiz_attempts_quiz_id ON quiz_attempts (quiz_id)",
+        "CREATE INDEX IF NOT EXISTS idx_question_responses_attempt_id ON question_responses (attempt_id)",
+        "CREATE INDEX IF NOT EXISTS idx_question_responses_question_id ON question_responses (question_id)",
+        "CREATE INDEX IF NOT EXISTS idx_progress_reports_user_generated ON progress_reports (user_id, generated_at)",
+        "CREATE INDEX IF NOT EXISTS idx_invite_links_creator ON invite_links (created_by, used, expires_at)",
+    ]),
+    Migration(2, "Add incrementally maintained per-user statistics", [
+        """
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY,
+            attempt_count INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            max_score_sum INTEGER NOT NULL DEFAULT 0,
+            percentage_sum REAL NOT NULL DEFAULT 0,
+            last_attempt_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_stats_daily (
+            user_id INTEGER NOT NULL,
+            day DATE NOT NULL,
+            attempt_count INTEGER NOT NULL DEFAULT 0,
+            percentage_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        ) WITHOUT ROWID
+        """,
+        # Backfill from existing completed attempts
+        """
+        INSERT INTO user_stats (user_id, attempt_count, score_sum, max_score_sum, percentage_sum, last_attempt_at)
+        SELECT user_id, COUNT(*), COALESCE(SUM(score), 0), COALESCE(SUM(max_score), 0),
+               COALESCE(SUM(CASE WHEN max_score > 0 THEN score * 100.0 / max_score ELSE 0 END), 0),
+               MAX(completed_at)
+        FROM quiz_attempts
+        WHERE completed_at IS NOT NULL
+        GROUP BY user_id
+        """,
+        """
+        INSERT INTO user_stats_daily (user_id, day, attempt_count, percentage_sum)
+        SELECT user_id, date(completed_at), COUNT(*),
+               COALESCE(SUM(CASE WHEN max_score > 0 THEN score * 100.0 / max_score ELSE 0 END), 0)
+        FROM quiz_attempts
+        WHERE completed_at IS NOT NULL
+        GROUP BY user_id, date(completed_at)
+        """,
+    ]),
+    Migration(3, "Store invite expiry as indexed Unix timestamp", _add_invite_expiry_timestamp),
+    Migration(4, "Deduplicate quiz source material into documents", _move_source_material_to_documents),
+    Migration(5, "Add FTS5 search over questions, quizzes and documents", _add_full_text_search),
+    Migration(6, "Add incrementally refreshed per-question analytics", [
+        """
+        CREATE TABLE IF NOT EXISTS question_stats (
+            question_id INTEGER PRIMARY KEY,
+            response_count INTEGER NOT NULL DEFAULT 0,
+            correct_count INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            score_sq_sum REAL NOT NULL DEFAULT 0,
+            correct_score_sum REAL NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (question_id) REFERENCES questions (id)
+        )
+        """,
+        "ALTER TABLE quiz_attempts ADD COLUMN analytics_processed BOOLEAN NOT NULL DEFAULT 0",
+        # Finds completed attempts not yet folded into question_stats without a scan
+        """
+        CREATE INDEX IF NOT EXISTS idx_quiz_attempts_analytics_pending ON quiz_attempts (id)
+        WHERE completed_at IS NOT NULL AND analytics_processed = 0
+        """,
+        # Covering indexes for per-attempt and per-question aggregation
+        "DROP INDEX IF EXISTS idx_question_responses_attempt_id",
+        "DROP INDEX IF EXISTS idx_question_responses_question_id",
+        """
+        CREATE INDEX IF NOT EXISTS idx_question_responses_attempt_cover
+        ON question_responses (attempt_id, question_id, is_correct)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_question_responses_question_cover
+        ON question_responses (question_id, attempt_id, is_correct)
+        """,
+    ]),
+    Migration(7, "Index unused invites by creator in id order for keyset paging", [
+        "DROP INDEX IF EXISTS idx_invite_links_creator_active",
+        "CREATE INDEX IF NOT EXISTS idx_invite_links_creator_unused ON invite_links (created_by, used, id)",
+    ]),
+]
+
+
+def ensure_version_table(conn: sqlite3.Connection) -> None:
+    """
+    Create the schema_version bookkeeping table if it doesn't exist.
+
+    Args:
+        conn: SQLite connection
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    conn.commit()
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """
+    Get the highest migration version applied to the database.
+
+    Args:
+        conn: SQLite connection
+
+    Returns:
+        Applied schema version, 0 if no migrations have run
+    """
+    row = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()
+    return row[0]
+
+
+def apply_migrations(conn: sqlite3.Connection, migrations: Sequence[Migration] = MIGRATIONS) -> List[int]:
+    """
+    Apply every migration newer than the database's current version.
+
+    Each migration runs in its own write transaction together with its
+    schema_version row, so a failed step leaves the schema at the previous
+    version and concurrent processes never apply the same step twice.
+
+    Args:
+        conn: SQLite connection with no transaction open
+        migrations: Migrations to consider, ordered by version
+
+    Returns:
+        Versions applied by this call
+    """
+    ensure_version_table(conn)
+    applied = []
+
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version <= current_version(conn):
+            continue
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have applied it while we waited for the lock
+            if migration.version <= current_version(conn):
+                conn.rollback()
+                continue
+
+            if callable(migration.steps):
+                migration.steps(conn)
+            else:
+                for statement in migration.steps:
+                    conn.execute(statement)
+
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (migration.version, migration.description)
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied.append(migration.version)
+
+    return applied
@@ -0,0 +1,217 @@
+"""
+Password hashing module for AI Tutor application.
+Runs bcrypt hashing and verification on a bounded worker pool so that
+bursts of logins do not block the calling threads or queue without limit.
+"""
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import bcrypt
+
+# Cost factor for new hashes; pick one for the host with calibrate_cost()
+DEFAULT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+
+
+class HasherBusyError(Exception):
+    """Raised when too many hashing requests are already pending."""
+
+
+class PasswordHasher:
+    """
+    Bounded bcrypt worker pool.
+
+    bcrypt releases the GIL while it works, so a thread pool spreads the
+    hashing over the available cores. At most max_pending requests may be
+    queued or running; further requests fail fast with HasherBusyError
+    instead of making every caller wait longer.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: int = 64,
+                 rounds: int = DEFAULT_ROUNDS):
+        """
+        Initialize the worker pool.
+
+        Args:
+            max_workers: Number of hashing threads (defaults to the CPU count)
+            max_pending: Maximum requests queued or running at once
+            rounds: bcrypt cost factor for new hashes
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+        self._stats_lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_time = 0.0
+
+    def hash_async(self, password: str) -> Future:
+        """
+        Hash a password on the worker pool.
+
+        Args:
+            password: Password to hash
+
+        Returns:
+            Future resolved with the hashed password as a string
+
+        Raises:
+            HasherBusyError: If max_pending requests are already outstanding
+        """
+        return self._submit(self._hash, password)
+
+    def verify_async(self, password: str, hashed_password: str) -> Future:
+        """
+        Check a password against a hash on the worker pool.
+
+        Args:
+            password: Password to check
+            hashed_password: Hashed password to compare against
+
+        Returns:
+            Future resolved with True if the password matches
+
+        Raises:
+            HasherBusyError: If max_pending requests are already outstanding
+        """
+        return self._submit(self._verify, password, hashed_password)
+
+    def hash(self, password: str) -> str:
+        """
+        Hash a password and wait for the result.
+
+        Args:
+            password: Password to hash
+
+        Returns:
+            Hashed password as a string
+        """
+        return self.hash_async(password).result()
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Check a password against a hash and wait for the result.
+
+        Args:
+            password: Password to check
+            hashed_password: Hashed password to compare against
+
+        Returns:
+            True if the password matches, False otherwise
+        """
+        return self.verify_async(password, hashed_password).result()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get worker pool counters.
+
+        Returns:
+            Dictionary of pending, completed and rejected request counts
+        """
+        with self._stats_lock:
+            return {
+                "workers": self.max_workers,
+                "rounds": self.rounds,
+                "pending": self._pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "mean_ms": round(self._busy_time * 1000 / self._completed, 1) if self._completed else 0.0
+            }
+
+    def close(self) -> None:
+        """Wait for running requests and stop the worker threads."""
+        self._executor.shutdown(wait=True)
+
+    def _submit(self, fn, *args) -> Future:
+        """Queue a hashing call if a slot is free."""
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._rejected += 1
+            raise HasherBusyError("Too many password checks in progress, please try again.")
+
+        with self._stats_lock:
+            self._pending += 1
+        try:
+            return self._executor.submit(self._timed, fn, *args)
+        except BaseException:
+            self._release()
+            raise
+
+    def _timed(self, fn, *args) -> Any:
+        """Run a hashing call on a worker thread and free its slot afterwards."""
+        started = time.monotonic()
+        try:
+            return fn(*args)
+        finally:
+            self._release(time.monotonic() - started)
+
+    def _release(self, elapsed: Optional[float] = None) -> None:
+        """Return a pending slot."""
+        with self._stats_lock:
+            self._pending -= 1
+            if elapsed is not None:
+                self._completed += 1
+                self._busy_time += elapsed
+        self._slots.release()
+
+    def _hash(self, password: str) -> str:
+        """Hash a password with the configured cost."""
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+    @staticmethod
+    def _verify(password: str, hashed_password: str) -> bool:
+        """Check a password against a bcrypt hash."""
+        try:
+            return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+        except ValueError:
+            # Handle cases where hashed_password might not be a valid bcrypt hash
+            print("Warning: Invalid hash format encountered for user during login check.")
+            return False
+
+
+def calibrate_cost(target_ms: float = 250.0, min_rounds: int = 10, max_rounds: int = 16) -> int:
+    """
+    Pick the highest bcrypt cost whose hash time on this host stays within a target.
+
+    Each extra round doubles the work, so the cost is measured once at
+    min_rounds and the higher costs are extrapolated from it.
+
+    Args:
+        target_ms: Acceptable time for a single hash in milliseconds
+        min_rounds: Lowest cost to consider (bcrypt's minimum is 4)
+        max_rounds: Highest cost to consider
+
+    Returns:
+        bcrypt cost factor
+    """
+    password = b"calibration-password"
+    salt = bcrypt.gensalt(rounds=min_rounds)
+    started = time.perf_counter()
+    bcrypt.hashpw(password, salt)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        elapsed_ms *= 2
+        rounds += 1
+    return rounds
+
+
+def main() -> None:
+    """Command-line entry point: print a bcrypt cost suited to this host."""
+    parser = argparse.ArgumentParser(description="Choose a bcrypt cost (BCRYPT_ROUNDS) for this host")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="Target time per hash in milliseconds")
+    args = parser.parse_args()
+    print(calibrate_cost(args.target_ms))
+
+
+if __name__ == "__main__":
+    main()
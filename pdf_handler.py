@@ -3,25 +3,156 @@
 """
 PDF upload and text extraction module for AI Tutor application.
 Handles PDF files and extracts text using PyPDF2 and poppler-utils.
+Pages without a usable text layer are rasterized and read with Tesseract OCR.
 Aims to extract text from the entire document.
 """
 import os
+import codecs
 import subprocess
 import tempfile
-from typing import Tuple, Optional
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Iterator, List, Tuple, Optional, Union
 import PyPDF2
+import pytesseract
+from upload_io import DEFAULT_BUFFER_SIZE, save_stream
+
+# Bytes read from the pdftotext pipe per call
+PIPE_CHUNK_SIZE = 64 * 1024
+
+
+class OCRCancelled(Exception):
+    """Raised inside an OCR job whose result is no longer wanted."""
+
+
+def _run_command(command: List[str], timeout: float,
+                 cancel: Optional[threading.Event] = None) -> subprocess.CompletedProcess:
+    """
+    Run a command to completion, killing it on timeout or when cancel is set.
+
+    Args:
+        command: Command and arguments
+        timeout: Seconds before the process is killed
+        cancel: Event that kills the process as soon as it is set (optional)
+
+    Returns:
+        The completed process, with stdout and stderr as bytes
+
+    Raises:
+        subprocess.TimeoutExpired: If the process ran past the timeout
+        OCRCancelled: If cancel was set while the process ran
+    """
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                stdout, stderr = process.communicate(timeout=0.1)
+                return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+            except subprocess.TimeoutExpired:
+                if cancel is not None and cancel.is_set():
+                    raise OCRCancelled()
+                if time.monotonic() >= deadline:
+                    raise subprocess.TimeoutExpired(command, timeout)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.communicate()
+
+
+def ocr_pdf_page(pdf_path: str, page_number: int, dpi: int = 300, timeout: int = 120,
+                 cancel: Optional[threading.Event] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Rasterize one PDF page with pdftoppm and read it with Tesseract OCR.
+
+    Both steps are external processes, so this runs on a thread pool; setting
+    cancel kills whichever of them is running.
+
+    Args:
+        pdf_path: Path to the PDF file
+        page_number: Page to OCR, 1-based
+        dpi: Rasterization resolution
+        timeout: Seconds allowed for each of rasterization and OCR
+        cancel: Event that abandons the page when set (optional)
+
+    Returns:
+        Tuple (text, error_message). Text is None if OCR fails.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_root = os.path.join(temp_dir, "page")
+        command = [
+            'pdftoppm', '-f', str(page_number), '-l', str(page_number),
+            '-r', str(dpi), '-gray', '-png', '-singlefile', pdf_path, image_root
+        ]
+        try:
+            result = _run_command(command, timeout, cancel)
+        except subprocess.TimeoutExpired:
+            return None, f"pdftoppm timed out after {timeout} seconds."
+        except FileNotFoundError:
+            return None, "pdftoppm command not found. Please ensure poppler-utils is installed."
+        except OCRCancelled:
+            return None, "OCR cancelled."
+        if result.returncode != 0:
+            stderr = result.stderr.decode('utf-8', errors='replace')
+            return None, f"pdftoppm failed (code {result.returncode}): {stderr}"
+
+        # Call the tesseract binary pytesseract is configured with, so the process can be killed
+        command = [pytesseract.pytesseract.tesseract_cmd, f"{image_root}.png", 'stdout']
+        try:
+            result = _run_command(command, timeout, cancel)
+        except subprocess.TimeoutExpired:
+            return None, f"OCR timed out after {timeout} seconds."
+        except FileNotFoundError:
+            return None, "tesseract command not found. Please ensure tesseract-ocr is installed."
+        except OCRCancelled:
+            return None, "OCR cancelled."
+        if result.returncode != 0:
+            stderr = result.stderr.decode('utf-8', errors='replace')
+            return None, f"OCR failed (code {result.returncode}): {stderr}"
+        return result.stdout.decode('utf-8', errors='replace'), None
+
+
+class PDFExtractionError(Exception):
+    """Raised when a PDF cannot be read by an extraction method."""
+
 
 class PDFHandler:
     """Handles PDF uploads and text extraction."""
+
+    # Bump when extraction changes so cached upload text is regenerated
+    EXTRACTOR_VERSION = 4
     
-    def __init__(self, upload_folder: str = "uploads/pdfs"):
+    def __init__(self, upload_folder: str = "uploads/pdfs", buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 max_workers: Optional[int] = None, pages_per_range: int = 50, range_timeout: int = 60,
+                 ocr_enabled: bool = True, ocr_dpi: int = 300, ocr_workers: Optional[int] = None,
+                 ocr_timeout: int = 120, min_text_chars: int = 20):
         """
         Initialize the PDF handler.
         
         Args:
             upload_folder: Directory to store uploaded PDFs
+            buffer_size: Bytes copied per chunk when saving uploads
+            max_workers: Concurrent pdftotext processes per document (defaults to the CPU count)
+            pages_per_range: Pages extracted by each pdftotext process
+            range_timeout: Seconds before a single pdftotext process is abandoned
+            ocr_enabled: OCR pages that have no usable text layer
+            ocr_dpi: Resolution pages are rasterized at for OCR
+            ocr_workers: Pages OCRed at once (defaults to the CPU count)
+            ocr_timeout: Seconds allowed for rasterizing or reading a single page
+            min_text_chars: Pages with fewer letters and digits than this are OCRed
         """
         self.upload_folder = upload_folder
+        self.buffer_size = buffer_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pages_per_range = pages_per_range
+        self.range_timeout = range_timeout
+        self.ocr_enabled = ocr_enabled
+        self.ocr_dpi = ocr_dpi
+        self.ocr_workers = ocr_workers or os.cpu_count() or 1
+        self.ocr_timeout = ocr_timeout
+        self.min_text_chars = min_text_chars
         os.makedirs(upload_folder, exist_ok=True)
     
     def save_pdf(self, pdf_file, filename: str) -> str:
@@ -37,12 +168,8 @@ class PDFHandler:
         """
         file_path = os.path.join(self.upload_folder, filename)
         
-        # Save the PDF file
-        # Ensure the file cursor is at the beginning if it has been read before
-        if hasattr(pdf_file, 'seek'):
-            pdf_file.seek(0)
-        with open(file_path, 'wb') as f:
-            f.write(pdf_file.read())
+        # Stream the PDF to disk in chunks; the file appears only once complete
+        save_stream(pdf_file, file_path, self.buffer_size)
             
         return file_path
     
@@ -57,43 +184,105 @@ class PDFHandler:
             Tuple (extracted_text, error_message). Text is None if extraction fails.
         """
         try:
-            text = ""
+            parts = []
             num_pages = 0
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                
-                # Check if the PDF is encrypted
-                if reader.is_encrypted:
-                    return None, "This PDF is encrypted and requires a password for text extraction."
-                
-                num_pages = len(reader.pages)
-                # Add diagnostic info about page count
-                text += f"(PyPDF2 attempting to process {num_pages} pages)\n\n" 
-                
-                # Extract text from each page
-                for page_num in range(num_pages):
-                    try:
-                        page = reader.pages[page_num]
-                        page_text = page.extract_text()
-                        if page_text: # Only append if text was actually extracted
-                            text += page_text.strip() + "\n\n" # Use strip() and double newline
-                    except Exception as page_e:
-                        # Log error for specific page and continue if possible
-                        text += f"\n[Error extracting page {page_num + 1}: {str(page_e)}]\n"
-                        continue # Try next page
-            
-            # Check if any meaningful text was extracted besides the diagnostic info
-            if len(text.replace(f"(PyPDF2 attempting to process {num_pages} pages)\n\n", "").strip()) == 0:
+            for page_number, page_text in self._iter_pages_pypdf2(pdf_path):
+                num_pages += 1
+                if page_text.strip(): # Only keep pages that actually produced text
+                    parts.append(page_text.strip())
+            
+            if not parts:
                  return None, f"PyPDF2 processed {num_pages} pages but extracted no text."
 
-            return text.strip(), None # Return stripped text and no error
+            # Add diagnostic info about page count
+            return "\n\n".join([f"(PyPDF2 attempting to process {num_pages} pages)"] + parts), None
+        except PDFExtractionError as e:
+            return None, str(e)
         except Exception as e:
             return None, f"Error extracting text with PyPDF2: {str(e)}"
     
+    def _iter_pages_pypdf2(self, pdf_path: str, first_page: int = 1, last_page: Optional[int] = None,
+                           errors: Optional[List[str]] = None) -> Iterator[Tuple[int, str]]:
+        """
+        Lazily extract pages with PyPDF2.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            first_page: First page to extract, 1-based
+            last_page: Last page to extract, inclusive (defaults to the last page)
+            errors: List that pages which fail are reported to (optional)
+            
+        Yields:
+            Tuples of (page_number, text); a page that fails yields an error marker as its text
+            
+        Raises:
+            PDFExtractionError: If the document cannot be opened or is encrypted
+        """
+        try:
+            file = open(pdf_path, 'rb')
+        except OSError as e:
+            raise PDFExtractionError(f"Error extracting text with PyPDF2: {str(e)}")
+        
+        with file:
+            try:
+                reader = PyPDF2.PdfReader(file)
+                encrypted = reader.is_encrypted
+                num_pages = 0 if encrypted else len(reader.pages)
+            except Exception as e:
+                raise PDFExtractionError(f"Error extracting text with PyPDF2: {str(e)}")
+            
+            # Check if the PDF is encrypted
+            if encrypted:
+                raise PDFExtractionError("This PDF is encrypted and requires a password for text extraction.")
+            
+            if last_page is not None:
+                num_pages = min(num_pages, last_page)
+            for page_number in range(first_page, num_pages + 1):
+                try:
+                    page_text = reader.pages[page_number - 1].extract_text() or ""
+                except Exception as page_e:
+                    # Record the error for this page and continue with the next
+                    page_text = f"[Error extracting page {page_number}: {str(page_e)}]"
+                    self._report(errors, page_text)
+                yield page_number, page_text
+    
+    def get_page_count(self, pdf_path: str) -> Optional[int]:
+        """
+        Read a PDF's page count with poppler-utils' pdfinfo.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            Number of pages, or None if pdfinfo is unavailable or fails
+        """
+        try:
+            result = subprocess.run(
+                ['pdfinfo', pdf_path],
+                capture_output=True,
+                text=True,
+                check=False,
+                timeout=30
+            )
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            return None
+        
+        if result.returncode != 0:
+            return None
+        for line in result.stdout.splitlines():
+            if line.startswith("Pages:"):
+                try:
+                    return int(line.split(":", 1)[1])
+                except ValueError:
+                    return None
+        return None
+    
     def extract_text_with_pdftotext(self, pdf_path: str) -> Tuple[Optional[str], Optional[str]]:
         """
-        Extract text from a PDF using poppler-utils' pdftotext.
-        Ensures it tries to process the whole document.
+        Extract a PDF's text layer without OCR.
+        
+        Uses the same page path as iter_pages: pdftotext (in parallel page
+        ranges for long documents), with PyPDF2 for pages it cannot read.
         
         Args:
             pdf_path: Path to the PDF file
@@ -101,60 +290,394 @@ class PDFHandler:
         Returns:
             Tuple (extracted_text, error_message). Text is None if extraction fails.
         """
-        temp_path = None
         try:
-            # Create a temporary file to store the extracted text
-            # Use delete=False and manual cleanup in finally block
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as temp_file:
-                temp_path = temp_file.name
+            parts = [page_text.strip() for _, page_text in self._iter_text_layer(pdf_path) if page_text.strip()]
+        except PDFExtractionError as e:
+            return None, str(e)
+        
+        if not parts:
+            return None, "pdftotext ran successfully but extracted no text."
+        return "\n\n".join(parts), None
+    
+    def iter_pages(self, pdf_path: str, errors: Optional[List[str]] = None) -> Iterator[Tuple[int, str]]:
+        """
+        Yield the text of each page as soon as it has been extracted.
+        
+        Long documents are extracted in page ranges on a worker pool and
+        yielded in order as each range completes; shorter ones are read from a
+        single pdftotext pipe page by page. Pages pdftotext cannot produce are
+        extracted with PyPDF2 instead. Pages without a usable text layer (e.g.
+        scans) are OCRed on a thread pool and merged back in page order.
+        
+        Pages that cannot be fully extracted still yield what was recovered
+        (or an error marker) and are described in errors, so callers can tell
+        partial text from a complete extraction.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            errors: List that extraction problems are appended to (optional)
+            
+        Yields:
+            Tuples of (page_number, text), page numbers starting at 1
+            
+        Raises:
+            PDFExtractionError: If neither pdftotext nor PyPDF2 can read the document
+        """
+        pages = self._iter_text_layer(pdf_path, errors)
+        if self.ocr_enabled:
+            pages = self._iter_with_ocr(pdf_path, pages, errors)
+        yield from pages
+    
+    def needs_ocr(self, page_text: str) -> bool:
+        """
+        Decide whether a page's text layer is missing or too thin to use.
+        
+        Args:
+            page_text: Text extracted from the page's text layer
+            
+        Returns:
+            True if the page has fewer than min_text_chars letters and digits
+        """
+        count = 0
+        for char in page_text:
+            if char.isalnum():
+                count += 1
+                if count >= self.min_text_chars:
+                    return False
+        return True
+    
+    def _iter_with_ocr(self, pdf_path: str, pages: Iterator[Tuple[int, str]],
+                       errors: Optional[List[str]] = None) -> Iterator[Tuple[int, str]]:
+        """
+        OCR the pages that need it in parallel while passing text-layer pages through in order.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            pages: Text-layer pages in order
+            errors: List that failed OCR pages are reported to (optional)
+            
+        Yields:
+            Tuples of (page_number, text)
+        """
+        executor = None
+        cancel = threading.Event()
+        # Pages waiting to be yielded: text, or a pending OCR result
+        waiting: Deque[Tuple[int, str, Union[str, Future]]] = deque()
+        try:
+            for page_number, page_text in pages:
+                if self.needs_ocr(page_text):
+                    if executor is None:
+                        # OCR runs in pdftoppm and tesseract subprocesses, so threads are enough
+                        executor = ThreadPoolExecutor(max_workers=self.ocr_workers)
+                    result = executor.submit(ocr_pdf_page, pdf_path, page_number, self.ocr_dpi,
+                                             self.ocr_timeout, cancel)
+                    waiting.append((page_number, page_text, result))
+                else:
+                    waiting.append((page_number, page_text, page_text))
+                
+                # Release everything up to the first page still being OCRed
+                while waiting and not (isinstance(waiting[0][2], Future) and not waiting[0][2].done()):
+                    yield self._resolve_page(*waiting.popleft(), errors)
             
-            # Run pdftotext command, ensuring no page limits are set by default
-            # Using -layout to preserve structure which might help segmentation later
-            command = ['pdftotext', '-layout', pdf_path, temp_path]
+            while waiting:
+                yield self._resolve_page(*waiting.popleft(), errors)
+        finally:
+            if executor is not None:
+                # Kill OCR still running for pages the consumer no longer wants
+                cancel.set()
+                executor.shutdown(wait=True, cancel_futures=True)
+    
+    def _resolve_page(self, page_number: int, page_text: str, result: Union[str, Future],
+                      errors: Optional[List[str]] = None) -> Tuple[int, str]:
+        """
+        Wait for a page's OCR result, keeping the text layer if OCR fails.
+        
+        Args:
+            page_number: Page number
+            page_text: Text from the page's text layer
+            result: The page text, or a future for its OCR result
+            errors: List that an OCR failure is reported to (optional)
+            
+        Returns:
+            Tuple of (page_number, text)
+        """
+        if not isinstance(result, Future):
+            return page_number, result
+        
+        try:
+            ocr_text, error = result.result()
+        except Exception as e:
+            ocr_text, error = None, f"OCR failed: {str(e)}"
+        if error:
+            print(f"Warning: OCR failed for page {page_number}: {error}")
+            self._report(errors, f"Page {page_number}: {error}")
+            return page_number, page_text
+        return page_number, ocr_text if ocr_text and ocr_text.strip() else page_text
+    
+    def _iter_text_layer(self, pdf_path: str, errors: Optional[List[str]] = None) -> Iterator[Tuple[int, str]]:
+        """
+        Yield each page's text layer, from pdftotext where possible and PyPDF2 otherwise.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            errors: List that pages which cannot be extracted are reported to (optional)
+            
+        Yields:
+            Tuples of (page_number, text)
+            
+        Raises:
+            PDFExtractionError: If neither pdftotext nor PyPDF2 can read the document
+        """
+        page_count = self.get_page_count(pdf_path)
+        if page_count is not None and page_count > self.pages_per_range and self.max_workers > 1:
+            yield from self._iter_pages_parallel(pdf_path, page_count, errors)
+            return
+        
+        next_page = 1
+        try:
+            for page_number, page_text in self._iter_pages_pdftotext(pdf_path):
+                yield page_number, page_text
+                next_page = page_number + 1
+            return
+        except PDFExtractionError as e:
+            pdftotext_error = str(e)
+        
+        # pdftotext failed part-way or not at all: carry on with PyPDF2
+        try:
+            yield from self._iter_pages_pypdf2(pdf_path, first_page=next_page, errors=errors)
+        except PDFExtractionError as e:
+            if next_page == 1:
+                raise PDFExtractionError(
+                    f"pdftotext failed: {pdftotext_error.rstrip('.')}. PyPDF2 also failed: {e}"
+                )
+            marker = f"[Pages from {next_page} could not be extracted: {pdftotext_error}]"
+            self._report(errors, marker)
+            yield next_page, marker
+    
+    def _iter_pages_parallel(self, pdf_path: str, page_count: int,
+                             errors: Optional[List[str]] = None) -> Iterator[Tuple[int, str]]:
+        """
+        Extract page ranges concurrently and yield their pages in order.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            page_count: Number of pages in the document
+            errors: List that ranges which cannot be extracted are reported to (optional)
+            
+        Yields:
+            Tuples of (page_number, text)
+        """
+        ranges = [
+            (first, min(first + self.pages_per_range - 1, page_count))
+            for first in range(1, page_count + 1, self.pages_per_range)
+        ]
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(ranges)))
+        futures = [executor.submit(self._run_pdftotext, pdf_path, first, last) for first, last in ranges]
+        try:
+            for (first, last), future in zip(ranges, futures):
+                range_text, range_error = future.result()
+                if range_error:
+                    yield from self._iter_range_fallback(pdf_path, first, last, range_error, errors)
+                    continue
+                
+                # pdftotext ends every page with a form feed
+                pages = range_text.split("\f")
+                if pages and not pages[-1]:
+                    pages.pop()
+                for offset, page_text in enumerate(pages):
+                    yield first + offset, page_text
+        finally:
+            # Stop queued ranges if the caller stops reading early
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+    
+    def _iter_range_fallback(self, pdf_path: str, first: int, last: int, range_error: str,
+                             errors: Optional[List[str]] = None) -> Iterator[Tuple[int, str]]:
+        """
+        Extract a page range pdftotext failed on with PyPDF2, or yield a marker if that fails too.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            first: First page of the range
+            last: Last page of the range
+            range_error: Error reported by pdftotext
+            errors: List that a range which cannot be extracted is reported to (optional)
+            
+        Yields:
+            Tuples of (page_number, text)
+        """
+        try:
+            yield from self._iter_pages_pypdf2(pdf_path, first, last, errors)
+        except PDFExtractionError:
+            marker = f"[Pages {first}-{last} could not be extracted: {range_error}]"
+            self._report(errors, marker)
+            yield first, marker
+    
+    def _iter_pages_pdftotext(self, pdf_path: str) -> Iterator[Tuple[int, str]]:
+        """
+        Stream pages from a single pdftotext process reading its stdout pipe.
+        
+        The process is killed if a read from it blocks for range_timeout
+        seconds. One watchdog thread per process times the reads; time the
+        caller spends between pages does not count.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Yields:
+            Tuples of (page_number, text)
+            
+        Raises:
+            PDFExtractionError: If pdftotext is missing, fails or stalls
+        """
+        try:
+            process = subprocess.Popen(
+                ['pdftotext', '-layout', pdf_path, '-'],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        except FileNotFoundError:
+            raise PDFExtractionError("pdftotext command not found. Please ensure poppler-utils is installed.")
+        
+        # Drain stderr on the side so a chatty pdftotext cannot block on a full pipe
+        stderr_chunks = []
+        stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+        stderr_reader.start()
+        
+        timed_out = threading.Event()
+        watch = threading.Condition()
+        read_started: Optional[float] = None
+        finished = False
+        
+        def watchdog() -> None:
+            with watch:
+                while not finished:
+                    if read_started is None:
+                        watch.wait()
+                        continue
+                    remaining = read_started + self.range_timeout - time.monotonic()
+                    if remaining <= 0:
+                        timed_out.set()
+                        process.kill()
+                        return
+                    watch.wait(remaining)
+        
+        watchdog_thread = threading.Thread(target=watchdog, daemon=True)
+        watchdog_thread.start()
+        
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        pending = ""
+        page_number = 1
+        try:
+            while True:
+                with watch:
+                    read_started = time.monotonic()
+                    watch.notify()
+                try:
+                    chunk = process.stdout.read1(PIPE_CHUNK_SIZE)
+                finally:
+                    with watch:
+                        read_started = None
+                if not chunk:
+                    break
+                
+                pending += decoder.decode(chunk)
+                # pdftotext ends every page with a form feed
+                *complete, pending = pending.split("\f")
+                for page_text in complete:
+                    yield page_number, page_text
+                    page_number += 1
+            
+            pending += decoder.decode(b"", final=True)
+            returncode = process.wait()
+            stderr_reader.join()
+            if timed_out.is_set():
+                raise PDFExtractionError(f"pdftotext produced no output for {self.range_timeout} seconds.")
+            if returncode != 0:
+                stderr = b"".join(stderr_chunks).decode('utf-8', errors='replace')
+                raise PDFExtractionError(self._pdftotext_error(returncode, stderr))
+            if pending.strip():
+                yield page_number, pending
+        finally:
+            with watch:
+                finished = True
+                watch.notify()
+            watchdog_thread.join()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+    
+    @staticmethod
+    def _report(errors: Optional[List[str]], message: str) -> None:
+        """Record an extraction problem if the caller asked for them."""
+        if errors is not None:
+            errors.append(message)
+    
+    @staticmethod
+    def _pdftotext_error(returncode: int, stderr: str) -> str:
+        """
+        Describe a failed pdftotext run.
+        
+        Args:
+            returncode: pdftotext exit status
+            stderr: pdftotext error output
+            
+        Returns:
+            Error message
+        """
+        # Check stderr for common errors like encryption
+        stderr_lower = stderr.lower()
+        if "command not found" in stderr_lower:
+             return "pdftotext command not found. Please ensure poppler-utils is installed."
+        if "pdf is encrypted" in stderr_lower:
+             return "pdftotext failed: PDF is encrypted."
+        return f"pdftotext failed (code {returncode}): {stderr}"
+    
+    def _run_pdftotext(self, pdf_path: str, first_page: Optional[int] = None,
+                       last_page: Optional[int] = None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Run pdftotext over the whole document or a page range, reading its output from stdout.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            first_page: First page to extract, 1-based (optional)
+            last_page: Last page to extract, inclusive (optional)
+            
+        Returns:
+            Tuple (raw_text, error_message). Text is None if pdftotext fails.
+        """
+        # Using -layout to preserve structure which might help segmentation later
+        command = ['pdftotext', '-layout']
+        if first_page is not None:
+            command += ['-f', str(first_page), '-l', str(last_page)]
+        command += [pdf_path, '-']
+        
+        try:
             result = subprocess.run(
                 command,
                 capture_output=True,
-                text=True,
                 check=False, # Don't raise exception on non-zero exit
-                timeout=60 # Add a timeout to prevent hangs
+                timeout=self.range_timeout # Prevent hangs on a single range
             )
-            
-            if result.returncode != 0:
-                # Check stderr for common errors like encryption
-                stderr_lower = result.stderr.lower()
-                if "command not found" in stderr_lower:
-                     return None, "pdftotext command not found. Please ensure poppler-utils is installed."
-                if "pdf is encrypted" in stderr_lower:
-                     return None, "pdftotext failed: PDF is encrypted."
-                return None, f"pdftotext failed (code {result.returncode}): {result.stderr}"
-            
-            # Read the extracted text
-            with open(temp_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-            
-            if not text or text.isspace():
-                return None, "pdftotext ran successfully but extracted no text."
-
-            return text.strip(), None # Return stripped text and no error
         except subprocess.TimeoutExpired:
-             return None, "pdftotext command timed out after 60 seconds."
+             return None, f"pdftotext command timed out after {self.range_timeout} seconds."
         except FileNotFoundError:
              return None, "pdftotext command not found. Please ensure poppler-utils is installed."
         except Exception as e:
             return None, f"Error during pdftotext execution: {str(e)}"
-        finally:
-            # Ensure temporary file is deleted
-            if temp_path and os.path.exists(temp_path):
-                try:
-                    os.unlink(temp_path)
-                except OSError:
-                    pass # Ignore deletion errors
+        
+        if result.returncode != 0:
+            return None, self._pdftotext_error(result.returncode, result.stderr.decode('utf-8', errors='replace'))
+        
+        return result.stdout.decode('utf-8', errors='replace'), None
 
     
     def process_pdf(self, pdf_file, filename: str) -> Tuple[str, Optional[str]]:
         """
         Process an uploaded PDF: save it and extract text from the entire document.
-        Prioritizes pdftotext, falls back to PyPDF2.
+        Prioritizes pdftotext, falls back to PyPDF2, and OCRs pages without a text layer.
         
         Args:
             pdf_file: The uploaded PDF file object
@@ -164,32 +687,30 @@ class PDFHandler:
             Tuple containing (file_path, extracted_text or error_message)
         """
         file_path = self.save_pdf(pdf_file, filename)
-        final_text = None
-        error_message = "No text extraction method succeeded."
-
-        # 1. Try pdftotext
-        text_pdt, err_pdt = self.extract_text_with_pdftotext(file_path)
-        if text_pdt:
-            final_text = text_pdt
-            error_message = None # Success
-        else:
-            # Record pdftotext error if it occurred
-            error_message = f"pdftotext failed: {err_pdt}. " if err_pdt else "pdftotext extracted no text. "
-
-        # 2. If pdftotext failed or returned no text, try PyPDF2
-        if final_text is None:
-            text_pypdf, err_pypdf = self.extract_text_with_pypdf2(file_path)
-            if text_pypdf:
-                final_text = text_pypdf
-                error_message = None # Success with fallback
-            elif err_pypdf:
-                # Append PyPDF2 error to the previous message
-                error_message += f"PyPDF2 also failed: {err_pypdf}"
-            else:
-                 error_message += "PyPDF2 also extracted no text."
-
-        # If still no text, return the combined error message
-        if final_text is None:
-             return file_path, error_message
-        else:
-             return file_path, final_text
+        return file_path, self.extract_text(file_path)
+
+    def extract_text(self, file_path: str, errors: Optional[List[str]] = None) -> str:
+        """
+        Extract text from a saved PDF, page by page.
+        Prioritizes pdftotext, falls back to PyPDF2, and OCRs pages without a text layer.
+
+        Args:
+            file_path: Path to the PDF file
+            errors: List that pages which could not be fully extracted are reported to (optional);
+                if it is non-empty afterwards, the returned text is partial
+
+        Returns:
+            Extracted text, or an error message if no method succeeded
+        """
+        parts = []
+        try:
+            for page_number, page_text in self.iter_pages(file_path, errors):
+                page_text = page_text.strip()
+                if page_text:
+                    parts.append(page_text)
+        except PDFExtractionError as e:
+            return str(e)
+
+        if not parts:
+            return "No text extraction method succeeded: the PDF contains no extractable text."
+        return "\n\n".join(parts)
@@ -0,0 +1,329 @@
+"""
+Query profiling module for AI Tutor application.
+Opt-in instrumentation that records Database method and SQL statement
+latencies, row counts and lock waits, and logs slow statements.
+"""
+import bisect
+import functools
+import inspect
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with count, total and max."""
+
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+
+    def record(self, elapsed_ms: float, rows: int = 0) -> None:
+        """
+        Record one observation.
+
+        Args:
+            elapsed_ms: Latency in milliseconds
+            rows: Rows read or written by the operation
+        """
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += max(rows, 0)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Estimate a percentile from the bucket counts.
+
+        Args:
+            fraction: Percentile as a fraction, e.g. 0.95
+
+        Returns:
+            Upper bound of the bucket containing the percentile, in milliseconds
+        """
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Summarize the histogram.
+
+        Returns:
+            Dictionary with count, total/mean/max/p50/p95/p99 latency, rows and bucket counts
+        """
+        bounds = [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "rows": self.rows,
+            "buckets": {bound: n for bound, n in zip(bounds, self.counts) if n}
+        }
+
+
+class QueryProfiler:
+    """
+    Collects latency statistics for Database methods and SQL statements.
+
+    Pass an instance to Database(profiler=...) to enable it. Statements
+    slower than the threshold are written to the slow-query logger and,
+    if configured, appended to a log file.
+    """
+
+    def __init__(self, slow_query_threshold_ms: float = 100.0, slow_query_log: Optional[str] = None):
+        """
+        Initialize the profiler.
+
+        Args:
+            slow_query_threshold_ms: Statements slower than this are logged
+            slow_query_log: Path of a file to append slow statements to (optional)
+        """
+        self.slow_query_threshold_ms = slow_query_threshold_ms
+        self.slow_query_log = slow_query_log
+        self._lock = threading.Lock()
+        self._methods: Dict[str, LatencyHistogram] = {}
+        self._statements: Dict[str, LatencyHistogram] = {}
+        self._lock_wait = LatencyHistogram()
+        self._slow_queries = 0
+
+    def record_method(self, name: str, elapsed_ms: float) -> None:
+        """
+        Record a Database method call.
+
+        Args:
+            name: Method name
+            elapsed_ms: Latency in milliseconds
+        """
+        with self._lock:
+            self._methods.setdefault(name, LatencyHistogram()).record(elapsed_ms)
+
+    def record_statement(self, sql: str, elapsed_ms: float, rows: int = 0) -> None:
+        """
+        Record an executed SQL statement.
+
+        Args:
+            sql: Statement text
+            elapsed_ms: Latency in milliseconds
+            rows: Rows affected or fetched
+        """
+        key = normalize_sql(sql)
+        with self._lock:
+            self._statements.setdefault(key, LatencyHistogram()).record(elapsed_ms, rows)
+            if key.upper().startswith("BEGIN"):
+                # Taking the write lock is where writers queue behind each other
+                self._lock_wait.record(elapsed_ms)
+
+        if elapsed_ms >= self.slow_query_threshold_ms:
+            self._log_slow_query(key, elapsed_ms, rows)
+
+    def record_rows(self, sql: str, rows: int) -> None:
+        """
+        Add fetched rows to a statement's row count.
+
+        Args:
+            sql: Statement text
+            rows: Number of rows fetched
+        """
+        key = normalize_sql(sql)
+        with self._lock:
+            histogram = self._statements.get(key)
+            if histogram is not None:
+                histogram.rows += rows
+
+    def wrap(self, name: str, method: Callable) -> Callable:
+        """
+        Wrap a callable so each call is recorded under the given method name.
+
+        Args:
+            name: Method name to record under
+            method: Callable to time
+
+        Returns:
+            Timed callable
+        """
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record_method(name, (time.perf_counter() - started) * 1000)
+        return timed
+
+    def instrument(self, obj: Any, exclude: Optional[List[str]] = None) -> None:
+        """
+        Replace an object's public methods with timed wrappers.
+
+        Generator functions and names in exclude are left untouched.
+
+        Args:
+            obj: Object whose methods should be timed (e.g. a Database)
+            exclude: Method names to skip
+        """
+        skipped = set(exclude or [])
+        for name, member in inspect.getmembers(type(obj), inspect.isfunction):
+            if name.startswith("_") or name in skipped or inspect.isgeneratorfunction(member):
+                continue
+            setattr(obj, name, self.wrap(name, getattr(obj, name)))
+
+    def connection_factory(self) -> Callable[..., sqlite3.Connection]:
+        """
+        Get a sqlite3.connect factory producing connections that report to this profiler.
+
+        Returns:
+            Factory suitable for sqlite3.connect(factory=...)
+        """
+        return functools.partial(ProfiledConnection, profiler=self)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the collected statistics.
+
+        Returns:
+            Dictionary with per-method and per-statement histograms, lock waits and slow query count
+        """
+        with self._lock:
+            return {
+                "methods": {name: h.to_dict() for name, h in sorted(self._methods.items())},
+                "statements": {
+                    sql: h.to_dict()
+                    for sql, h in sorted(self._statements.items(), key=lambda item: -item[1].total_ms)
+                },
+                "lock_wait": self._lock_wait.to_dict(),
+                "slow_queries": self._slow_queries,
+                "slow_query_threshold_ms": self.slow_query_threshold_ms
+            }
+
+    def reset(self) -> None:
+        """Discard all collected statistics."""
+        with self._lock:
+            self._methods.clear()
+            self._statements.clear()
+            self._lock_wait = LatencyHistogram()
+            self._slow_queries = 0
+
+    def _log_slow_query(self, sql: str, elapsed_ms: float, rows: int) -> None:
+        """Write a slow statement to the logger and the slow-query file."""
+        with self._lock:
+            self._slow_queries += 1
+        message = f"slow query {elapsed_ms:.1f}ms rows={rows}: {sql}"
+        logger.warning(message)
+        if self.slow_query_log:
+            try:
+                with open(self.slow_query_log, "a") as f:
+                    f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}\n")
+            except OSError as e:
+                logger.error(f"Could not write slow query log: {e}")
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor that reports statement latency and row counts to a QueryProfiler."""
+
+    profiler: Optional[QueryProfiler] = None
+
+    def execute(self, sql: str, parameters: Any = ()) -> "ProfiledCursor":
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(sql, started)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> "ProfiledCursor":
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(sql, started)
+
+    def fetchone(self) -> Any:
+        row = super().fetchone()
+        if row is not None:
+            self._record_rows(1)
+        return row
+
+    def fetchmany(self, size: int = None) -> list:
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._record_rows(len(rows))
+        return rows
+
+    def fetchall(self) -> list:
+        rows = super().fetchall()
+        self._record_rows(len(rows))
+        return rows
+
+    def _record(self, sql: str, started: float) -> None:
+        self._sql = sql
+        if self.profiler is not None:
+            self.profiler.record_statement(sql, (time.perf_counter() - started) * 1000, self.rowcount)
+
+    def _record_rows(self, rows: int) -> None:
+        sql = getattr(self, "_sql", None)
+        if self.profiler is not None and sql is not None and rows:
+            self.profiler.record_rows(sql, rows)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """Connection whose cursors and commits report to a QueryProfiler."""
+
+    def __init__(self, *args, profiler: Optional[QueryProfiler] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.profiler = profiler
+
+    def cursor(self, factory: Optional[Callable] = None) -> sqlite3.Cursor:
+        cursor = super().cursor(factory or ProfiledCursor)
+        if isinstance(cursor, ProfiledCursor):
+            cursor.profiler = self.profiler
+        return cursor
+
+    # Connection.execute() does not go through cursor(), so route it explicitly
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self) -> None:
+        started = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            if self.profiler is not None:
+                self.profiler.record_statement("COMMIT", (time.perf_counter() - started) * 1000)
+
+
+def normalize_sql(sql: str, max_length: int = 300) -> str:
+    """
+    Collapse whitespace in a statement so equivalent statements share a histogram.
+
+    Args:
+        sql: Statement text
+        max_length: Maximum key length
+
+    Returns:
+        Normalized statement text
+    """
+    return re.sub(r"\s+", " ", sql).strip()[:max_length]
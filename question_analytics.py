@@ -0,0 +1,288 @@
+"""
+Question analytics module for AI Tutor application.
+Computes per-question correctness rates and discrimination with grouped
+SQL, folding in newly completed attempts incrementally.
+"""
+import math
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from database import Database
+
+
+class QuestionAnalytics:
+    """
+    Per-question difficulty statistics backed by the question_stats table.
+
+    refresh() aggregates only attempts completed since the last refresh, so
+    the cost of keeping statistics current is proportional to new activity
+    rather than to the size of question_responses.
+    """
+
+    def __init__(self, database: Database, refresh_interval: float = 60.0, batch_size: int = 500):
+        """
+        Initialize the analytics helper.
+
+        Args:
+            database: Database instance
+            refresh_interval: Minimum seconds between automatic refreshes on read
+            batch_size: Attempts folded in per transaction during a refresh
+        """
+        self.database = database
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self._last_refresh = 0.0
+        self._cache: Dict[Any, List[Dict]] = {}
+        self._lock = threading.Lock()
+        database.add_cache_listener(self.clear_cache)
+
+    def clear_cache(self) -> None:
+        """Drop cached results so the next read queries question_stats again."""
+        with self._lock:
+            self._cache.clear()
+
+    def refresh(self) -> int:
+        """
+        Fold completed, not yet processed attempts into question_stats.
+
+        Each batch is one write operation, so in write-behind mode it is
+        committed by the database's writer thread like every other write.
+
+        Returns:
+            Number of attempts processed
+        """
+        processed = 0
+        while True:
+            batch = self.database.submit_write(self._fold_batch).result()
+            if not batch:
+                break
+            processed += batch
+
+        # Attempts re-scored since the last refresh were backed out of
+        # question_stats by the write itself, so cached results may be stale
+        # even when nothing was folded in
+        with self._lock:
+            self._last_refresh = time.monotonic()
+            self._cache.clear()
+        return processed
+
+    def rebuild(self) -> int:
+        """
+        Discard question_stats and recompute it from every completed attempt.
+
+        Returns:
+            Number of attempts processed
+        """
+        self.database.reset_question_stats()
+        return self.refresh()
+
+    def _fold_batch(self, conn: sqlite3.Connection) -> int:
+        """
+        Write operation folding up to batch_size pending attempts into question_stats.
+
+        Args:
+            conn: Connection inside a write transaction
+
+        Returns:
+            Number of attempts processed, 0 when none are pending
+        """
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id FROM quiz_attempts WHERE completed_at IS NOT NULL AND analytics_processed = 0 "
+            "ORDER BY id LIMIT ?",
+            (self.batch_size,)
+        )
+        attempt_ids = [row[0] for row in cursor.fetchall()]
+        if not attempt_ids:
+            return 0
+
+        placeholders = ",".join("?" * len(attempt_ids))
+        # score_* columns hold the attempt's fractional score, used for discrimination
+        cursor.execute(f"""
+            INSERT INTO question_stats
+                (question_id, response_count, correct_count, score_sum, score_sq_sum, correct_score_sum)
+            SELECT r.question_id, COUNT(*), SUM(COALESCE(r.is_correct, 0)),
+                   SUM(a.fraction), SUM(a.fraction * a.fraction),
+                   SUM(COALESCE(r.is_correct, 0) * a.fraction)
+            FROM (
+                SELECT id, CASE WHEN max_score > 0 THEN score * 1.0 / max_score ELSE 0 END AS fraction
+                FROM quiz_attempts WHERE id IN ({placeholders})
+            ) a
+            JOIN question_responses r ON r.attempt_id = a.id
+            GROUP BY r.question_id
+            ON CONFLICT (question_id) DO UPDATE SET
+                response_count = response_count + excluded.response_count,
+                correct_count = correct_count + excluded.correct_count,
+                score_sum = score_sum + excluded.score_sum,
+                score_sq_sum = score_sq_sum + excluded.score_sq_sum,
+                correct_score_sum = correct_score_sum + excluded.correct_score_sum,
+                updated_at = CURRENT_TIMESTAMP
+        """, attempt_ids)
+
+        cursor.execute(
+            f"UPDATE quiz_attempts SET analytics_processed = 1 WHERE id IN ({placeholders})",
+            attempt_ids
+        )
+        return len(attempt_ids)
+
+    def get_quiz_question_stats(self, quiz_id: int) -> List[Dict]:
+        """
+        Get statistics for every question of a quiz.
+
+        Results are cached and the cache is refreshed at most every refresh_interval seconds.
+
+        Args:
+            quiz_id: Quiz ID
+
+        Returns:
+            List of per-question statistic dictionaries
+        """
+        self._refresh_if_stale()
+        with self._lock:
+            cached = self._cache.get(quiz_id)
+        if cached is not None:
+            return [dict(stats) for stats in cached]
+
+        with self.database.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT q.id AS question_id, q.question_text, s.response_count, s.correct_count,
+                       s.score_sum, s.score_sq_sum, s.correct_score_sum
+                FROM questions q
+                LEFT JOIN question_stats s ON s.question_id = q.id
+                WHERE q.quiz_id = ?
+                ORDER BY q.id
+            """, (quiz_id,))
+            results = [self._summarize(row) for row in cursor.fetchall()]
+
+        with self._lock:
+            self._cache[quiz_id] = results
+        return [dict(stats) for stats in results]
+
+    def get_question_stats(self, question_id: int) -> Optional[Dict]:
+        """
+        Get statistics for a single question.
+
+        Args:
+            question_id: Question ID
+
+        Returns:
+            Statistic dictionary, or None if the question does not exist
+        """
+        self._refresh_if_stale()
+        with self.database.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT q.id AS question_id, q.question_text, s.response_count, s.correct_count,
+                       s.score_sum, s.score_sq_sum, s.correct_score_sum
+                FROM questions q
+                LEFT JOIN question_stats s ON s.question_id = q.id
+                WHERE q.id = ?
+            """, (question_id,))
+            row = cursor.fetchone()
+        return self._summarize(row) if row else None
+
+    def flag_questions(self, min_responses: int = 20, too_easy: float = 0.95, too_hard: float = 0.2,
+                       min_discrimination: float = 0.1, limit: int = 100) -> List[Dict]:
+        """
+        Find questions that look too easy, too hard or broken.
+
+        Args:
+            min_responses: Ignore questions with fewer responses than this
+            too_easy: Correct rate at or above which a question is flagged
+            too_hard: Correct rate at or below which a question is flagged
+            min_discrimination: Discrimination below which a question is flagged
+            limit: Maximum number of questions to return
+
+        Returns:
+            List of statistic dictionaries with a 'flags' list, lowest discrimination first
+        """
+        self._refresh_if_stale()
+        cache_key = ("flags", min_responses, too_easy, too_hard, min_discrimination)
+        with self._lock:
+            cached = self._cache.get(cache_key)
+        if cached is None:
+            with self.database.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT s.question_id, q.question_text, q.quiz_id, s.response_count, s.correct_count,
+                           s.score_sum, s.score_sq_sum, s.correct_score_sum
+                    FROM question_stats s
+                    JOIN questions q ON q.id = s.question_id
+                    WHERE s.response_count >= ?
+                """, (min_responses,))
+                rows = cursor.fetchall()
+
+            cached = []
+            for row in rows:
+                stats = self._summarize(row)
+                stats["quiz_id"] = row["quiz_id"]
+                flags = []
+                if stats["correct_rate"] >= too_easy:
+                    flags.append("too_easy")
+                if stats["correct_rate"] <= too_hard:
+                    flags.append("too_hard")
+                if stats["discrimination"] is not None and stats["discrimination"] < min_discrimination:
+                    flags.append("low_discrimination")
+                if flags:
+                    stats["flags"] = flags
+                    cached.append(stats)
+
+            cached.sort(key=lambda s: s["discrimination"] if s["discrimination"] is not None else 0.0)
+            with self._lock:
+                self._cache[cache_key] = cached
+
+        return [dict(stats) for stats in cached[:limit]]
+
+    def _refresh_if_stale(self) -> None:
+        """
+        Run an incremental refresh if the last one is older than refresh_interval.
+
+        Read paths only take the write lock when attempts are actually
+        pending, and only one caller per interval performs the refresh.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_refresh < self.refresh_interval:
+                return
+            self._last_refresh = now
+
+        with self.database.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT EXISTS (SELECT 1 FROM quiz_attempts "
+                "WHERE completed_at IS NOT NULL AND analytics_processed = 0)"
+            )
+            pending = cursor.fetchone()[0]
+        if pending:
+            self.refresh()
+
+    @staticmethod
+    def _summarize(row) -> Dict:
+        """
+        Turn aggregate sums into rates.
+
+        Discrimination is the point-biserial correlation between answering
+        this question correctly and the attempt's overall fractional score.
+        """
+        n = row["response_count"] or 0
+        correct = row["correct_count"] or 0
+        stats = {
+            "question_id": row["question_id"],
+            "question_text": row["question_text"],
+            "responses": n,
+            "correct": correct,
+            "correct_rate": round(correct / n, 4) if n else None,
+            "discrimination": None
+        }
+
+        if n >= 2:
+            score_sum = row["score_sum"]
+            numerator = n * row["correct_score_sum"] - correct * score_sum
+            variance = (n * correct - correct * correct) * (n * row["score_sq_sum"] - score_sum * score_sum)
+            if variance > 0:
+                stats["discrimination"] = round(numerator / math.sqrt(variance), 4)
+
+        return stats
@@ -5,18 +5,27 @@ Generates quizzes based on lesson content.
 import re
 import json
 import random
-from typing import Dict, List, Any, Tuple
+from collections import Counter
+from typing import Dict, List, Any, Optional, Tuple
 
 class QuizGenerator:
     """
     Generates quizzes based on lesson content for the AI Tutor application.
     """
     
-    def __init__(self):
-        """Initialize the quiz generator."""
-        pass
+    def __init__(self, database: Optional[Any] = None, min_shared_terms: int = 2):
+        """
+        Initialize the quiz generator.
+        
+        Args:
+            database: Database whose question bank is searched for reusable questions (optional)
+            min_shared_terms: Key terms a stored question must share with the content to be reused
+        """
+        self.database = database
+        self.min_shared_terms = min_shared_terms
     
-    def generate_quiz(self, content: str, title: str, num_questions: int = 5) -> Dict:
+    def generate_quiz(self, content: str, title: str, num_questions: int = 5,
+                      reuse_existing: bool = True) -> Dict:
         """
         Generate a quiz based on the provided content.
         
@@ -24,6 +33,7 @@ class QuizGenerator:
             content: Text content to base the quiz on
             title: Title for the quiz
             num_questions: Number of questions to generate (default: 5)
+            reuse_existing: Take matching questions from the database's question bank first
             
         Returns:
             Dictionary containing quiz information and questions
@@ -36,10 +46,13 @@ class QuizGenerator:
         
         # Generate questions
         questions = []
+        if reuse_existing and self.database is not None:
+            questions = self._find_reusable_questions(processed_content, num_questions)
+        remaining = num_questions - len(questions)
         
         # Determine how many of each question type to create
-        num_multiple_choice = max(1, int(num_questions * 0.6))  # At least 60% multiple choice
-        num_short_answer = num_questions - num_multiple_choice
+        num_multiple_choice = max(1, int(remaining * 0.6)) if remaining > 0 else 0  # At least 60% multiple choice
+        num_short_answer = remaining - num_multiple_choice
         
         # Generate multiple choice questions
         for _ in range(num_multiple_choice):
@@ -81,6 +94,57 @@ class QuizGenerator:
         
         return quiz
     
+    def _find_reusable_questions(self, content: str, limit: int) -> List[Dict]:
+        """
+        Search the question bank for existing questions about the same material.
+        
+        Args:
+            content: Preprocessed text content
+            limit: Maximum number of questions to reuse
+            
+        Returns:
+            List of question dictionaries, each with 'reused_from' set to the source question ID
+        """
+        key_terms = self._extract_key_terms(content)
+        if not key_terms:
+            return []
+        
+        matches = self.database.search_questions(" ".join(key_terms), limit=limit * 3)
+        
+        reused = []
+        seen_texts = set()
+        for match in matches:
+            text = match["question_text"]
+            words = set(re.findall(r'\w+', text.lower()))
+            if len(words & set(key_terms)) < self.min_shared_terms or text in seen_texts:
+                continue
+            seen_texts.add(text)
+            reused.append({
+                "question_text": text,
+                "question_type": match["question_type"],
+                "correct_answer": match["correct_answer"],
+                "options": match["options"],
+                "reused_from": match["id"]
+            })
+            if len(reused) >= limit:
+                break
+        
+        return reused
+    
+    def _extract_key_terms(self, content: str, max_terms: int = 10) -> List[str]:
+        """
+        Pick the most frequent longer words in the content as search terms.
+        
+        Args:
+            content: Preprocessed text content
+            max_terms: Maximum number of terms to return
+            
+        Returns:
+            List of lowercase key terms
+        """
+        words = [w for w in re.findall(r'[a-z]+', content.lower()) if len(w) > 4]
+        return [word for word, _ in Counter(words).most_common(max_terms)]
+    
     def _preprocess_content(self, content: str) -> str:
         """
         Preprocess the content for question generation.
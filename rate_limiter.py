@@ -0,0 +1,112 @@
+"""
+Rate limiting module for AI Tutor application.
+In-memory token buckets used to throttle login and registration attempts
+before any password hashing is done.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+
+class RateLimiter:
+    """
+    Keyed token-bucket rate limiter.
+
+    Each key gets a bucket holding up to `burst` tokens that refills at
+    `rate` tokens per second; an attempt costs one token. Buckets are kept
+    in least-recently-used order, so checks are O(1), buckets that have
+    refilled completely are dropped (they behave exactly like a new one)
+    and at most max_keys buckets are held. When the table is full the
+    least recently used bucket is evicted, so a key with no history of its
+    own is never turned away. Every attempt, allowed or not, moves a
+    bucket to the back, so flushing a throttled key takes max_keys new
+    keys between two of its attempts.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity, i.e. attempts allowed back to back
+            max_keys: Maximum number of buckets kept in memory
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._idle_seconds = burst / rate
+        self._lock = threading.Lock()
+        # key -> [tokens, last update time]
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._allowed = 0
+        self._rejected = 0
+        self._evictions = 0
+
+    def acquire(self, key: str) -> float:
+        """
+        Take a token from a key's bucket.
+
+        Args:
+            key: Bucket key, e.g. a username or client address
+
+        Returns:
+            0.0 if the attempt is allowed, otherwise seconds until a token is available
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                    self._evictions += 1
+                bucket = [float(self.burst), now]
+                self._buckets[key] = bucket
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+                self._buckets.move_to_end(key)
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                self._allowed += 1
+                return 0.0
+
+            self._rejected += 1
+            return (1 - bucket[0]) / self.rate
+
+    def reset(self, key: str) -> None:
+        """
+        Forget a key's bucket, e.g. after a successful login.
+
+        Args:
+            key: Bucket key
+        """
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get limiter counters.
+
+        Returns:
+            Dictionary of tracked keys, allowed/rejected attempt counts and evictions
+        """
+        with self._lock:
+            return {
+                "keys": len(self._buckets),
+                "allowed": self._allowed,
+                "rejected": self._rejected,
+                "evictions": self._evictions
+            }
+
+    def _expire(self, now: float) -> None:
+        """Drop buckets that have been idle long enough to refill completely."""
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket[1] < self._idle_seconds:
+                break
+            del self._buckets[key]
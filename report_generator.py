@@ -84,9 +84,12 @@ class ReportGenerator:
         return pdf_path
     
     def prepare_report_data(self, user_data: Dict, quiz_attempts: List[Dict], 
-                           questions_data: Optional[Dict] = None) -> Dict:
+                           questions_data: Optional[Dict] = None,
+                           user_stats: Optional[Dict] = None) -> Dict:
         """
         Prepare data for a progress report.
+        If user_stats (from Database.get_user_stats) is given, the totals come
+        from the precomputed window instead of being recomputed from quiz_attempts.
         """
         report_data = {
             'report_title': f"Progress Report for {user_data.get('username', 'Student')}",
@@ -100,7 +103,11 @@ class ReportGenerator:
         }
         
         # Average score calculation
-        if quiz_attempts:
+        if user_stats:
+            report_data['report_period'] = f"Last {user_stats['window_days']} days"
+            report_data['total_quizzes'] = user_stats['window_attempt_count']
+            report_data['average_score'] = user_stats['window_average_score']
+        elif quiz_attempts:
             total_pct = sum(
                 (att.get('score', 0) / att.get('max_score', 1) * 100)
                 for att in quiz_attempts if att.get('max_score', 0) > 0
@@ -0,0 +1,170 @@
+"""
+Session token module for AI Tutor application.
+Issues signed, expiring session tokens so an authenticated user can be
+recognised on every rerun without a database lookup.
+"""
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+DEFAULT_MAX_AGE = 12 * 60 * 60
+
+
+class SessionTokens:
+    """
+    Issues and verifies signed session tokens.
+
+    A token carries the user ID, admin flag and subscription expiry, signed
+    with HMAC (checked in constant time by itsdangerous). Verification needs
+    no database access; revoked tokens and users are tracked in memory and
+    optionally persisted to a JSON file so revocations survive a restart.
+    """
+
+    def __init__(self, secret_key: Optional[str] = None, max_age: int = DEFAULT_MAX_AGE,
+                 revocation_path: Optional[str] = None):
+        """
+        Initialize the token signer.
+
+        Args:
+            secret_key: Signing key (defaults to the SESSION_SECRET environment variable)
+            max_age: Seconds a token stays valid after it is issued
+            revocation_path: JSON file to persist revocations in (optional)
+        """
+        secret_key = secret_key or os.environ.get("SESSION_SECRET")
+        if not secret_key:
+            print("Warning: SESSION_SECRET is not set; sessions will not survive a restart.")
+            secret_key = secrets.token_urlsafe(32)
+
+        self.max_age = max_age
+        self.revocation_path = revocation_path
+        self._serializer = URLSafeTimedSerializer(secret_key, salt="ai-tutor-session")
+        self._lock = threading.Lock()
+        # token id -> unix time after which the entry can be forgotten
+        self._revoked_tokens: Dict[str, float] = {}
+        # user id -> tokens issued at or before this unix time are rejected
+        self._revoked_users: Dict[int, float] = {}
+        self._load_revocations()
+
+    def issue(self, user: Dict) -> str:
+        """
+        Issue a session token for a user.
+
+        Args:
+            user: User dictionary as returned by Database.get_user_by_id
+
+        Returns:
+            Signed session token
+        """
+        return self._serializer.dumps({
+            "uid": user["id"],
+            "adm": bool(user.get("is_admin")),
+            "sub": user.get("subscription_expires") if user.get("subscription_active") else None,
+            "jti": secrets.token_urlsafe(12),
+            # The signer's timestamp has whole-second resolution, too coarse to tell
+            # a token reissued right after revoke_user() from the ones it revoked
+            "iat": time.time()
+        })
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Check a session token's signature, age and revocation status.
+
+        Args:
+            token: Session token
+
+        Returns:
+            Dictionary with user_id, is_admin, subscription_expires, token_id and
+            issued_at, or None if the token is invalid, expired or revoked
+        """
+        try:
+            claims, issued_at = self._serializer.loads(token, max_age=self.max_age, return_timestamp=True)
+        except BadSignature:
+            return None
+
+        issued_ts = claims.get("iat", issued_at.timestamp())
+        with self._lock:
+            if claims["jti"] in self._revoked_tokens:
+                return None
+            cutoff = self._revoked_users.get(claims["uid"])
+            if cutoff is not None and issued_ts <= cutoff:
+                return None
+
+        return {
+            "user_id": claims["uid"],
+            "is_admin": claims["adm"],
+            "subscription_expires": claims["sub"],
+            "token_id": claims["jti"],
+            "issued_at": issued_ts
+        }
+
+    def revoke(self, token: str) -> bool:
+        """
+        Revoke a single session token, e.g. on logout.
+
+        Args:
+            token: Session token
+
+        Returns:
+            True if the token was valid and is now revoked
+        """
+        session = self.verify(token)
+        if session is None:
+            return False
+
+        with self._lock:
+            self._revoked_tokens[session["token_id"]] = session["issued_at"] + self.max_age
+            self._prune(time.time())
+            self._save_revocations()
+        return True
+
+    def revoke_user(self, user_id: int) -> None:
+        """
+        Revoke every token issued to a user so far, e.g. after a password or role change.
+
+        Args:
+            user_id: User ID
+        """
+        with self._lock:
+            self._revoked_users[user_id] = time.time()
+            self._prune(time.time())
+            self._save_revocations()
+
+    def _prune(self, now: float) -> None:
+        """Forget revocations for tokens that have expired anyway."""
+        self._revoked_tokens = {
+            token_id: expires for token_id, expires in self._revoked_tokens.items() if expires > now
+        }
+        self._revoked_users = {
+            user_id: cutoff for user_id, cutoff in self._revoked_users.items() if cutoff + self.max_age > now
+        }
+
+    def _load_revocations(self) -> None:
+        """Read persisted revocations, if any."""
+        if not self.revocation_path or not os.path.exists(self.revocation_path):
+            return
+
+        try:
+            with open(self.revocation_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not read session revocations: {e}")
+            return
+
+        self._revoked_tokens = {token_id: float(expires) for token_id, expires in data.get("tokens", {}).items()}
+        self._revoked_users = {int(user_id): float(cutoff) for user_id, cutoff in data.get("users", {}).items()}
+        self._prune(time.time())
+
+    def _save_revocations(self) -> None:
+        """Write revocations atomically; must be called with the lock held."""
+        if not self.revocation_path:
+            return
+
+        temp_path = f"{self.revocation_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"tokens": self._revoked_tokens, "users": self._revoked_users}, f)
+        os.replace(temp_path, self.revocation_path)
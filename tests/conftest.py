@@ -0,0 +1,19 @@
+"""
+Shared pytest fixtures for the AI Tutor tests.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A migrated database in a temporary directory."""
+    database = Database(str(tmp_path / "test.db"))
+    yield database
+    database.close()
@@ -0,0 +1,49 @@
+"""
+Tests for registration, login and session handling.
+"""
+import asyncio
+import threading
+
+import pytest
+
+from auth_manager import AuthManager
+from password_hasher import PasswordHasher
+from session_tokens import SessionTokens
+
+
+@pytest.fixture
+def auth(db):
+    """An AuthManager with a cheap bcrypt cost and a fixed signing key."""
+    manager = AuthManager(db, PasswordHasher(max_workers=2, rounds=4), SessionTokens("test-secret"))
+    yield manager
+    manager.hasher.close()
+
+
+def test_async_registration_keeps_database_work_off_the_event_loop(auth, db):
+    threads = []
+    count_users = db.count_users
+
+    def recording_count_users():
+        threads.append(threading.get_ident())
+        return count_users()
+
+    db.count_users = recording_count_users
+
+    async def register():
+        loop_thread = threading.get_ident()
+        result = await auth.register_user_async("admin", "password1")
+        return loop_thread, result
+
+    loop_thread, result = asyncio.run(register())
+
+    assert result["success"]
+    assert threads and loop_thread not in threads
+
+
+def test_async_login(auth):
+    auth.register_user("admin", "password1")
+
+    result = asyncio.run(auth.login_user_async("admin", "password1"))
+
+    assert result["success"]
+    assert auth.verify_session(result["session_token"])["success"]
@@ -0,0 +1,83 @@
+"""
+Tests for online backups and restores.
+"""
+import sqlite3
+
+import pytest
+
+from backup_service import BackupService
+from question_analytics import QuestionAnalytics
+
+QUESTIONS = [
+    {"question_text": "What is the capital of France?", "question_type": "short_answer", "correct_answer": "Paris"}
+]
+
+
+@pytest.fixture
+def service(db, tmp_path):
+    return BackupService(db, backup_dir=str(tmp_path / "backups"), retain=2)
+
+
+def test_backup_and_restore_round_trip(db, service):
+    db.add_user("alice", "hash")
+    snapshot = service.backup_now()
+    assert snapshot["pages"] > 0
+    assert service.list_backups() == [snapshot["path"]]
+
+    db.add_user("bob", "hash")
+    assert db.get_user_by_username("bob") is not None
+
+    result = service.restore(snapshot["path"])
+
+    assert result["pages"] == snapshot["pages"]
+    assert db.get_user_by_username("alice") is not None
+    # bob was cached before the restore and must not outlive it
+    assert db.get_user_by_username("bob") is None
+    assert db.count_users() == 1
+
+
+def test_backups_beyond_retention_are_pruned(service):
+    paths = [service.backup_now()["path"] for _ in range(3)]
+
+    assert service.list_backups() == paths[1:]
+
+
+def test_restore_clears_question_analytics_cache(db, service):
+    quiz_id, question_ids = db.create_quiz_with_questions("Quiz", "Material", QUESTIONS)
+    snapshot = service.backup_now()["path"]
+    db.submit_quiz_attempt(quiz_id, 1, {question_ids[0]: "Paris"})
+    analytics = QuestionAnalytics(db, refresh_interval=3600)
+    analytics.refresh()
+    assert analytics.get_quiz_question_stats(quiz_id)[0]["responses"] == 1
+
+    service.restore(snapshot)
+
+    assert analytics.get_quiz_question_stats(quiz_id)[0]["responses"] == 0
+
+
+def test_restore_rechecks_full_text_search(db, service, tmp_path):
+    if not db.has_full_text_search:
+        pytest.skip("SQLite built without FTS5")
+    db.create_quiz_with_questions("Quiz", "Material", QUESTIONS)
+    snapshot = service.backup_now()["path"]
+
+    # A snapshot taken before the full-text index existed
+    conn = sqlite3.connect(snapshot)
+    triggers = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'questions_fts%'"
+    )]
+    for name in triggers:
+        conn.execute(f"DROP TRIGGER {name}")
+    conn.execute("DROP TABLE questions_fts")
+    conn.commit()
+    conn.close()
+
+    service.restore(snapshot)
+
+    assert db.has_full_text_search is False
+    assert [q["question_text"] for q in db.search_questions("capital")] == [QUESTIONS[0]["question_text"]]
+
+
+def test_restore_of_missing_snapshot_fails(service, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        service.restore(str(tmp_path / "missing.db"))
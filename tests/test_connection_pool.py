@@ -0,0 +1,74 @@
+"""
+Tests for the SQLite connection pool.
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from database import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=2, timeout=1.0)
+    yield pool
+    pool.close()
+
+
+def test_slow_connect_does_not_block_idle_checkouts(pool, monkeypatch):
+    idle = pool.acquire()
+    pool.release(idle)
+
+    opening = threading.Event()
+    finish = threading.Event()
+    create = pool.create_connection
+
+    def slow_create():
+        opening.set()
+        finish.wait(5)
+        return create()
+
+    # Take the idle connection in the main thread so the worker has to open one
+    held = pool.acquire()
+    monkeypatch.setattr(pool, "create_connection", slow_create)
+    worker = threading.Thread(target=lambda: pool.release(pool.acquire()))
+    worker.start()
+    assert opening.wait(5)
+
+    # The pool lock is free while the worker connects
+    reused = []
+
+    def reuse():
+        pool.release(held)
+        reused.append(pool.acquire())
+        pool.release(held)
+
+    checker = threading.Thread(target=reuse)
+    checker.start()
+    checker.join(2)
+    assert not checker.is_alive()
+    assert reused == [held]
+
+    finish.set()
+    worker.join(5)
+    assert pool.stats()["open_connections"] == 2
+
+
+def test_failed_connect_gives_the_slot_back(pool, monkeypatch):
+    def broken_create():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(pool, "create_connection", broken_create)
+    for _ in range(3):
+        with pytest.raises(sqlite3.OperationalError, match="unable to open"):
+            pool.acquire()
+    monkeypatch.undo()
+
+    first, second = pool.acquire(), pool.acquire()
+    stats = pool.stats()
+    assert stats["open_connections"] == 2
+    assert stats["in_use"] == 2
+    assert stats["checkouts"] == 2
+    pool.release(first)
+    pool.release(second)
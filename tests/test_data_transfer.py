@@ -0,0 +1,149 @@
+"""
+Tests for bulk export and import.
+"""
+import json
+import os
+import sqlite3
+
+import pytest
+
+from data_transfer import EXPORT_COLUMNS, DataTransfer
+from database import Database
+from question_analytics import QuestionAnalytics
+
+QUESTIONS = [{"question_text": "What is photosynthesis?", "question_type": "short_answer", "correct_answer": "light"}]
+MORE_QUESTIONS = [
+    {"question_text": "Pick a primary colour", "question_type": "multiple_choice", "correct_answer": "red",
+     "options": ["red", "green, with a comma", "purple"]},
+    {"question_text": "Unicode \u00e9t\u00e9 and \"quotes\"\nacross lines", "question_type": "short_answer",
+     "correct_answer": "yes"}
+]
+
+
+@pytest.fixture
+def target(tmp_path):
+    """An empty database to import into."""
+    database = Database(str(tmp_path / "target.db"))
+    yield database
+    database.close()
+
+
+def _populate(db):
+    quiz_id, question_ids = db.create_quiz_with_questions("Biology", "Material " * 200, QUESTIONS)
+    other_id, other_ids = db.create_quiz_with_questions("Art", "Colours", MORE_QUESTIONS)
+    db.submit_quiz_attempt(quiz_id, 1, {question_ids[0]: "light"})
+    db.submit_quiz_attempt(other_id, 2, {other_ids[0]: "red", other_ids[1]: "no"})
+    return quiz_id
+
+
+def _dump(db):
+    transfer = DataTransfer(db, chunk_size=2)
+    return {table: list(transfer.iter_rows(table)) for table in EXPORT_COLUMNS}
+
+
+def _rewrite(path, change):
+    """Apply change to every record of a JSONL file."""
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    for record in records:
+        change(record)
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(record) + "\n" for record in records)
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_round_trip_into_empty_database(db, target, tmp_path, fmt):
+    _populate(db)
+    out_dir = str(tmp_path / "dump")
+
+    exported = DataTransfer(db, chunk_size=2).export_tables(out_dir, fmt)
+    imported = DataTransfer(target, chunk_size=2).import_tables(out_dir, fmt)
+
+    assert exported == imported == {"quizzes": 2, "questions": 3, "quiz_attempts": 2, "question_responses": 3}
+    assert _dump(target) == _dump(db)
+    assert target.get_user_stats(2)["attempt_count"] == 1
+    assert target.search_questions("photosynthesis")[0]["question_text"] == QUESTIONS[0]["question_text"]
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_ignore_import_keeps_existing_rows(db, target, tmp_path, fmt):
+    _populate(db)
+    out_dir = str(tmp_path / "dump")
+    DataTransfer(db).export_tables(out_dir, fmt)
+    DataTransfer(target).import_tables(out_dir, fmt)
+    with target.transaction() as conn:
+        conn.execute("UPDATE quizzes SET title = 'Edited' WHERE id = 1")
+
+    DataTransfer(target).import_tables(out_dir, fmt, on_conflict="ignore")
+
+    assert target.get_quiz_with_questions(1)["title"] == "Edited"
+    assert len(_dump(target)["questions"]) == 3
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_replace_import_overwrites_existing_rows(db, target, tmp_path, fmt):
+    _populate(db)
+    out_dir = str(tmp_path / "dump")
+    DataTransfer(db).export_tables(out_dir, fmt)
+    DataTransfer(target).import_tables(out_dir, fmt)
+    with target.transaction() as conn:
+        conn.execute("UPDATE quizzes SET title = 'Edited' WHERE id = 1")
+        conn.execute("UPDATE questions SET question_text = 'Edited question' WHERE id = 1")
+
+    DataTransfer(target).import_tables(out_dir, fmt, on_conflict="replace")
+
+    assert _dump(target) == _dump(db)
+    # The upsert keeps the full-text index in step with the restored text
+    assert target.search_questions("Edited") == []
+    assert len(target.search_questions("photosynthesis")) == 1
+
+
+def test_abort_import_rejects_existing_rows(db, tmp_path):
+    _populate(db)
+    out_dir = str(tmp_path / "dump")
+    DataTransfer(db).export_tables(out_dir)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        DataTransfer(db).import_tables(out_dir, tables=["quizzes"], on_conflict="abort")
+
+
+def test_unknown_format_and_mode_are_rejected(db, tmp_path):
+    with pytest.raises(ValueError):
+        DataTransfer(db).export_tables(str(tmp_path), "xml")
+    with pytest.raises(ValueError):
+        DataTransfer(db).import_tables(str(tmp_path), on_conflict="merge")
+
+
+def test_replace_import_refreshes_question_analytics(db, tmp_path):
+    quiz_id, question_ids = db.create_quiz_with_questions("Biology", "Material", QUESTIONS)
+    db.submit_quiz_attempt(quiz_id, 1, {question_ids[0]: "dark"})
+    analytics = QuestionAnalytics(db, refresh_interval=0)
+    assert analytics.get_question_stats(question_ids[0])["correct"] == 0
+
+    out_dir = str(tmp_path / "dump")
+    DataTransfer(db).export_tables(out_dir)
+    _rewrite(os.path.join(out_dir, "question_responses.jsonl"), lambda r: r.update(is_correct=1))
+    _rewrite(os.path.join(out_dir, "quiz_attempts.jsonl"), lambda r: r.update(score=1))
+    DataTransfer(db).import_tables(out_dir, on_conflict="replace")
+
+    stats = analytics.get_question_stats(question_ids[0])
+    assert (stats["responses"], stats["correct"]) == (1, 1)
+    assert db.get_user_stats(1)["average_score"] == 100.0
+
+
+def test_import_drops_cached_question_analytics(db, tmp_path):
+    quiz_id, question_ids = db.create_quiz_with_questions("Biology", "Material", QUESTIONS)
+    db.submit_quiz_attempt(quiz_id, 1, {question_ids[0]: "dark"})
+    analytics = QuestionAnalytics(db, refresh_interval=3600)
+    analytics.refresh()
+    assert analytics.get_quiz_question_stats(quiz_id)[0]["responses"] == 1
+
+    out_dir = str(tmp_path / "dump")
+    DataTransfer(db).export_tables(out_dir)
+    _rewrite(os.path.join(out_dir, "question_responses.jsonl"), lambda r: r.update(is_correct=1))
+    DataTransfer(db).import_tables(out_dir, on_conflict="replace")
+
+    # question_stats was reset, so the cached figures must not be served until the next refresh
+    assert analytics.get_quiz_question_stats(quiz_id)[0]["responses"] == 0
+    analytics.refresh()
+    assert analytics.get_quiz_question_stats(quiz_id)[0]["correct"] == 1
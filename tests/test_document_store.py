@@ -0,0 +1,42 @@
+"""
+Tests for document compression.
+"""
+import pytest
+
+import document_store
+from document_store import compress_text, decompress_text
+
+TEXT = "Photosynthesis converts light energy into chemical energy. " * 50
+
+
+def test_default_codec_is_zlib():
+    codec, body = compress_text(TEXT)
+
+    assert codec == "zlib"
+    assert len(body) < len(TEXT)
+    assert decompress_text(codec, body) == TEXT
+
+
+def test_short_text_is_stored_raw():
+    assert compress_text("short") == ("none", b"short")
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        compress_text(TEXT, codec="lz4")
+
+
+def test_zstd_requires_zstandard(monkeypatch):
+    monkeypatch.setattr(document_store, "zstandard", None)
+
+    with pytest.raises(RuntimeError):
+        compress_text(TEXT, codec="zstd")
+
+
+def test_zstd_round_trip():
+    pytest.importorskip("zstandard")
+
+    codec, body = compress_text(TEXT, codec="zstd")
+
+    assert codec == "zstd"
+    assert decompress_text(codec, body) == TEXT
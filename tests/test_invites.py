@@ -0,0 +1,68 @@
+"""
+Tests for invite redemption during registration.
+"""
+import threading
+
+from database import Database
+
+
+def _race(db, token, count):
+    """Register count users concurrently with the same invite token."""
+    barrier = threading.Barrier(count)
+    results = []
+    lock = threading.Lock()
+
+    def register(i):
+        barrier.wait()
+        result = db.add_user_with_invite(f"user{i}", "hash", f"user{i}@example.com", token)
+        with lock:
+            results.append(result)
+
+    threads = [threading.Thread(target=register, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_first_user_needs_no_invite_and_is_admin(db):
+    user_id, error = db.add_user_with_invite("admin", "hash")
+
+    assert error is None
+    assert db.is_user_admin(user_id)
+
+
+def test_later_users_need_an_invite(db):
+    db.add_user_with_invite("admin", "hash")
+
+    user_id, error = db.add_user_with_invite("bob", "hash")
+
+    assert user_id == -1
+    assert error
+    assert db.count_users() == 1
+
+
+def test_concurrent_registrations_redeem_an_invite_once(db):
+    admin_id, _ = db.add_user_with_invite("admin", "hash")
+    _, token = db.create_invite_link(admin_id)
+
+    results = _race(db, token, 8)
+
+    assert sum(1 for user_id, _ in results if user_id != -1) == 1
+    assert db.count_users() == 2
+    assert db.get_active_invites_by_creator(admin_id) == []
+
+
+def test_concurrent_registrations_redeem_once_with_write_behind(tmp_path):
+    db = Database(str(tmp_path / "queued.db"), write_behind=True)
+    try:
+        admin_id, _ = db.add_user_with_invite("admin", "hash")
+        _, token = db.create_invite_link(admin_id)
+
+        results = _race(db, token, 8)
+
+        assert sum(1 for user_id, _ in results if user_id != -1) == 1
+        assert db.count_users() == 2
+    finally:
+        db.close()
@@ -0,0 +1,83 @@
+"""
+Tests for schema migrations and the indexes they add.
+"""
+import sqlite3
+
+from migrations import MIGRATIONS, apply_migrations, current_version
+
+
+def _uses_index(plan, index_name):
+    """Whether a query plan searches the given index."""
+    return any(step.startswith("SEARCH") and index_name in step for step in plan)
+
+
+def test_fresh_database_is_at_latest_version(db):
+    assert db.schema_version() == max(m.version for m in MIGRATIONS)
+
+
+def test_apply_migrations_is_idempotent(db):
+    with db.connection() as conn:
+        schema_before = conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
+
+        assert apply_migrations(conn) == []
+        assert apply_migrations(conn) == []
+
+        schema_after = conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
+        versions = conn.execute("SELECT version FROM schema_version ORDER BY version").fetchall()
+
+    assert [tuple(row) for row in schema_after] == [tuple(row) for row in schema_before]
+    assert [row[0] for row in versions] == sorted(m.version for m in MIGRATIONS)
+
+
+def test_failed_migration_keeps_previous_version(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "plain.db"), isolation_level=None)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+    migrations = [
+        MIGRATIONS[0]._replace(steps=["CREATE INDEX idx_t_id ON t (id)"]),
+        MIGRATIONS[1]._replace(steps=["CREATE INDEX idx_t_missing ON t (missing)"]),
+    ]
+
+    try:
+        apply_migrations(conn, migrations)
+    except sqlite3.OperationalError:
+        pass
+    else:
+        raise AssertionError("migration with a bad step should fail")
+
+    assert current_version(conn) == 1
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'idx_t_missing'").fetchone() is None
+    conn.close()
+
+
+def test_quiz_history_uses_user_started_index(db):
+    sql, params = db._quiz_history_query(1, "2024-01-01", "2025-01-01", None, None)
+    plan = db.explain_query_plan(sql, tuple(params))
+
+    assert _uses_index(plan, "idx_quiz_attempts_user_started")
+    assert not any("TEMP B-TREE" in step for step in plan)
+
+
+def test_questions_by_quiz_use_quiz_index(db):
+    plan = db.explain_query_plan("SELECT * FROM questions WHERE quiz_id = ?", (1,))
+
+    assert _uses_index(plan, "idx_questions_quiz_id")
+
+
+def test_progress_reports_use_user_generated_index(db):
+    plan = db.explain_query_plan(
+        "SELECT * FROM progress_reports WHERE user_id = ? ORDER BY generated_at DESC", (1,)
+    )
+
+    assert _uses_index(plan, "idx_progress_reports_user_generated")
+    assert not any("TEMP B-TREE" in step for step in plan)
+
+
+def test_active_invites_use_creator_unused_index(db):
+    plan = db.explain_query_plan(
+        "SELECT * FROM invite_links WHERE created_by = ? AND used = 0 AND expires_at_ts > ? "
+        "AND id < ? ORDER BY id DESC LIMIT ?",
+        (1, 0, 100, 50)
+    )
+
+    assert _uses_index(plan, "idx_invite_links_creator_unused")
+    assert not any("TEMP B-TREE" in step for step in plan)
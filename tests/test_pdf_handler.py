@@ -0,0 +1,249 @@
+"""
+Tests for PDF text extraction.
+
+pdfinfo, pdftotext, pdftoppm and tesseract are replaced by small scripts on PATH that read a
+JSON description of the document, so neither poppler nor tesseract needs to be installed.
+"""
+import json
+import os
+import stat
+import sys
+import time
+
+import pytest
+
+from pdf_handler import PDFExtractionError, PDFHandler
+
+FAKE_PDFINFO = """
+import json, sys
+doc = json.load(open(sys.argv[-1]))
+print("Pages: %d" % len(doc["pages"]))
+"""
+
+FAKE_PDFTOTEXT = """
+import json, sys, time
+args = sys.argv[1:]
+doc = json.load(open(args[-2]))
+first = int(args[args.index("-f") + 1]) if "-f" in args else 1
+last = int(args[args.index("-l") + 1]) if "-l" in args else len(doc["pages"])
+if "log" in doc:
+    with open(doc["log"], "a") as f:
+        f.write("%d-%d%s\\n" % (first, last, "" if "-f" in args else " whole"))
+if any(first <= page <= last for page in doc.get("fail_pages", [])):
+    sys.stderr.write("Syntax Error: broken xref")
+    sys.exit(1)
+for page in range(first, last + 1):
+    sys.stdout.write(doc["pages"][page - 1] + "\\f")
+    sys.stdout.flush()
+    if page == doc.get("stall_after"):
+        time.sleep(30)
+"""
+
+FAKE_PDFTOPPM = """
+import json, os, sys, time
+args = sys.argv[1:]
+doc = json.load(open(args[-2]))
+page = int(args[args.index("-f") + 1])
+if page in doc.get("slow_ocr", []):
+    with open(doc["pid_file"], "w") as f:
+        f.write(str(os.getpid()))
+    time.sleep(30)
+with open(args[-1] + ".png", "w") as f:
+    f.write("scanned page %d" % page)
+"""
+
+FAKE_TESSERACT = """
+import sys
+print("OCR text for " + open(sys.argv[1]).read())
+"""
+
+
+def _install(directory, name, source):
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write(f"#!{sys.executable}\n{source}")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+
+@pytest.fixture
+def fake_poppler(tmp_path, monkeypatch):
+    """Put fake pdfinfo/pdftotext first on PATH and return a document factory."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    _install(str(bin_dir), "pdfinfo", FAKE_PDFINFO)
+    _install(str(bin_dir), "pdftotext", FAKE_PDFTOTEXT)
+    _install(str(bin_dir), "pdftoppm", FAKE_PDFTOPPM)
+    _install(str(bin_dir), "tesseract", FAKE_TESSERACT)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    def make_document(name, pages, **options):
+        path = str(tmp_path / name)
+        with open(path, "w") as f:
+            json.dump(dict(options, pages=pages, pid_file=str(tmp_path / "ocr.pid")), f)
+        return path
+
+    return make_document
+
+
+def _pages(count):
+    return [f"page {n} has a perfectly readable text layer" for n in range(1, count + 1)]
+
+
+@pytest.fixture
+def handler(tmp_path):
+    return PDFHandler(str(tmp_path / "pdfs"), max_workers=4, pages_per_range=10, range_timeout=2,
+                      ocr_enabled=False)
+
+
+def test_short_document_streams_pages_in_order(fake_poppler, handler):
+    path = fake_poppler("short.pdf", _pages(5))
+
+    assert [number for number, _ in handler.iter_pages(path)] == [1, 2, 3, 4, 5]
+    assert handler.extract_text(path).startswith("page 1 has")
+
+
+def test_long_document_is_extracted_in_parallel_ranges_in_order(fake_poppler, handler):
+    path = fake_poppler("long.pdf", _pages(45))
+
+    pages = list(handler.iter_pages(path))
+
+    assert [number for number, _ in pages] == list(range(1, 46))
+    assert pages[44][1] == "page 45 has a perfectly readable text layer"
+
+
+def test_ranges_cover_the_document_including_a_short_last_range(fake_poppler, handler, tmp_path):
+    log = tmp_path / "pdftotext.log"
+    path = fake_poppler("long.pdf", _pages(25), log=str(log))
+
+    assert [number for number, _ in handler.iter_pages(path)] == list(range(1, 26))
+    assert sorted(log.read_text().split()) == ["1-10", "11-20", "21-25"]
+
+
+def test_small_documents_and_single_worker_use_one_streaming_process(fake_poppler, tmp_path):
+    log = tmp_path / "pdftotext.log"
+    short = fake_poppler("short.pdf", _pages(10), log=str(log))
+    long = fake_poppler("long.pdf", _pages(25), log=str(log))
+    single = PDFHandler(str(tmp_path / "pdfs"), max_workers=1, pages_per_range=10, ocr_enabled=False)
+    parallel = PDFHandler(str(tmp_path / "pdfs"), max_workers=4, pages_per_range=10, ocr_enabled=False)
+
+    assert len(list(parallel.iter_pages(short))) == 10
+    assert len(list(single.iter_pages(long))) == 25
+    assert log.read_text().splitlines() == ["1-10 whole", "1-25 whole"]
+
+
+def test_failed_range_falls_back_to_pypdf2_for_that_range_only(fake_poppler, handler, monkeypatch):
+    path = fake_poppler("broken.pdf", _pages(30), fail_pages=[15])
+    fallback_ranges = []
+
+    def pypdf2_pages(pdf_path, first_page=1, last_page=None, errors=None):
+        fallback_ranges.append((first_page, last_page))
+        for number in range(first_page, last_page + 1):
+            yield number, f"PyPDF2 page {number}"
+
+    monkeypatch.setattr(handler, "_iter_pages_pypdf2", pypdf2_pages)
+    pages = list(handler.iter_pages(path))
+
+    assert fallback_ranges == [(11, 20)]
+    assert [number for number, _ in pages] == list(range(1, 31))
+    assert pages[14][1] == "PyPDF2 page 15"
+    assert pages[20][1].startswith("page 21 has")
+
+
+def test_stalled_range_times_out_without_holding_up_the_rest(fake_poppler, handler, monkeypatch):
+    handler.range_timeout = 0.5
+    path = fake_poppler("stall.pdf", _pages(30), stall_after=12)
+
+    def unreadable(*args, **kwargs):
+        raise PDFExtractionError("Error extracting text with PyPDF2: not a PDF")
+
+    monkeypatch.setattr(handler, "_iter_pages_pypdf2", unreadable)
+    errors = []
+    started = time.monotonic()
+    pages = list(handler.iter_pages(path, errors))
+
+    assert time.monotonic() - started < 5
+    assert [number for number, _ in pages] == list(range(1, 11)) + [11] + list(range(21, 31))
+    assert "timed out" in errors[0]
+
+
+def test_failed_range_is_reported_when_no_fallback_can_read_it(fake_poppler, handler, monkeypatch):
+    path = fake_poppler("broken.pdf", _pages(30), fail_pages=[15])
+
+    def unreadable(*args, **kwargs):
+        raise PDFExtractionError("Error extracting text with PyPDF2: not a PDF")
+
+    monkeypatch.setattr(handler, "_iter_pages_pypdf2", unreadable)
+    errors = []
+    text = handler.extract_text(path, errors)
+
+    assert "[Pages 11-20 could not be extracted" in text
+    assert "page 30 has" in text
+    assert len(errors) == 1
+
+
+def test_stalled_pdftotext_is_killed(fake_poppler, handler):
+    handler.range_timeout = 0.5
+    path = fake_poppler("stall.pdf", _pages(3), stall_after=1)
+
+    started = time.monotonic()
+    pages = handler._iter_pages_pdftotext(path)
+    assert next(pages)[0] == 1
+    with pytest.raises(PDFExtractionError, match="no output"):
+        list(pages)
+
+    assert time.monotonic() - started < 5
+
+
+def test_slow_consumer_does_not_trip_the_stall_timeout(fake_poppler, handler):
+    handler.range_timeout = 0.3
+    path = fake_poppler("short.pdf", _pages(3))
+
+    numbers = []
+    for number, _ in handler._iter_pages_pdftotext(path):
+        numbers.append(number)
+        time.sleep(0.4)
+
+    assert numbers == [1, 2, 3]
+
+
+def test_extract_text_with_pdftotext_uses_the_page_path(fake_poppler, handler):
+    path = fake_poppler("long.pdf", _pages(25))
+
+    text, error = handler.extract_text_with_pdftotext(path)
+
+    assert error is None
+    assert text.count("perfectly readable") == 25
+
+
+def test_scanned_pages_are_ocred_in_order(fake_poppler, tmp_path):
+    handler = PDFHandler(str(tmp_path / "pdfs"), ocr_workers=2)
+    pages = _pages(4)
+    pages[1] = pages[3] = ""
+    path = fake_poppler("scanned.pdf", pages)
+
+    result = list(handler.iter_pages(path))
+
+    assert [number for number, _ in result] == [1, 2, 3, 4]
+    assert result[1][1].strip() == "OCR text for scanned page 2"
+    assert result[3][1].strip() == "OCR text for scanned page 4"
+    assert result[2][1] == pages[2]
+
+
+def test_stopping_early_kills_running_ocr(fake_poppler, tmp_path):
+    handler = PDFHandler(str(tmp_path / "pdfs"), ocr_workers=2)
+    path = fake_poppler("scanned.pdf", ["", ""], slow_ocr=[2])
+
+    pages = handler.iter_pages(path)
+    assert next(pages)[0] == 1
+    pid_file = tmp_path / "ocr.pid"
+    deadline = time.monotonic() + 5
+    while not pid_file.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    pid = int(pid_file.read_text())
+
+    started = time.monotonic()
+    pages.close()
+
+    assert time.monotonic() - started < 5
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
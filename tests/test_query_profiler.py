@@ -0,0 +1,85 @@
+"""
+Tests for query profiling.
+"""
+import pytest
+
+from database import Database
+from query_profiler import LatencyHistogram, QueryProfiler, normalize_sql
+
+
+@pytest.fixture
+def profiled(tmp_path):
+    profiler = QueryProfiler(slow_query_threshold_ms=10_000, slow_query_log=str(tmp_path / "slow.log"))
+    database = Database(str(tmp_path / "profiled.db"), profiler=profiler)
+    profiler.reset()
+    yield database, profiler
+    database.close()
+
+
+def test_method_calls_are_counted(profiled):
+    database, profiler = profiled
+
+    user_id = database.add_user("alice", "hash")
+    for _ in range(3):
+        database.is_user_admin(user_id)
+
+    methods = profiler.snapshot()["methods"]
+    assert methods["add_user"]["count"] == 1
+    assert methods["is_user_admin"]["count"] == 3
+    # Excluded helpers are not wrapped
+    assert "connection" not in methods
+
+
+def test_statements_are_grouped_with_row_counts(profiled):
+    database, profiler = profiled
+    for name in ("alice", "bob", "carol"):
+        database.add_user(name, "hash")
+    assert database.count_users() == 3
+
+    statements = profiler.snapshot()["statements"]
+    inserts = [stats for sql, stats in statements.items() if sql.startswith("INSERT INTO users")]
+    assert len(inserts) == 1
+    assert inserts[0]["count"] == 3
+    assert inserts[0]["rows"] == 3
+    assert profiler.snapshot()["lock_wait"]["count"] >= 3
+
+
+def test_slow_statements_are_logged(profiled, tmp_path):
+    database, profiler = profiled
+    profiler.slow_query_threshold_ms = 0
+
+    database.count_users()
+
+    snapshot = profiler.snapshot()
+    assert snapshot["slow_queries"] >= 1
+    assert "slow query" in (tmp_path / "slow.log").read_text()
+
+
+def test_reset_discards_counters(profiled):
+    database, profiler = profiled
+    database.count_users()
+
+    profiler.reset()
+
+    snapshot = profiler.snapshot()
+    assert snapshot["methods"] == {}
+    assert snapshot["statements"] == {}
+    assert snapshot["lock_wait"]["count"] == 0
+
+
+def test_histogram_percentiles_use_bucket_bounds():
+    histogram = LatencyHistogram()
+    for elapsed_ms in [0.05] * 90 + [3] * 9 + [7000]:
+        histogram.record(elapsed_ms)
+
+    summary = histogram.to_dict()
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == 0.1
+    assert summary["p95_ms"] == 5
+    assert summary["p99_ms"] == 5
+    assert summary["max_ms"] == 7000
+    assert histogram.percentile(1.0) == 7000
+
+
+def test_normalize_sql_collapses_whitespace():
+    assert normalize_sql("SELECT *\n    FROM users\tWHERE id = ?") == "SELECT * FROM users WHERE id = ?"
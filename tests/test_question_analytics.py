@@ -0,0 +1,106 @@
+"""
+Tests for per-question analytics.
+"""
+import pytest
+
+from database import Database
+from question_analytics import QuestionAnalytics
+
+QUESTIONS = [
+    {"question_text": f"Question {i}", "question_type": "short_answer", "correct_answer": "a"}
+    for i in range(3)
+]
+
+
+@pytest.fixture(params=[False, True], ids=["direct", "write_behind"])
+def queued_db(request, tmp_path):
+    """A database with and without the write-behind queue."""
+    database = Database(str(tmp_path / "analytics.db"), write_behind=request.param)
+    yield database
+    database.close()
+
+
+def _submit_attempts(db, quiz_id, question_ids, count):
+    for user_id in range(count):
+        responses = {question_id: ("a" if (user_id + n) % 2 else "b") for n, question_id in enumerate(question_ids)}
+        responses[question_ids[0]] = "a"
+        db.submit_quiz_attempt(quiz_id, user_id, responses)
+
+
+def test_refresh_folds_in_new_attempts_once(queued_db):
+    quiz_id, question_ids = queued_db.create_quiz_with_questions("Quiz", "Material", QUESTIONS)
+    _submit_attempts(queued_db, quiz_id, question_ids, 10)
+    analytics = QuestionAnalytics(queued_db, batch_size=3)
+
+    assert analytics.refresh() == 10
+    assert analytics.refresh() == 0
+
+    stats = analytics.get_question_stats(question_ids[0])
+    assert stats["responses"] == 10
+    assert stats["correct_rate"] == 1.0
+
+
+def test_rebuild_matches_incremental_refresh(queued_db):
+    quiz_id, question_ids = queued_db.create_quiz_with_questions("Quiz", "Material", QUESTIONS)
+    _submit_attempts(queued_db, quiz_id, question_ids, 6)
+    analytics = QuestionAnalytics(queued_db, refresh_interval=0)
+    incremental = analytics.get_quiz_question_stats(quiz_id)
+
+    assert analytics.rebuild() == 6
+    assert analytics.get_quiz_question_stats(quiz_id) == incremental
+
+
+def test_reads_skip_the_write_when_nothing_is_pending(queued_db):
+    queued_db.create_quiz_with_questions("Quiz", "Material", QUESTIONS)
+    analytics = QuestionAnalytics(queued_db, refresh_interval=0)
+    calls = []
+    analytics.refresh = lambda: calls.append(1) or 0
+
+    analytics.flag_questions()
+
+    assert calls == []
+
+
+def test_rescored_attempt_replaces_its_old_contribution(queued_db):
+    quiz_id, question_ids = queued_db.create_quiz_with_questions("Quiz", "Material", QUESTIONS[:1])
+    analytics = QuestionAnalytics(queued_db, refresh_interval=0)
+    attempt_id = queued_db.start_quiz_attempt(quiz_id, 1)
+    queued_db.record_question_response(attempt_id, question_ids[0], "b", False)
+    queued_db.complete_quiz_attempt(attempt_id, 0, 1)
+    assert analytics.get_question_stats(question_ids[0])["correct"] == 0
+
+    # Corrected response and re-score after the attempt was folded in
+    queued_db.record_question_response(attempt_id, question_ids[0], "a", True)
+    queued_db.complete_quiz_attempt(attempt_id, 1, 1)
+
+    stats = analytics.get_question_stats(question_ids[0])
+    assert (stats["responses"], stats["correct"]) == (2, 1)
+    assert queued_db.get_user_stats(1)["average_score"] == 100.0
+    analytics.rebuild()
+    assert analytics.get_question_stats(question_ids[0]) == stats
+
+
+def test_responses_recorded_after_processing_are_counted(queued_db):
+    quiz_id, question_ids = queued_db.create_quiz_with_questions("Quiz", "Material", QUESTIONS[:1])
+    analytics = QuestionAnalytics(queued_db, refresh_interval=0)
+    attempt_id = queued_db.start_quiz_attempt(quiz_id, 1)
+    queued_db.complete_quiz_attempt(attempt_id, 1, 1)
+    assert analytics.refresh() == 1
+
+    queued_db.record_question_response(attempt_id, question_ids[0], "a", True)
+
+    assert analytics.get_question_stats(question_ids[0])["correct"] == 1
+
+
+def test_cached_quiz_stats_are_cleared_on_refresh(queued_db):
+    quiz_id, question_ids = queued_db.create_quiz_with_questions("Quiz", "Material", QUESTIONS[:1])
+    _submit_attempts(queued_db, quiz_id, question_ids, 2)
+    analytics = QuestionAnalytics(queued_db)
+    analytics.refresh()
+    assert analytics.get_quiz_question_stats(quiz_id)[0]["responses"] == 2
+
+    # Stats changed by another process's refresh; this one folds in nothing
+    queued_db.submit_write(lambda conn: conn.execute("UPDATE question_stats SET response_count = 5")).result()
+
+    assert analytics.refresh() == 0
+    assert analytics.get_quiz_question_stats(quiz_id)[0]["responses"] == 5
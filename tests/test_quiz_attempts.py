@@ -0,0 +1,28 @@
+"""
+Tests for grading and recording quiz attempts.
+"""
+QUESTIONS = [
+    {"question_text": "2 + 2?", "question_type": "short_answer", "correct_answer": "4"},
+    {"question_text": "3 + 3?", "question_type": "short_answer", "correct_answer": "6"}
+]
+
+
+def test_submit_grades_against_stored_answers(db):
+    quiz_id, question_ids = db.create_quiz_with_questions("Sums", "Material", QUESTIONS)
+
+    result = db.submit_quiz_attempt(quiz_id, 1, {question_ids[0]: "4", question_ids[1]: "5", 999: "4"})
+
+    assert result["error"] is None
+    assert result["attempt_id"] > 0
+    assert result["score"] == 1.0
+    assert result["max_score"] == 2
+    assert result["results"] == {question_ids[0]: True, question_ids[1]: False}
+
+
+def test_submit_to_unknown_quiz_records_nothing(db):
+    result = db.submit_quiz_attempt(12345, 1, {1: "4"})
+
+    assert result["attempt_id"] == -1
+    assert result["error"] == "Quiz not found."
+    assert db.get_user_quiz_history(1) == []
+    assert db.get_user_stats(1)["attempt_count"] == 0
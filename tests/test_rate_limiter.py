@@ -0,0 +1,81 @@
+"""
+Tests for the token-bucket rate limiter.
+"""
+import time
+
+from rate_limiter import RateLimiter
+
+
+def test_burst_then_throttle():
+    limiter = RateLimiter(rate=1, burst=3)
+
+    assert [limiter.acquire("alice") for _ in range(3)] == [0.0, 0.0, 0.0]
+    retry_after = limiter.acquire("alice")
+
+    assert 0 < retry_after <= 1
+    assert limiter.acquire("bob") == 0.0
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_tokens_refill_over_time():
+    limiter = RateLimiter(rate=100, burst=1)
+
+    assert limiter.acquire("alice") == 0.0
+    assert limiter.acquire("alice") > 0
+    time.sleep(0.02)
+
+    assert limiter.acquire("alice") == 0.0
+
+
+def test_reset_forgets_a_bucket():
+    limiter = RateLimiter(rate=0.01, burst=1)
+    limiter.acquire("alice")
+
+    limiter.reset("alice")
+
+    assert limiter.acquire("alice") == 0.0
+
+
+def test_idle_buckets_expire():
+    limiter = RateLimiter(rate=100, burst=1)
+    limiter.acquire("alice")
+    time.sleep(0.02)
+
+    limiter.acquire("bob")
+
+    assert limiter.stats()["keys"] == 1
+
+
+def test_capacity_evicts_least_recently_used_and_admits_new_keys():
+    limiter = RateLimiter(rate=0.01, burst=1, max_keys=100)
+    for i in range(1000):
+        limiter.acquire(f"junk{i}")
+
+    assert limiter.acquire("legit_student") == 0.0
+    stats = limiter.stats()
+    assert stats["keys"] == 100
+    assert stats["evictions"] == 901
+
+
+def test_recently_attempted_key_survives_a_flood_smaller_than_capacity():
+    limiter = RateLimiter(rate=0.01, burst=1, max_keys=100)
+    limiter.acquire("victim")
+    assert limiter.acquire("victim") > 0
+
+    for i in range(99):
+        limiter.acquire(f"junk{i}")
+
+    assert limiter.acquire("victim") > 0
+
+
+def test_full_table_check_is_constant_time():
+    limiter = RateLimiter(rate=0.01, burst=1, max_keys=10000)
+    for i in range(10000):
+        limiter.acquire(f"junk{i}")
+
+    started = time.perf_counter()
+    for i in range(1000):
+        assert limiter.acquire(f"new{i}") == 0.0
+    per_call = (time.perf_counter() - started) / 1000
+
+    assert per_call < 0.0005
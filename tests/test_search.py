@@ -0,0 +1,75 @@
+"""
+Tests for question and quiz search.
+"""
+import pytest
+
+QUESTIONS = [
+    {"question_text": "Which organelle runs photosynthesis in plant cells?", "question_type": "short_answer",
+     "correct_answer": "chloroplast"},
+    {"question_text": "What gas do plants release?", "question_type": "short_answer", "correct_answer": "oxygen"},
+    {"question_text": "Name the powerhouse of the cell", "question_type": "short_answer",
+     "correct_answer": "mitochondria"}
+]
+
+
+@pytest.fixture
+def fts_db(db):
+    if not db.has_full_text_search:
+        pytest.skip("SQLite built without FTS5")
+    return db
+
+
+def test_search_questions_ranks_and_highlights(fts_db):
+    fts_db.create_quiz_with_questions("Plants", "Material", QUESTIONS)
+
+    results = fts_db.search_questions("plant photosynthesis")
+
+    assert [r["question_text"] for r in results][0] == QUESTIONS[0]["question_text"]
+    assert {r["question_text"] for r in results} == {QUESTIONS[0]["question_text"], QUESTIONS[1]["question_text"]}
+    assert "[photosynthesis]" in results[0]["snippet"]
+
+
+def test_search_questions_stems_and_matches_answers(fts_db):
+    fts_db.create_quiz_with_questions("Plants", "Material", QUESTIONS)
+
+    assert [r["correct_answer"] for r in fts_db.search_questions("running")] == ["chloroplast"]
+    assert [r["correct_answer"] for r in fts_db.search_questions("oxygen")] == ["oxygen"]
+
+
+def test_search_input_is_never_parsed_as_fts_syntax(fts_db):
+    fts_db.create_quiz_with_questions("Plants", "Material", QUESTIONS)
+
+    assert fts_db.search_questions('cell" OR NEAR(* AND') != []
+    assert fts_db.search_questions("?!") == []
+
+
+def test_index_follows_updates_and_deletes(fts_db):
+    quiz_id, question_ids = fts_db.create_quiz_with_questions("Plants", "Material", QUESTIONS)
+    with fts_db.transaction() as conn:
+        conn.execute("UPDATE questions SET question_text = 'Which pigment is green?' WHERE id = ?",
+                     (question_ids[0],))
+        conn.execute("DELETE FROM questions WHERE id = ?", (question_ids[1],))
+
+    assert fts_db.search_questions("photosynthesis") == []
+    assert fts_db.search_questions("plants") == []
+    assert [r["id"] for r in fts_db.search_questions("pigment")] == [question_ids[0]]
+
+
+def test_search_quizzes_matches_titles_and_source_material(fts_db):
+    biology, _ = fts_db.create_quiz_with_questions("Cell biology", "Mitochondria and ribosomes", QUESTIONS)
+    history, _ = fts_db.create_quiz_with_questions("Roman history", "Julius Caesar crossed the Rubicon", [])
+
+    assert [q["id"] for q in fts_db.search_quizzes("biology")] == [biology]
+    assert [q["id"] for q in fts_db.search_quizzes("Rubicon")] == [history]
+    assert {q["id"] for q in fts_db.search_quizzes("ribosomes caesar")} == {biology, history}
+
+
+def test_like_fallback_without_full_text_search(db):
+    quiz_id, _ = db.create_quiz_with_questions("Plant biology", "Material", QUESTIONS)
+    db.has_full_text_search = False
+
+    results = db.search_questions("powerhouse")
+    assert [r["question_text"] for r in results] == [QUESTIONS[2]["question_text"]]
+    assert results[0]["rank"] == 0
+    assert [q["id"] for q in db.search_quizzes("biology")] == [quiz_id]
+    assert db.search_quizzes("Rubicon") == []
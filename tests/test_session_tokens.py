@@ -0,0 +1,91 @@
+"""
+Tests for signed session tokens.
+"""
+import time
+
+from session_tokens import SessionTokens
+
+USER = {"id": 7, "is_admin": 1, "subscription_active": 1, "subscription_expires": "2030-01-01"}
+
+
+def test_issued_token_verifies_without_the_database():
+    tokens = SessionTokens("secret")
+
+    session = tokens.verify(tokens.issue(USER))
+
+    assert session["user_id"] == 7
+    assert session["is_admin"] is True
+    assert session["subscription_expires"] == "2030-01-01"
+
+
+def test_inactive_subscription_is_not_carried():
+    tokens = SessionTokens("secret")
+
+    session = tokens.verify(tokens.issue(dict(USER, subscription_active=0)))
+
+    assert session["subscription_expires"] is None
+
+
+def test_tampered_or_foreign_tokens_are_rejected():
+    tokens = SessionTokens("secret")
+    token = tokens.issue(USER)
+
+    assert tokens.verify(token[:-2] + ("AA" if token[-2:] != "AA" else "BB")) is None
+    assert SessionTokens("other-secret").verify(token) is None
+    assert tokens.verify("not a token") is None
+
+
+def test_expired_tokens_are_rejected():
+    tokens = SessionTokens("secret", max_age=1)
+    token = tokens.issue(USER)
+
+    time.sleep(2.1)
+
+    assert tokens.verify(token) is None
+
+
+def test_revoke_rejects_only_that_token():
+    tokens = SessionTokens("secret")
+    first, second = tokens.issue(USER), tokens.issue(USER)
+
+    assert tokens.revoke(first) is True
+    assert tokens.verify(first) is None
+    assert tokens.verify(second) is not None
+    assert tokens.revoke(first) is False
+
+
+def test_revoke_user_rejects_earlier_tokens_but_not_new_ones():
+    tokens = SessionTokens("secret")
+    old = tokens.issue(USER)
+    other_user = tokens.issue(dict(USER, id=8))
+
+    tokens.revoke_user(7)
+    new = tokens.issue(USER)
+
+    assert tokens.verify(old) is None
+    assert tokens.verify(other_user) is not None
+    # Reissued within the same second as the revocation
+    assert tokens.verify(new) is not None
+
+
+def test_revocations_survive_a_restart(tmp_path):
+    path = str(tmp_path / "revoked.json")
+    tokens = SessionTokens("secret", revocation_path=path)
+    logged_out, demoted = tokens.issue(USER), tokens.issue(dict(USER, id=8))
+    tokens.revoke(logged_out)
+    tokens.revoke_user(8)
+
+    restarted = SessionTokens("secret", revocation_path=path)
+
+    assert restarted.verify(logged_out) is None
+    assert restarted.verify(demoted) is None
+    assert restarted.verify(restarted.issue(USER)) is not None
+
+
+def test_unreadable_revocation_file_is_ignored(tmp_path):
+    path = tmp_path / "revoked.json"
+    path.write_text("{not json")
+
+    tokens = SessionTokens("secret", revocation_path=str(path))
+
+    assert tokens.verify(tokens.issue(USER)) is not None
@@ -0,0 +1,77 @@
+"""
+Tests for streaming upload helpers.
+"""
+import hashlib
+import io
+import os
+import stat
+
+import pytest
+
+from upload_io import FILE_MODE, atomic_write_path, copy_stream, save_stream, stage_stream
+
+DATA = b"0123456789" * 100000
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_save_stream_hashes_and_publishes_with_umask_mode(tmp_path):
+    path = str(tmp_path / "upload.pdf")
+
+    digest, size = save_stream(io.BytesIO(DATA), path, buffer_size=4096)
+
+    assert (digest, size) == (hashlib.sha256(DATA).hexdigest(), len(DATA))
+    assert open(path, "rb").read() == DATA
+    assert _mode(path) == FILE_MODE
+    assert os.listdir(tmp_path) == ["upload.pdf"]
+
+
+def test_stage_stream_uses_umask_mode(tmp_path):
+    temp_path, digest, size = stage_stream(io.BytesIO(DATA), str(tmp_path), ".pdf")
+    final_path = str(tmp_path / "final.pdf")
+    os.replace(temp_path, final_path)
+
+    assert digest == hashlib.sha256(DATA).hexdigest()
+    assert size == len(DATA)
+    assert _mode(final_path) == FILE_MODE
+
+
+def test_atomic_write_path_leaves_target_untouched_on_error(tmp_path):
+    path = str(tmp_path / "image.png")
+    with open(path, "wb") as f:
+        f.write(b"old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write_path(path) as temp_path:
+            with open(temp_path, "wb") as f:
+                f.write(b"new")
+            raise RuntimeError("write failed")
+
+    assert open(path, "rb").read() == b"old"
+    assert os.listdir(tmp_path) == ["image.png"]
+
+
+def test_copy_stream_reads_unseekable_streams_without_rewinding(tmp_path):
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"streamed upload")
+    os.close(write_fd)
+
+    dst = io.BytesIO()
+    with os.fdopen(read_fd, "rb", buffering=0) as src:
+        digest, size = copy_stream(src, dst, buffer_size=4)
+
+    assert dst.getvalue() == b"streamed upload"
+    assert size == len(b"streamed upload")
+    assert digest == hashlib.sha256(b"streamed upload").hexdigest()
+
+
+def test_copy_stream_rewinds_seekable_streams():
+    src = io.BytesIO(b"already read")
+    src.read()
+    dst = io.BytesIO()
+
+    copy_stream(src, dst)
+
+    assert dst.getvalue() == b"already read"
@@ -0,0 +1,135 @@
+"""
+Tests for upload deduplication and extracted-text caching.
+"""
+import io
+import os
+
+import pytest
+
+from upload_manager import UploadManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = UploadManager(str(tmp_path / "uploads"))
+    yield manager
+    manager.index.close()
+
+
+@pytest.fixture
+def extractions(manager, monkeypatch):
+    """Record PDF extractions and let tests choose what they return."""
+    calls = []
+    outcome = {"text": "Extracted lesson text", "errors": []}
+
+    def extract_text(path, errors=None):
+        calls.append(path)
+        if errors is not None:
+            errors.extend(outcome["errors"])
+        return outcome["text"]
+
+    monkeypatch.setattr(manager.pdf_handler, "extract_text", extract_text)
+    return calls, outcome
+
+
+def _upload(manager, data, name="lesson.pdf"):
+    return manager.process_upload(io.BytesIO(data), name)
+
+
+def test_repeat_upload_reuses_stored_file_and_text(manager, extractions):
+    calls, _ = extractions
+
+    first = _upload(manager, b"%PDF same bytes", "first.pdf")
+    second = _upload(manager, b"%PDF same bytes", "renamed.pdf")
+
+    assert first["success"] and second["success"]
+    assert (first["cache_hit"], second["cache_hit"]) == (False, True)
+    assert second["file_path"] == first["file_path"]
+    assert second["extracted_text"] == "Extracted lesson text"
+    assert second["original_filename"] == "renamed.pdf"
+    assert len(calls) == 1
+    assert os.listdir(manager.pdf_handler.upload_folder) == [os.path.basename(first["file_path"])]
+
+
+def test_different_contents_are_stored_separately(manager, extractions):
+    calls, _ = extractions
+
+    first = _upload(manager, b"%PDF one")
+    second = _upload(manager, b"%PDF two")
+
+    assert first["content_hash"] != second["content_hash"]
+    assert first["file_path"] != second["file_path"]
+    assert not second["cache_hit"]
+    assert len(calls) == 2
+
+
+def test_partial_extraction_is_returned_but_not_cached(manager, extractions):
+    calls, outcome = extractions
+    outcome["errors"] = ["Page 3: OCR timed out"]
+
+    first = _upload(manager, b"%PDF scanned")
+    outcome["errors"] = []
+    second = _upload(manager, b"%PDF scanned")
+
+    assert first["partial"] and first["success"]
+    assert not second["cache_hit"] and not second["partial"]
+    assert len(calls) == 2
+    assert _upload(manager, b"%PDF scanned")["cache_hit"]
+
+
+def test_error_text_is_not_cached(manager, extractions):
+    calls, outcome = extractions
+    outcome["text"] = "Error extracting text with PyPDF2: broken"
+
+    _upload(manager, b"%PDF broken")
+    second = _upload(manager, b"%PDF broken")
+
+    assert not second["cache_hit"]
+    assert len(calls) == 2
+
+
+def test_new_extractor_version_reextracts_from_the_stored_copy(manager, extractions, monkeypatch):
+    calls, outcome = extractions
+    first = _upload(manager, b"%PDF versioned")
+
+    monkeypatch.setattr(manager.pdf_handler, "EXTRACTOR_VERSION", manager.pdf_handler.EXTRACTOR_VERSION + 1)
+    outcome["text"] = "Better text"
+    second = _upload(manager, b"%PDF versioned")
+    third = _upload(manager, b"%PDF versioned")
+
+    assert calls == [first["file_path"], first["file_path"]]
+    assert second["extracted_text"] == "Better text" and not second["cache_hit"]
+    assert third["cache_hit"] and third["extracted_text"] == "Better text"
+
+
+def test_missing_stored_copy_is_replaced(manager, extractions):
+    calls, _ = extractions
+    first = _upload(manager, b"%PDF deleted")
+    os.unlink(first["file_path"])
+
+    second = _upload(manager, b"%PDF deleted")
+
+    assert not second["cache_hit"]
+    assert os.path.exists(second["file_path"])
+    assert len(calls) == 2
+
+
+def test_unsupported_type_is_rejected_without_staging(manager):
+    result = _upload(manager, b"plain", "notes.txt")
+
+    assert not result["success"]
+    assert result["error"] == "Unsupported file type: .txt"
+    assert not [name for name in os.listdir(manager.base_upload_folder) if name.endswith(".txt")]
+
+
+def test_without_index_every_upload_is_extracted(tmp_path, monkeypatch):
+    manager = UploadManager(str(tmp_path / "uploads"), use_index=False)
+    calls = []
+    monkeypatch.setattr(manager.pdf_handler, "extract_text",
+                        lambda path, errors=None: calls.append(path) or "text")
+
+    _upload(manager, b"%PDF same")
+    second = _upload(manager, b"%PDF same")
+
+    assert not second["cache_hit"]
+    assert len(calls) == 2
@@ -0,0 +1,88 @@
+"""
+Tests for the in-memory user cache.
+"""
+from user_cache import UserCache
+
+ALICE = {"id": 1, "username": "alice", "is_admin": 0}
+
+
+def test_put_and_lookup_by_id_and_username():
+    cache = UserCache()
+    cache.put(ALICE)
+
+    assert cache.get_by_id(1) == ALICE
+    assert cache.get_by_username("alice") == ALICE
+    assert cache.get_by_id(2) is None
+
+
+def test_stale_read_is_not_put_back_after_invalidation():
+    cache = UserCache()
+    generation = cache.generation()
+
+    # A write lands between the reader's query and its put
+    cache.invalidate(user_id=1)
+    cache.put(ALICE, generation)
+
+    assert cache.get_by_id(1) is None
+
+    cache.put(ALICE, cache.generation())
+    assert cache.get_by_id(1) == ALICE
+
+
+def test_invalidation_by_id_blocks_a_read_by_username():
+    cache = UserCache()
+    generation = cache.generation()
+
+    cache.invalidate(user_id=1)
+    cache.put(ALICE, generation)
+
+    assert cache.get_by_username("alice") is None
+
+
+def test_other_users_invalidations_do_not_block_puts():
+    cache = UserCache()
+    generation = cache.generation()
+
+    cache.invalidate(user_id=2)
+    cache.put(ALICE, generation)
+
+    assert cache.get_by_id(1) == ALICE
+
+
+def test_pruned_stamps_still_refuse_older_reads():
+    cache = UserCache(max_size=2)
+    generation = cache.generation()
+
+    cache.invalidate(user_id=1)
+    for user_id in range(2, 6):
+        cache.invalidate(user_id=user_id)
+    cache.put(ALICE, generation)
+
+    assert cache.get_by_id(1) is None
+
+
+def test_clear_refuses_reads_taken_before_it():
+    cache = UserCache()
+    generation = cache.generation()
+
+    cache.clear()
+    cache.put(ALICE, generation)
+
+    assert cache.get_by_id(1) is None
+
+
+def test_ttl_expiry():
+    cache = UserCache(ttl_seconds=0)
+    cache.put(ALICE)
+
+    assert cache.get_by_id(1) is None
+
+
+def test_database_writes_invalidate_cached_users(db):
+    user_id = db.add_user("alice", "hash")
+    assert db.get_user_by_id(user_id)["is_admin"] == 0
+
+    db.set_user_admin(user_id, True)
+
+    assert db.get_user_by_id(user_id)["is_admin"] == 1
+    assert db.get_user_by_username("alice")["is_admin"] == 1
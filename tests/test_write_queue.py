@@ -0,0 +1,134 @@
+"""
+Tests for the write-behind queue and Database write-behind mode.
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from database import Database
+from write_queue import WriteBehindQueue
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    """A database file with a single table to write to."""
+    path = str(tmp_path / "queue.db")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL)")
+    conn.close()
+    return path
+
+
+def _connect(path):
+    """Connection factory for the writer thread."""
+    return lambda: sqlite3.connect(path, check_same_thread=False)
+
+
+def _insert(name):
+    """Write operation inserting one item and returning its id."""
+    return lambda conn: conn.execute("INSERT INTO items (name) VALUES (?)", (name,)).lastrowid
+
+
+def _count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_concurrent_writes_are_batched(queue_path):
+    writer = WriteBehindQueue(_connect(queue_path), max_batch=50, max_delay=0.05)
+    futures = []
+    lock = threading.Lock()
+
+    def submit(start):
+        for i in range(start, start + 50):
+            future = writer.submit(_insert(f"item{i}"))
+            with lock:
+                futures.append(future)
+
+    threads = [threading.Thread(target=submit, args=(n * 50,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ids = [future.result(timeout=5) for future in futures]
+    stats = writer.stats()
+    writer.close()
+
+    assert len(set(ids)) == 200
+    assert _count(queue_path) == 200
+    assert stats["operations"] == 200
+    assert stats["batches"] < 200
+
+
+def test_failing_operation_is_rolled_back_alone(queue_path):
+    writer = WriteBehindQueue(_connect(queue_path), max_delay=0.05)
+
+    first = writer.submit(_insert("a"))
+    duplicate = writer.submit(_insert("a"))
+    second = writer.submit(_insert("b"))
+
+    assert first.result(timeout=5)
+    with pytest.raises(sqlite3.IntegrityError):
+        duplicate.result(timeout=5)
+    assert second.result(timeout=5)
+    assert writer.stats()["failed_operations"] == 1
+    writer.close()
+
+    assert _count(queue_path) == 2
+
+
+def test_close_flushes_pending_writes(queue_path):
+    writer = WriteBehindQueue(_connect(queue_path), max_delay=1.0)
+    futures = [writer.submit(_insert(f"item{i}")) for i in range(10)]
+
+    writer.close()
+
+    assert all(future.done() for future in futures)
+    assert _count(queue_path) == 10
+    with pytest.raises(RuntimeError):
+        writer.submit(_insert("late"))
+
+
+def test_database_write_behind_mode(tmp_path):
+    db = Database(str(tmp_path / "queued.db"), write_behind=True)
+    try:
+        user_id = db.add_user("alice", "hash", "alice@example.com")
+
+        assert user_id > 0
+        assert db.add_user("alice", "hash") == -1
+        assert db.get_user_by_id(user_id)["username"] == "alice"
+        assert db.write_queue_stats()["failed_operations"] == 1
+    finally:
+        db.close()
+
+
+def test_submit_racing_close_never_leaves_a_future_pending(queue_path):
+    for _ in range(20):
+        writer = WriteBehindQueue(_connect(queue_path), max_delay=0.001)
+        accepted = []
+        start = threading.Barrier(5)
+
+        def submit_until_closed(prefix):
+            start.wait()
+            for i in range(200):
+                try:
+                    accepted.append(writer.submit(lambda conn: None))
+                except RuntimeError:
+                    return
+
+        threads = [threading.Thread(target=submit_until_closed, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        writer.close()
+        for thread in threads:
+            thread.join()
+
+        for future in accepted:
+            future.result(timeout=5)
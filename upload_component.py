@@ -1,6 +1,7 @@
 import os
 import streamlit as st
 from text_extraction_component import extract_text
+from upload_io import save_stream
 
 # Directory to save uploaded files
 UPLOAD_DIR = "uploads"
@@ -16,9 +17,8 @@ class UploadManager:
         os.makedirs(UPLOAD_DIR, exist_ok=True)
         # Construct file path
         file_path = os.path.join(UPLOAD_DIR, uploaded_file.name)
-        # Save file bytes
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        # Stream file bytes to disk in chunks instead of copying the whole buffer
+        save_stream(uploaded_file, file_path)
         # Extract text from the saved file
         text = extract_text(file_path)
         return {"path": file_path, "text": text}
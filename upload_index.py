@@ -0,0 +1,103 @@
+"""
+Upload dedup index for AI Tutor application.
+Maps the SHA-256 of uploaded files to the stored copy and its extracted
+text, so identical uploads skip text extraction.
+"""
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+
+class UploadIndex:
+    """
+    Persistent content-hash index of processed uploads, stored in SQLite.
+    """
+
+    def __init__(self, index_path: str):
+        """
+        Open (and create if needed) the index.
+
+        Args:
+            index_path: Path to the SQLite index file
+        """
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(index_path, check_same_thread=False, timeout=30.0)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("""
+        CREATE TABLE IF NOT EXISTS uploads (
+            content_hash TEXT PRIMARY KEY,
+            file_type TEXT NOT NULL,
+            file_path TEXT NOT NULL,
+            extracted_text TEXT,
+            extractor_version TEXT NOT NULL,
+            size INTEGER,
+            hit_count INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        self._conn.commit()
+
+    def lookup(self, content_hash: str) -> Optional[Dict]:
+        """
+        Find a previously processed upload and count the hit.
+
+        Args:
+            content_hash: SHA-256 hex digest of the upload
+
+        Returns:
+            Dictionary with file_type, file_path, extracted_text and
+            extractor_version, or None if the content has not been seen
+        """
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM uploads WHERE content_hash = ?", (content_hash,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE uploads SET hit_count = hit_count + 1 WHERE content_hash = ?",
+                               (content_hash,))
+            self._conn.commit()
+            return dict(row)
+
+    def store(self, content_hash: str, file_type: str, file_path: str, extracted_text: Optional[str],
+              extractor_version: str, size: Optional[int] = None) -> None:
+        """
+        Record (or replace) the result of processing an upload.
+
+        Args:
+            content_hash: SHA-256 hex digest of the upload
+            file_type: Type of the file (image, pdf, docx)
+            file_path: Path of the stored copy
+            extracted_text: Text extracted from the file
+            extractor_version: Version of the extractor that produced the text
+            size: Size of the upload in bytes (optional)
+        """
+        with self._lock:
+            self._conn.execute("""
+            INSERT INTO uploads (content_hash, file_type, file_path, extracted_text, extractor_version, size)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (content_hash) DO UPDATE SET
+                file_type = excluded.file_type,
+                file_path = excluded.file_path,
+                extracted_text = excluded.extracted_text,
+                extractor_version = excluded.extractor_version,
+                size = excluded.size
+            """, (content_hash, file_type, file_path, extracted_text, extractor_version, size))
+            self._conn.commit()
+
+    def remove(self, content_hash: str) -> None:
+        """
+        Forget an upload, e.g. because its stored copy was deleted.
+
+        Args:
+            content_hash: SHA-256 hex digest of the upload
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM uploads WHERE content_hash = ?", (content_hash,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the index."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,128 @@
+"""
+Streaming file helpers for AI Tutor application.
+Copies uploads to disk in fixed-size chunks, hashing them on the way, and
+publishes files with an atomic rename so readers never see partial writes.
+"""
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+
+# Bytes copied per read; peak memory per upload is bounded by this
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+# The process umask can only be read by setting it, so read it once at import
+# rather than racing other threads later
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+# mkstemp creates files as 0600; published files get the usual open() mode instead
+FILE_MODE = 0o666 & ~_UMASK
+
+
+def copy_stream(src, dst, buffer_size: int = DEFAULT_BUFFER_SIZE) -> Tuple[str, int]:
+    """
+    Copy a binary stream in chunks, computing its SHA-256 and size in the same pass.
+
+    Args:
+        src: Readable binary file object (rewound first if seekable)
+        dst: Writable binary file object
+        buffer_size: Bytes read per call
+
+    Returns:
+        Tuple of (SHA-256 hex digest, size in bytes)
+    """
+    # Pipes and sockets have a seek() that raises; ask the stream instead
+    if getattr(src, 'seekable', None) is not None and src.seekable():
+        src.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = src.read(buffer_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        dst.write(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+@contextmanager
+def atomic_write_path(file_path: str) -> Iterator[str]:
+    """
+    Yield a temporary path next to file_path and move it into place on success.
+
+    The temporary file keeps file_path's extension so format detection by
+    extension (e.g. Pillow's save) still works, and gets FILE_MODE
+    permissions as if file_path had been created with open(). On error it
+    is removed and file_path is left untouched.
+
+    Args:
+        file_path: Final path of the file
+
+    Yields:
+        Temporary path to write to
+    """
+    directory = os.path.dirname(file_path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.splitext(file_path)[1])
+    os.close(fd)
+    try:
+        yield temp_path
+        os.chmod(temp_path, FILE_MODE)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def save_stream(src, file_path: str, buffer_size: int = DEFAULT_BUFFER_SIZE) -> Tuple[str, int]:
+    """
+    Stream an uploaded file to disk atomically, hashing it in the same pass.
+
+    Args:
+        src: Readable binary file object
+        file_path: Path to save the file as
+        buffer_size: Bytes read per call
+
+    Returns:
+        Tuple of (SHA-256 hex digest, size in bytes)
+    """
+    with atomic_write_path(file_path) as temp_path:
+        with open(temp_path, 'wb') as dst:
+            result = copy_stream(src, dst, buffer_size)
+    return result
+
+
+def stage_stream(src, directory: str, suffix: str = "",
+                 buffer_size: int = DEFAULT_BUFFER_SIZE) -> Tuple[str, str, int]:
+    """
+    Stream an uploaded file to a new temporary file, hashing it in the same pass.
+
+    The caller owns the temporary file: move it into place with os.replace
+    (same directory tree, so no data is copied) or delete it. It already
+    has FILE_MODE permissions.
+
+    Args:
+        src: Readable binary file object
+        directory: Directory to create the temporary file in
+        suffix: File name suffix, e.g. the upload's extension
+        buffer_size: Bytes read per call
+
+    Returns:
+        Tuple of (temporary path, SHA-256 hex digest, size in bytes)
+    """
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=suffix)
+    try:
+        with os.fdopen(fd, 'wb') as dst:
+            content_hash, size = copy_stream(src, dst, buffer_size)
+        os.chmod(temp_path, FILE_MODE)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    return temp_path, content_hash, size
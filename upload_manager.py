@@ -3,11 +3,20 @@ Main upload handler module for AI Tutor application.
 Integrates all file type handlers and provides a unified interface.
 """
 import os
-import uuid
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from image_handler import ImageHandler
 from pdf_handler import PDFHandler
 from docx_handler import DOCXHandler
+from upload_index import UploadIndex
+from upload_io import DEFAULT_BUFFER_SIZE, stage_stream
+
+# Handler results starting with one of these are failures and are not cached
+EXTRACTION_ERROR_PREFIXES = (
+    "Error extracting text",
+    "pdftotext failed",
+    "pdftotext extracted no text",
+    "No text extraction method"
+)
 
 class UploadManager:
     """
@@ -15,25 +24,37 @@ class UploadManager:
     Integrates image, PDF, and DOCX handlers.
     """
     
-    def __init__(self, base_upload_folder: str = "uploads"):
+    def __init__(self, base_upload_folder: str = "uploads", use_index: bool = True,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE):
         """
         Initialize the upload manager with handlers for each file type.
         
         Args:
             base_upload_folder: Base directory for all uploads
+            use_index: Reuse stored files and extracted text for repeated uploads
+            buffer_size: Bytes copied per chunk when saving uploads
         """
         self.base_upload_folder = base_upload_folder
+        self.buffer_size = buffer_size
         os.makedirs(base_upload_folder, exist_ok=True)
         
         # Initialize handlers for each file type
         self.image_handler = ImageHandler(os.path.join(base_upload_folder, "images"))
-        self.pdf_handler = PDFHandler(os.path.join(base_upload_folder, "pdfs"))
-        self.docx_handler = DOCXHandler(os.path.join(base_upload_folder, "docx"))
+        self.pdf_handler = PDFHandler(os.path.join(base_upload_folder, "pdfs"), buffer_size)
+        self.docx_handler = DOCXHandler(os.path.join(base_upload_folder, "docx"), buffer_size)
+        
+        # Content-hash index of processed uploads
+        self.index = UploadIndex(os.path.join(base_upload_folder, "upload_index.db")) if use_index else None
     
     def process_upload(self, file, original_filename: str) -> Dict:
         """
         Process an uploaded file based on its extension.
         
+        The upload is streamed to disk once, in chunks, while its SHA-256 is
+        computed. A file that has been processed before reuses the stored copy
+        and its extracted text instead of being extracted again. Partial text
+        (e.g. pages that failed to extract or OCR) is returned but not cached.
+        
         Args:
             file: The uploaded file object
             original_filename: Original name of the uploaded file
@@ -41,48 +62,131 @@ class UploadManager:
         Returns:
             Dictionary containing file information and extracted text
         """
-        # Generate a unique filename to prevent collisions
         file_ext = os.path.splitext(original_filename)[1].lower()
-        unique_filename = f"{uuid.uuid4().hex}{file_ext}"
         
         file_info = {
             "original_filename": original_filename,
-            "saved_filename": unique_filename,
+            "saved_filename": None,
             "file_type": file_ext.lstrip('.'),
             "file_path": None,
             "extracted_text": None,
+            "content_hash": None,
+            "cache_hit": False,
+            "partial": False,
             "success": False,
             "error": None
         }
         
+        if file_ext in ['.jpg', '.jpeg', '.png']:
+            file_type, handler = "image", self.image_handler
+        elif file_ext == '.pdf':
+            file_type, handler = "pdf", self.pdf_handler
+        elif file_ext == '.docx':
+            file_type, handler = "docx", self.docx_handler
+        else:
+            file_info["error"] = f"Unsupported file type: {file_ext}"
+            return file_info
+        file_info["file_type"] = file_type
+        extractor_version = f"{type(handler).__name__}:{handler.EXTRACTOR_VERSION}"
+        
+        staged_path = None
+        errors: List[str] = []
         try:
-            # Process based on file extension
-            if file_ext.lower() in ['.jpg', '.jpeg', '.png']:
-                file_path, extracted_text = self.image_handler.process_image(file, unique_filename)
-                file_info["file_type"] = "image"
-            
-            elif file_ext.lower() == '.pdf':
-                file_path, extracted_text = self.pdf_handler.process_pdf(file, unique_filename)
-                file_info["file_type"] = "pdf"
-            
-            elif file_ext.lower() == '.docx':
-                file_path, extracted_text = self.docx_handler.process_docx(file, unique_filename)
-                file_info["file_type"] = "docx"
+            staged_path, content_hash, size = stage_stream(file, self.base_upload_folder, file_ext, self.buffer_size)
+            file_info["content_hash"] = content_hash
             
+            cached = self._lookup(content_hash, file_type)
+            if cached is not None:
+                file_path = cached["file_path"]
+                if cached["extractor_version"] == extractor_version:
+                    extracted_text = cached["extracted_text"]
+                    file_info["cache_hit"] = True
+                else:
+                    # Stored copy is still good; only the extractor changed
+                    extracted_text = self._extract_text(handler, file_path, errors)
             else:
-                file_info["error"] = f"Unsupported file type: {file_ext}"
-                return file_info
+                # Name the stored copy after its contents so repeats map to one file
+                saved_filename = f"{content_hash}{file_ext}"
+                if file_type == "image":
+                    # Images are re-encoded by Pillow rather than stored as uploaded
+                    file_path, extracted_text = handler.process_image(staged_path, saved_filename)
+                else:
+                    file_path = os.path.join(handler.upload_folder, saved_filename)
+                    os.replace(staged_path, file_path)
+                    staged_path = None
+                    extracted_text = self._extract_text(handler, file_path, errors)
+            
+            if (not file_info["cache_hit"] and not errors and self.index is not None
+                    and self._is_cacheable(extracted_text)):
+                self.index.store(content_hash, file_type, file_path, extracted_text, extractor_version, size)
             
             # Update file info with results
+            file_info["saved_filename"] = os.path.basename(file_path)
             file_info["file_path"] = file_path
             file_info["extracted_text"] = extracted_text
+            file_info["partial"] = bool(errors)
             file_info["success"] = True
             
         except Exception as e:
             file_info["error"] = str(e)
+        finally:
+            if staged_path and os.path.exists(staged_path):
+                os.unlink(staged_path)
         
         return file_info
     
+    @staticmethod
+    def _extract_text(handler, file_path: str, errors: List[str]) -> str:
+        """
+        Extract text from a stored file, collecting problems from handlers that report them.
+        
+        Args:
+            handler: File type handler
+            file_path: Path of the stored file
+            errors: List that extraction problems are appended to
+            
+        Returns:
+            Extracted text
+        """
+        if isinstance(handler, PDFHandler):
+            return handler.extract_text(file_path, errors)
+        return handler.extract_text(file_path)
+    
+    def _lookup(self, content_hash: str, file_type: str) -> Optional[Dict]:
+        """
+        Find a previous upload with the same contents whose stored copy still exists.
+        
+        Args:
+            content_hash: SHA-256 hex digest of the upload
+            file_type: Type of the file (image, pdf, docx)
+            
+        Returns:
+            Index entry, or None on a miss
+        """
+        if self.index is None:
+            return None
+        cached = self.index.lookup(content_hash)
+        if cached is None or cached["file_type"] != file_type:
+            return None
+        if not os.path.exists(cached["file_path"]):
+            self.index.remove(content_hash)
+            return None
+        return cached
+    
+    @staticmethod
+    def _is_cacheable(extracted_text: Optional[str]) -> bool:
+        """
+        Check whether an extraction result is worth remembering.
+        
+        Args:
+            extracted_text: Text returned by a handler
+            
+        Returns:
+            False for empty results and handler error messages
+        """
+        return bool(extracted_text and extracted_text.strip()) and \
+            not extracted_text.startswith(EXTRACTION_ERROR_PREFIXES)
+    
     def get_file_path(self, filename: str, file_type: str) -> Optional[str]:
         """
         Get the full path to a saved file.
@@ -0,0 +1,191 @@
+"""
+User record cache for AI Tutor application.
+Keeps recently used rows from the users table in memory so repeated
+lookups during Streamlit reruns do not go back to SQLite.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Union
+
+
+class UserCache:
+    """
+    Thread-safe LRU cache of user records with a time-to-live.
+
+    Entries are keyed by user ID, with a secondary username index. Writes
+    made through Database invalidate the affected entry; changes made to
+    the database from outside this process become visible after the TTL.
+
+    A reader that misses takes a generation() token before querying the
+    database and passes it to put(). Every invalidation stamps the user's
+    ID or username with a new generation, so a row read before a
+    concurrent write is not put back into the cache after it.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300.0):
+        """
+        Initialize the user cache.
+
+        Args:
+            max_size: Maximum number of users kept in memory
+            ttl_seconds: Seconds before a cached record is considered stale
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._ids_by_username: Dict[str, int] = {}
+        # user ID or username -> generation of its last invalidation, oldest first
+        self._invalidated: "OrderedDict[Union[int, str], int]" = OrderedDict()
+        self._generation = 0
+        # Puts with a token older than this are refused; raised when stamps are pruned
+        self._floor = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get_by_id(self, user_id: int) -> Optional[Dict]:
+        """
+        Get a cached user record by ID.
+
+        Args:
+            user_id: User's ID
+
+        Returns:
+            Copy of the user dictionary, or None on a cache miss
+        """
+        with self._lock:
+            return self._lookup(user_id)
+
+    def get_by_username(self, username: str) -> Optional[Dict]:
+        """
+        Get a cached user record by username.
+
+        Args:
+            username: User's username
+
+        Returns:
+            Copy of the user dictionary, or None on a cache miss
+        """
+        with self._lock:
+            user_id = self._ids_by_username.get(username)
+            if user_id is None:
+                self._misses += 1
+                return None
+            return self._lookup(user_id)
+
+    def generation(self) -> int:
+        """
+        Get a token to take before reading a user from the database.
+
+        Returns:
+            Current invalidation generation, to be passed to put()
+        """
+        with self._lock:
+            return self._generation
+
+    def put(self, user: Dict, generation: Optional[int] = None) -> None:
+        """
+        Store a user record, unless it was invalidated after it was read.
+
+        Args:
+            user: User dictionary as returned by the database
+            generation: Token from generation() taken before the read (optional)
+        """
+        with self._lock:
+            if generation is not None and (
+                generation < self._floor
+                or self._invalidated.get(user["id"], 0) > generation
+                or self._invalidated.get(user["username"], 0) > generation
+            ):
+                return
+
+            user_id = user["id"]
+            self._remove(user_id)
+            self._entries[user_id] = (dict(user), time.monotonic() + self.ttl_seconds)
+            self._ids_by_username[user["username"]] = user_id
+
+            while len(self._entries) > self.max_size:
+                oldest_id = next(iter(self._entries))
+                self._remove(oldest_id)
+                self._evictions += 1
+
+    def invalidate(self, user_id: Optional[int] = None, username: Optional[str] = None) -> None:
+        """
+        Drop a user's cached record.
+
+        Args:
+            user_id: User's ID (optional)
+            username: User's username (optional)
+        """
+        with self._lock:
+            if user_id is None and username is not None:
+                user_id = self._ids_by_username.get(username)
+            self._generation += 1
+            for key in (user_id, username):
+                if key is not None:
+                    self._invalidated[key] = self._generation
+                    self._invalidated.move_to_end(key)
+            # Readers in flight are few; forget old stamps but refuse puts that predate them
+            while len(self._invalidated) > self.max_size:
+                _, stamp = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, stamp)
+            if user_id is not None and self._remove(user_id):
+                self._invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every cached record."""
+        with self._lock:
+            self._entries.clear()
+            self._ids_by_username.clear()
+            self._invalidated.clear()
+            self._generation += 1
+            self._floor = self._generation
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache usage counters.
+
+        Returns:
+            Dictionary of size, hit, miss, eviction and invalidation counts
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations
+            }
+
+    def _lookup(self, user_id: int) -> Optional[Dict]:
+        """Return a copy of a live entry and mark it recently used. Caller holds the lock."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        user, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(user_id)
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self._hits += 1
+        return dict(user)
+
+    def _remove(self, user_id: int) -> bool:
+        """Remove an entry and its username index. Caller holds the lock."""
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return False
+        username = entry[0].get("username")
+        if self._ids_by_username.get(username) == user_id:
+            del self._ids_by_username[username]
+        return True
@@ -0,0 +1,216 @@
+"""
+Write-behind queue for AI Tutor application.
+Funnels database mutations from all session threads through a single
+writer thread that groups them into batched transactions.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# A write operation receives the writer's connection, already inside a
+# transaction, and returns its result (e.g. an inserted row id).
+WriteOperation = Callable[[sqlite3.Connection], Any]
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Single-writer queue that commits queued mutations in groups.
+
+    The writer takes the first waiting operation, then keeps collecting
+    until max_batch operations are queued or max_delay seconds have passed,
+    and runs them all in one transaction. Each operation runs under its own
+    SAVEPOINT, so one failing operation is rolled back alone and its future
+    receives the exception. Futures are resolved only after the commit.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], max_batch: int = 100,
+                 max_delay: float = 0.005, max_queue: int = 10000):
+        """
+        Initialize and start the writer thread.
+
+        Args:
+            connect: Callable returning a new connection for the writer thread
+            max_batch: Maximum operations per transaction
+            max_delay: Seconds to wait for more operations after the first one arrives
+            max_queue: Maximum queued operations before submit() blocks
+        """
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._conn = connect()
+        self._closed = False
+        self._close_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._operations = 0
+        self._failed_operations = 0
+        self._failed_batches = 0
+        self._max_batch_seen = 0
+        self._commit_time = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, operation: WriteOperation) -> Future:
+        """
+        Queue a write operation.
+
+        Args:
+            operation: Callable taking the writer connection and returning a result
+
+        Returns:
+            Future resolved with the operation's result once its batch commits
+
+        Raises:
+            RuntimeError: If the queue has been closed
+        """
+        future: Future = Future()
+        # Checked and queued under the close lock so nothing lands behind _STOP
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("Write queue is closed.")
+            self._queue.put((operation, future))
+        return future
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Flush queued operations and stop the writer thread.
+
+        Args:
+            timeout: Seconds to wait for the writer to finish (None waits indefinitely)
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self._conn.close()
+            # The writer is gone; anything it did not take would otherwise wait forever
+            self._fail_pending(RuntimeError("Write queue closed before the operation ran."))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get writer counters.
+
+        Returns:
+            Dictionary of batch, operation and commit statistics
+        """
+        with self._stats_lock:
+            return {
+                "queued": self._queue.qsize(),
+                "batches": self._batches,
+                "operations": self._operations,
+                "failed_operations": self._failed_operations,
+                "failed_batches": self._failed_batches,
+                "mean_batch_size": round(self._operations / self._batches, 2) if self._batches else 0.0,
+                "max_batch_size": self._max_batch_seen,
+                "total_commit_seconds": round(self._commit_time, 6)
+            }
+
+    def _fail_pending(self, error: Exception) -> None:
+        """Fail every operation still queued."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is _STOP:
+                continue
+            _, future = item
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+    def _run(self) -> None:
+        """Writer thread main loop."""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._execute_batch(batch)
+
+        # Drain anything submitted concurrently with close()
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftovers.append(item)
+        if leftovers:
+            self._execute_batch(leftovers)
+
+    def _execute_batch(self, batch: List[Tuple[WriteOperation, Future]]) -> None:
+        """Run a batch of operations in one transaction and resolve their futures."""
+        outcomes: List[Tuple[Future, bool, Any]] = []
+        conn = self._conn
+        started = time.monotonic()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for operation, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT write_op")
+                try:
+                    result = operation(conn)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_op")
+                    conn.execute("RELEASE write_op")
+                    outcomes.append((future, False, e))
+                else:
+                    conn.execute("RELEASE write_op")
+                    outcomes.append((future, True, result))
+            conn.commit()
+        except Exception as e:
+            # The whole transaction is lost; fail every operation in it
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+            with self._stats_lock:
+                self._failed_batches += 1
+            for operation, future in batch:
+                if future.done():
+                    continue
+                if future.running() or future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+            return
+
+        elapsed = time.monotonic() - started
+        failed = 0
+        for future, succeeded, value in outcomes:
+            if succeeded:
+                future.set_result(value)
+            else:
+                failed += 1
+                future.set_exception(value)
+
+        with self._stats_lock:
+            self._batches += 1
+            self._operations += len(outcomes)
+            self._failed_operations += failed
+            self._max_batch_seen = max(self._max_batch_seen, len(outcomes))
+            self._commit_time += elapsed